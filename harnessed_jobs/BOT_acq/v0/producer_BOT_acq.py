@@ -12,14 +12,19 @@ import json
 import shutil
 import subprocess
 import pathlib
+import warnings
 import siteUtils
-from bot_acq_retry import copy_exposure_symlinks
+from bot_acq_retry import RetryPlan, copy_exposure_symlinks, \
+    index_exposure_symlinks
+from bot_data_launcher import run_bot_data, count_cfg_frames
+from sequencer_staging import stage_sequencer_files
 
 
 def copy_sequencer_files():
     """
     Run ccs_get_sequencer_paths.py script to get sequencer files. Copy
-    these files via scp to the current working directory.
+    these files via scp to the current working directory, reusing the
+    cached copies of files that haven't changed since a previous job.
     """
     json_file = 'sequencer_paths.json'
     my_ccs_script = os.path.join(os.environ['IANDTJOBSDIR'], 'harnessed_jobs',
@@ -28,10 +33,7 @@ def copy_sequencer_files():
     subprocess.check_call(command, shell=True)
     with open(json_file, 'r') as fd:
         seq_paths = json.load(fd)
-    for _, value in seq_paths.items():
-        command = f'scp {value} .'
-        print(command)
-        subprocess.check_call(command, shell=True)
+    stage_sequencer_files(seq_paths.values())
 
 
 # Check if acq_run is set in the lcatr.cfg file.  If so, then do not
@@ -50,12 +52,41 @@ outfile = os.path.basename(bot_eo_acq_cfg).replace('.cfg', '') \
 shutil.copy(bot_eo_acq_cfg, os.path.join('.', outfile))
 
 copy_sequencer_files()
-skip = os.environ.get('LCATR_SKIP_EXPOSURES', copy_exposure_symlinks())
+if 'LCATR_SKIP_EXPOSURES' in os.environ:
+    # Copy the symlinks from the previous attempts regardless.
+    copy_exposure_symlinks()
+    plan = RetryPlan([dict(skip=int(os.environ['LCATR_SKIP_EXPOSURES']),
+                           limit=None, done=False)])
+else:
+    plan = RetryPlan.create()
 
-command = (f'/home/ccs/bot-data.py --symlink . --skip {skip} '
-           f'--run {run_number} {bot_eo_acq_cfg}')
+# bot-data.py can only skip the start of the acquisition sequence, so
+# the frames missing from the previous attempts can't be retaken
+# without interrupting an acquisition.  They are recorded in the plan
+# file, and only the rest of the sequence is taken.
+for gap in plan.gaps():
+    warnings.warn(f"{gap['limit']} frame(s) from seqnum {gap['skip']} "
+                  "are missing from the previous attempts and will not "
+                  "be retaken.")
 
-print("executing: {command}")
-subprocess.check_call(command, shell=True)
+# The number of frames in the full acquisition sequence, for the
+# progress estimates.
+total_frames = count_cfg_frames(bot_eo_acq_cfg)
+
+for segment in plan.pending():
+    if segment['limit'] is not None:
+        continue
+    command = (f'/home/ccs/bot-data.py --symlink . --skip {segment["skip"]} '
+               f'--run {run_number} {bot_eo_acq_cfg}')
+    expected_frames = None if total_frames is None \
+        else max(total_frames - segment['skip'], 0)
+    run_bot_data(command, expected_frames=expected_frames)
+    # Only record the segment as done if its frames have symlinks.
+    seqnums = index_exposure_symlinks(['.'])
+    if RetryPlan.segment_taken(segment, seqnums, total_frames=total_frames):
+        plan.mark_done(segment)
+    else:
+        warnings.warn(f"The frames from seqnum {segment['skip']} were not "
+                      "all taken.")
 
 pathlib.Path('PRESERVE_SYMLINKS').touch()
@@ -4,45 +4,55 @@ Validator script for BOT_acq harnessed job.
 """
 import os
 import shutil
-import glob
 import lcatr.schema
 import siteUtils
 from camera_components import camera_info
-
-results = []
-
-if 'LCATR_ACQ_RUN' not in os.environ:
-    det_names = camera_info.get_det_names()
-    for det_name in det_names:
-        fits_files = sorted(glob.glob('*/*_{}.fits'.format(det_name)))
-        for item in fits_files:
-            results.append(lcatr.schema.fileref.make(item))
-
-    pd_files = sorted(glob.glob('*/Photodiode_Readings*.txt'))
-    results.extend([lcatr.schema.fileref.make(_) for _ in pd_files])
-
-    seq_files = glob.glob('*.seq')
-    results.extend([lcatr.schema.fileref.make(_) for _ in seq_files])
-
-    ccs_config_file = 'ccs_config.txt'
-    if os.path.isfile(ccs_config_file):
-        # Add the run number to filename.
-        run_number = siteUtils.getRunNumber()
-        outfile = f'ccs_config_{run_number}.txt'
-        shutil.copy(ccs_config_file, outfile)
-        results.append(lcatr.schema.fileref.make(outfile))
-
-    acq_config = siteUtils.get_job_acq_configs()
-    bot_eo_acq_cfg = os.path.basename(acq_config['bot_eo_acq_cfg'])
-    cfg_files = glob.glob(bot_eo_acq_cfg.replace('.cfg', '') + '*.cfg')
-    results.extend([lcatr.schema.fileref.make(_) for _ in cfg_files])
-
-try:
-    results = siteUtils.persist_ccs_versions(results)
-except Exception as eobj:
-    print('Error encountered in persisting CCS versions:\n', eobj)
-
-results.extend(siteUtils.jobInfo())
-
-lcatr.schema.write_file(results)
-lcatr.schema.validate_file()
+from frame_index import JobFileIndex
+from fileref_utils import make_filerefs
+from results_writer import ResultsWriter
+from cached_fs import get_cached_fs
+
+# The frame filerefs are streamed to summary.lims as they are made.
+with ResultsWriter() as writer:
+    results = []
+
+    if 'LCATR_ACQ_RUN' not in os.environ:
+        # Index the job directory and frame folders in a single pass
+        # rather than globbing all of the frame folders for each detector.
+        # The frame folders are symlinks, so list and stat them through
+        # the cached file system view, which make_filerefs also uses.
+        job_files = JobFileIndex('.', fs=get_cached_fs())
+        det_names = camera_info.get_det_names()
+        fits_files = []
+        for det_name in det_names:
+            fits_files.extend(job_files.det_files(det_name))
+        writer.extend(make_filerefs(fits_files))
+
+        pd_files = job_files.folder_files('Photodiode_Readings*.txt')
+        writer.extend(make_filerefs(pd_files))
+
+        seq_files = job_files.top_level('*.seq')
+        results.extend([lcatr.schema.fileref.make(_) for _ in seq_files])
+
+        ccs_config_file = 'ccs_config.txt'
+        if os.path.isfile(ccs_config_file):
+            # Add the run number to filename.
+            run_number = siteUtils.getRunNumber()
+            outfile = f'ccs_config_{run_number}.txt'
+            shutil.copy(ccs_config_file, outfile)
+            results.append(lcatr.schema.fileref.make(outfile))
+
+        acq_config = siteUtils.get_job_acq_configs()
+        bot_eo_acq_cfg = os.path.basename(acq_config['bot_eo_acq_cfg'])
+        cfg_files = job_files.top_level(bot_eo_acq_cfg.replace('.cfg', '')
+                                        + '*.cfg')
+        results.extend([lcatr.schema.fileref.make(_) for _ in cfg_files])
+
+    try:
+        results = siteUtils.persist_ccs_versions(results)
+    except Exception as eobj:
+        print('Error encountered in persisting CCS versions:\n', eobj)
+
+    results.extend(siteUtils.jobInfo())
+
+    writer.extend(results)
@@ -14,10 +14,13 @@ presumably from prior acquisitions attempts and are more likely to be
 corrupted or incomplete and so will be ignored.
 """
 import os
-import glob
 import shutil
 import pathlib
+import warnings
 import siteUtils
+from cached_fs import get_cached_fs
+from frame_catalog import FrameCatalog
+from bot_acq_recovery import index_attempt_dirs, bad_frame_folders
 
 # Get the acq_run to use for the data recovery and aggregation from
 # lcatr.cfg.
@@ -34,22 +37,29 @@ staging_dir = os.path.join(os.environ['LCATR_STAGE_ROOT'],
                            siteUtils.getUnitType(), siteUtils.getUnitId())
 outdir = '.'
 acqs_dir = os.path.join(staging_dir, acq_run, 'BOT_acq', 'v0')
-job_id_dirs = sorted(glob.glob(os.path.join(acqs_dir, '[0-9]*')), reverse=True)
-for job_id_dir in job_id_dirs:
-    frame_dirs = glob.glob(os.path.join(job_id_dir, '*'))
-    for frame_dir in frame_dirs:
-        dest = os.path.join(outdir, os.path.basename(frame_dir))
-        if ((os.path.islink(frame_dir) or frame_dir.endswith('.cfg'))
-            and not os.path.lexists(dest)):
-            shutil.copyfile(frame_dir, dest, follow_symlinks=False)
+
+fs = get_cached_fs()
+existing = set(fs.listdir(outdir))
+for name, src in index_attempt_dirs(acqs_dir).items():
+    if name not in existing:
+        shutil.copyfile(src, os.path.join(outdir, name), follow_symlinks=False)
+fs.invalidate(outdir)
 
 # Delete any folders with bad data
-fits_images = []
-for bad_frame in bad_frames:
-    pattern = os.path.join('*', f'*{bad_frame}*.fits')
-    fits_images.extend(glob.glob(pattern))
-bad_symlinks = set([os.path.dirname(_) for _ in fits_images])
-for bad_symlink in bad_symlinks:
+for bad_symlink in bad_frame_folders(outdir, bad_frames):
     os.remove(bad_symlink)
+    fs.invalidate(bad_symlink)
+
+# Catalog the aggregated frames, reporting the number of frames for
+# each test type and any frames that were taken in other runs.
+with FrameCatalog(os.path.join(outdir, 'frame_catalog.db')) as catalog:
+    catalog.ingest(outdir)
+    for testtype, nframes in catalog.testtype_counts().items():
+        print(f'{testtype}: {nframes} frames')
+    other_runs = [_['name'] for _ in catalog.frames()
+                  if _['run'] is not None and _['run'] != acq_run]
+    if other_runs:
+        warnings.warn(f"{len(other_runs)} frames are not from run {acq_run}"
+                      f": {', '.join(other_runs)}")
 
 pathlib.Path('PRESERVE_SYMLINKS').touch()
@@ -2,26 +2,31 @@
 """
 Validator script for BOT_acq harnessed job.
 """
-import glob
 import lcatr.schema
 import siteUtils
 from camera_components import camera_info
+from frame_index import JobFileIndex
+from fileref_utils import make_filerefs
+from results_writer import ResultsWriter
+from cached_fs import get_cached_fs
 
-results = []
+# The frame filerefs are streamed to summary.lims as they are made.
+with ResultsWriter() as writer:
+    # Index the job directory and frame folders in a single pass
+    # rather than globbing all of the frame folders for each detector.
+    # The frame folders are symlinks, so list and stat them through
+    # the cached file system view, which make_filerefs also uses.
+    job_files = JobFileIndex('.', fs=get_cached_fs())
+    det_names = camera_info.get_det_names()
+    fits_files = []
+    for det_name in det_names:
+        fits_files.extend(job_files.det_files(det_name))
+    writer.extend(make_filerefs(fits_files))
 
-det_names = camera_info.get_det_names()
-for det_name in det_names:
-    fits_files = sorted(glob.glob('*/*_{}.fits'.format(det_name)))
-    for item in fits_files:
-        results.append(lcatr.schema.fileref.make(item))
+    pd_files = job_files.folder_files('Photodiode_Readings.txt')
+    writer.extend(make_filerefs(pd_files))
 
-pd_files = sorted(glob.glob('*/Photodiode_Readings.txt'))
-results.extend([lcatr.schema.fileref.make(_) for _ in pd_files])
+    cfg_files = job_files.top_level('*.cfg')
+    writer.extend(lcatr.schema.fileref.make(_) for _ in cfg_files)
 
-cfg_files = glob.glob('*.cfg')
-results.extend([lcatr.schema.fileref.make(_) for _ in cfg_files])
-
-results.extend(siteUtils.jobInfo())
-
-lcatr.schema.write_file(results)
-lcatr.schema.validate_file()
+    writer.extend(siteUtils.jobInfo())
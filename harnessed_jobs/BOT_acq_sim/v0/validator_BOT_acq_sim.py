@@ -1,24 +1,20 @@
 #!/usr/bin/env python
 """ Validator script """
 import os
-import glob
 import time
-import lcatr.schema
 import siteUtils
+from fileref_utils import make_filerefs
+from results_writer import ResultsWriter
+from cached_fs import get_cached_fs
 
-results = []
-
-if 'LCATR_ACQ_RUN' not in os.environ:
-    files = sorted(glob.glob(os.path.join('.', '*', '*.fits')))
-    t0 = time.time()
-    results.extend([lcatr.schema.fileref.make(item) for item in files])
-    print('time to make filerefs:', (time.time() - t0)/60., 'mins')
-
-results.extend(siteUtils.jobInfo())
-
+# The filerefs are streamed to summary.lims as they are made.
 t0 = time.time()
-lcatr.schema.write_file(results)
+with ResultsWriter() as writer:
+    if 'LCATR_ACQ_RUN' not in os.environ:
+        files = sorted(get_cached_fs().glob(os.path.join('.', '*', '*.fits')))
+        writer.extend(make_filerefs(files))
+        print('time to make, validate and write filerefs:',
+              (time.time() - t0)/60., 'mins')
+
+    writer.extend(siteUtils.jobInfo())
 print('time to write summary.lims:', (time.time() - t0)/60., 'mins')
-t0 = time.time()
-lcatr.schema.validate_file()
-print('time to validate summary.lims:', (time.time() - t0)/60., 'mins')
@@ -5,16 +5,25 @@ Producer script for BOT aliveness test acquisitions.
 import os
 import glob
 import shutil
-import subprocess
 import pathlib
+import threading
+import multiprocessing
+import numpy as np
 import matplotlib.pyplot as plt
-import lsst.afw.math as afw_math
 import siteUtils
-import lsst.eotest.sensor as sensorTest
-import lsst.eotest.raft as raftTest
-from correlated_noise import correlated_noise, raft_level_oscan_correlations
 from camera_components import camera_info
-from multiprocessor_execution import run_device_analysis_pool
+# The BOT job uses the numpy backend unless another one is specified:
+# it memory-maps uncompressed frames, and decoded compressed frames
+# are shared between the analysis passes by the frame cache, whereas
+# the eotest backend decodes each frame again in each pass.
+os.environ.setdefault('ALIVENESS_BACKEND', 'numpy')
+import aliveness_utils
+from aliveness_plots import plot_raft_amp_values, \
+    plot_overscan_correlations, plot_amp_correlations
+from frame_cache import get_frame_cache, make_cache_dir
+from aliveness_products import AnalysisProduct
+from result_cache import enable_result_cache
+from bot_data_launcher import run_bot_data
 
 run_number = siteUtils.getRunNumber()
 
@@ -25,7 +34,7 @@ def take_bot_data():
     acq_config = siteUtils.get_job_acq_configs()
     command = '/home/ccs/bot-data.py --symlink . --run {} {}'\
         .format(run_number, acq_config['bot_aliveness_cfg'])
-    subprocess.check_call(command, shell=True)
+    run_bot_data(command)
 
 
 def symlink_r_and_d_data(r_and_d_path=None):
@@ -61,14 +70,24 @@ def get_bias_files(raft_name):
     return bias_files
 
 
+def raft_read_noise_arrays(bias_files):
+    """
+    Compute the read noise for each channel in a raft and return
+    the product arrays.
+    """
+    read_noise = aliveness_utils.raft_read_noise(bias_files)
+    slots = sorted(read_noise)
+    amps = sorted(read_noise[slots[0]])
+    values = [[read_noise[slot][amp] for amp in amps] for slot in slots]
+    return dict(slots=slots, amps=amps, read_noise=np.array(values))
+
+
 def read_noise_stats(raft_name, run_number=run_number):
     """
-    Compute the read noise stats and make plots.
+    Compute the read noise stats and write them to a product file.
     """
     file_prefix = '{}_{}'.format(run_number, raft_name)
-    title = '{}, {}'.format(run_number, raft_name)
 
-    results_files = dict()
     try:
         bias_files = get_bias_files(raft_name)
     except FileNotFoundError:
@@ -76,47 +95,77 @@ def read_noise_stats(raft_name, run_number=run_number):
               raft_name)
         return
 
-    for slot_name in bias_files:
-        det_name = '{}_{}'.format(raft_name, slot_name)
-        ccd = sensorTest.MaskedCCD(bias_files[slot_name][-1])
-        bbox = ccd.amp_geom.serial_overscan
-        bbox.grow(-10)
-        outfile = '%s_eotest_results.fits' % det_name
-        results = sensorTest.EOTestResults(outfile)
-        for amp in ccd:
-            image = ccd[amp].getImage()
-            oscan = image.Factory(image, bbox)
-            read_noise \
-                = afw_math.makeStatistics(oscan, afw_math.STDEVCLIP).getValue()
-            results.add_seg_result(amp, 'READ_NOISE', read_noise)
-        results.write()
-        results_files[slot_name] = outfile
-
-    spec_plots = raftTest.RaftSpecPlots(results_files)
-    spec_plots.make_plot('READ_NOISE', 'noise per pixel (ADU rms)',
-                         title=title)
-    plt.savefig('{}_read_noise.png'.format(file_prefix))
+    bias_files = {slot_name: x[-1] for slot_name, x in bias_files.items()}
+    product = AnalysisProduct('{}_read_noise'.format(file_prefix),
+                              bias_files.values(), params=dict(border=10))
+    product.compute(raft_read_noise_arrays, bias_files)
 
-def correlated_noise_figures(det_name, run_number=run_number):
+
+def read_noise_plot(raft_name, run_number=run_number):
+    """
+    Make the read noise plot from the product file.
     """
-    Compute intra-CCD read noise correlations.
+    file_prefix = '{}_{}'.format(run_number, raft_name)
+    title = '{}, {}'.format(run_number, raft_name)
+    product = AnalysisProduct('{}_read_noise'.format(file_prefix), None)
+    png_file = '{}_read_noise.png'.format(file_prefix)
+    if not os.path.isfile(product.path) or not product.needs_plot(png_file):
+        return
+    data = product.load()
+    read_noise = {slot: dict(zip(data['amps'], values)) for slot, values
+                  in zip(data['slots'], data['read_noise'])}
+    plot_raft_amp_values(read_noise, 'noise per pixel (ADU rms)', title=title)
+    plt.savefig(png_file)
+
+
+def correlated_noise_stats(det_name, run_number=run_number):
+    """
+    Compute intra-CCD read noise correlations and write them to a
+    product file.
     """
     file_prefix = '{}_{}'.format(run_number, det_name)
-    title = '{}, {}'.format(run_number, det_name)
     pattern = 'dark_bias_*/*_{}.fits'.format(det_name)
     bias_files = sorted(glob.glob(pattern))
     if not bias_files:
-        print("correlated_noise_figures: Needed bias files not found for",
+        print("correlated_noise_stats: Needed bias files not found for",
               det_name)
         return
-    _, corr_fig, _ = correlated_noise(bias_files, target=0, make_plots=True,
-                                      title=title)
-    plt.figure(corr_fig.number)
-    plt.savefig('{}_correlated_noise.png'.format(file_prefix))
+    product = AnalysisProduct('{}_correlated_noise'.format(file_prefix),
+                              bias_files, params=dict(target=0, border=10))
+    product.compute(aliveness_utils.ccd_correlated_noise, bias_files,
+                    target=0)
+
+
+def correlated_noise_figures(det_name, run_number=run_number):
+    """
+    Make the intra-CCD read noise correlation plot from the product file.
+    """
+    file_prefix = '{}_{}'.format(run_number, det_name)
+    title = '{}, {}'.format(run_number, det_name)
+    product = AnalysisProduct('{}_correlated_noise'.format(file_prefix), None)
+    png_file = '{}_correlated_noise.png'.format(file_prefix)
+    if not os.path.isfile(product.path) or not product.needs_plot(png_file):
+        return
+    data = product.load()
+    plot_amp_correlations(data['amps'], data['corr'], noise=data['noise'],
+                          title=title)
+    plt.savefig(png_file)
+
+
+def overscan_correlation_arrays(bias_files):
+    """
+    Compute the raft-level overscan correlation matrix and return the
+    product arrays.
+    """
+    channels, corr = aliveness_utils.raft_overscan_correlations(bias_files)
+    return dict(slots=[_[0] for _ in channels],
+                amps=[_[1] for _ in channels], corr=corr)
+
 
 def raft_overscan_correlations(raft_name, run_number=run_number):
     """
-    Compute raft-level inter-CCD read noise correlations.
+    Compute raft-level inter-CCD read noise correlations, write them
+    to a product file, and make the plot.
     """
     file_prefix = '{}_{}'.format(run_number, raft_name)
     title = '{}, {}'.format(run_number, raft_name)
@@ -129,18 +178,181 @@ def raft_overscan_correlations(raft_name, run_number=run_number):
         return
 
     bias_files = {slot_name: x[0] for slot_name, x in bias_files.items()}
+    product = AnalysisProduct('{}_overscan_correlations'.format(file_prefix),
+                              bias_files.values(), params=dict(border=10))
+    data = product.compute(overscan_correlation_arrays, bias_files)
+    png_file = '{}_overscan_correlations.png'.format(file_prefix)
+    if not os.path.isfile(product.path) or not product.needs_plot(png_file):
+        return
     oscan_title = 'Overscan correlations, {}'.format(title)
-    raft_level_oscan_correlations(bias_files, title=oscan_title)
-    plt.savefig('{}_overscan_correlations.png'.format(file_prefix))
+    plot_overscan_correlations(list(zip(data['slots'], data['amps'])),
+                               data['corr'], title=oscan_title)
+    plt.savefig(png_file)
+
+
+def dark_channel_signals(raft_name):
+    """
+    Compute the channel signals of the raft's CCDs in the dark frames,
+    so that the validator can retrieve them from the result cache.
+    """
+    for fits_file in sorted(glob.glob('dark_dark_*/*_{}_*.fits'
+                                      .format(raft_name))):
+        aliveness_utils.get_channel_signals(fits_file)
+
+
+def run_analysis_task(func, device_name):
+    """
+    Run an analysis function for a raft or detector in a pool worker,
+    closing its figures afterwards since the workers are long-lived.
+    """
+    try:
+        func(device_name)
+    finally:
+        plt.close('all')
+    return device_name
+
 
+class RaftAnalysisScheduler:
+    """
+    Run the per-raft analyses as dependent tasks on a single
+    multiprocessing pool.  For each raft, the read noise task runs
+    first, so that the bias frames are decoded into the frame cache,
+    and on its completion the read noise plotting task, the correlated
+    noise tasks for the raft's detectors, the raft-level overscan
+    correlations task and the dark frame channel signals task are
+    submitted.  Each correlated noise task is
+    followed by its plotting task.  A raft's outputs are therefore
+    written as soon as its own tasks finish, regardless of the
+    progress of the other rafts.  As when the analyses were run
+    independently, the dependent tasks are submitted even if the
+    upstream task fails.
+    """
+    def __init__(self, raft_names, det_names, processes=None,
+                 timeout=None):
+        """
+        Parameters
+        ----------
+        raft_names : list
+            The rafts to analyze.
+        det_names : list
+            The detector names.
+        processes : int [None]
+            The number of pool processes.
+        timeout : float [None]
+            Maximum time in seconds to wait for the analyses.  If None,
+            then use 4 hours.
+        """
+        self.det_names = {raft_name: [_ for _ in det_names
+                                      if _.startswith(raft_name)]
+                          for raft_name in raft_names}
+        self.processes = processes
+        self.timeout = 4*3600. if timeout is None else timeout
+        self.pool = None
+        self.lock = threading.Lock()
+        self.all_done = threading.Event()
+        self.pending = dict()
+
+    def run(self):
+        """
+        Run the analyses for all of the rafts and wait for them to finish.
+        """
+        if not self.det_names:
+            return
+        # Register all of the rafts before submitting any tasks so
+        # that all_done isn't set prematurely by a fast first raft.
+        self.pending = {raft_name: 1 for raft_name in self.det_names}
+        with multiprocessing.Pool(processes=self.processes) as self.pool:
+            for raft_name in self.det_names:
+                self._submit(read_noise_stats, raft_name, raft_name)
+            if not self.all_done.wait(self.timeout):
+                print('Timed out waiting for the analyses of',
+                      sorted(self.pending))
+
+    def followups(self, func, device_name, raft_name):
+        """
+        The (function, device name) pairs of the tasks that depend on
+        the task func(device_name).
+        """
+        if func is read_noise_stats:
+            return ([(read_noise_plot, raft_name)]
+                    + [(correlated_noise_stats, _) for _
+                       in self.det_names[raft_name]]
+                    + [(raft_overscan_correlations, raft_name),
+                       (dark_channel_signals, raft_name)])
+        if func is correlated_noise_stats:
+            return [(correlated_noise_figures, device_name)]
+        return []
+
+    def _submit(self, func, device_name, raft_name):
+        def submit_followups():
+            tasks = self.followups(func, device_name, raft_name)
+            with self.lock:
+                self.pending[raft_name] += len(tasks)
+            for i, (task_func, task_device) in enumerate(tasks):
+                try:
+                    self._submit(task_func, task_device, raft_name)
+                except Exception:
+                    # Release the tasks that couldn't be submitted.
+                    for _ in tasks[i:]:
+                        self._task_done(raft_name)
+                    raise
+
+        # The callbacks run on the pool's result handler thread, so
+        # make sure the task is always accounted for.
+        def on_success(_):
+            try:
+                submit_followups()
+            finally:
+                self._task_done(raft_name)
+
+        def on_error(eobj):
+            try:
+                print('{} failed for {}: {}'.format(func.__name__,
+                                                    device_name, eobj))
+                submit_followups()
+            finally:
+                self._task_done(raft_name)
 
-def cleanup():
-    """Create an empty PRESERVE_SYMLINKS file and clean up eotest_results
-    files that are not meant to be archived.
+        self.pool.apply_async(run_analysis_task, (func, device_name),
+                              callback=on_success, error_callback=on_error)
+
+    def _task_done(self, raft_name):
+        with self.lock:
+            self.pending[raft_name] -= 1
+            if self.pending[raft_name] == 0:
+                print('Analyses finished for', raft_name)
+                del self.pending[raft_name]
+            if not self.pending:
+                self.all_done.set()
+
+
+def enable_frame_cache():
     """
+    Set up a decoded-frame cache for this job that is shared by the
+    pool workers of all of the analysis passes, unless a cache
+    directory has already been specified.  The cache is only used by
+    the numpy backend for compressed raw files, so no cache directory
+    is created otherwise.  Returns True if a new cache directory was
+    created.
+    """
+    if ('ALIVENESS_FRAME_CACHE_DIR' in os.environ
+            or aliveness_utils.ALIVENESS_BACKEND != 'numpy'):
+        return False
+    from aliveness_numpy import has_compressed_images
+    fits_files = glob.glob('dark_*/*_R??_S??.fits')
+    if not fits_files or not has_compressed_images(fits_files[0]):
+        return False
+    os.environ['ALIVENESS_FRAME_CACHE_DIR'] = make_cache_dir()
+    return True
+
+
+def cleanup(clear_frame_cache=False):
+    """Create an empty PRESERVE_SYMLINKS file and optionally remove the
+    decoded-frame cache."""
     pathlib.Path('PRESERVE_SYMLINKS').touch()
-    for item in glob.glob('*eotest_results.fits'):
-        os.remove(item)
+    frame_cache = get_frame_cache()
+    if clear_frame_cache and frame_cache is not None:
+        frame_cache.clear()
 
 if __name__ == '__main__':
     if 'LCATR_RUN_SIM' in os.environ:
@@ -151,9 +363,7 @@ if __name__ == '__main__':
     det_names = camera_info.get_det_names()
     raft_names = camera_info.get_raft_names()
     processes = None
-    run_device_analysis_pool(read_noise_stats, raft_names, processes=processes)
-    run_device_analysis_pool(correlated_noise_figures, det_names,
-                             processes=processes)
-    run_device_analysis_pool(raft_overscan_correlations, raft_names,
-                             processes=processes)
-    cleanup()
+    new_frame_cache = enable_frame_cache()
+    enable_result_cache()
+    RaftAnalysisScheduler(raft_names, det_names, processes=processes).run()
+    cleanup(clear_frame_cache=new_frame_cache)
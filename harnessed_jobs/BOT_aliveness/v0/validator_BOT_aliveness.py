@@ -3,12 +3,22 @@
 Validator script for BOT aliveness test acquisitions.
 """
 import os
-import glob
+import multiprocessing
 import lcatr.schema
-import lsst.eotest.image_utils as imutils
 import siteUtils
 from camera_components import camera_info
+# Use the same default backend as the producer, so that its cached
+# results are reused.
+os.environ.setdefault('ALIVENESS_BACKEND', 'numpy')
 import aliveness_utils
+from frame_index import raft_file_index
+from fileref_utils import make_filerefs
+from result_cache import enable_result_cache
+from cached_fs import get_cached_fs
+
+# Reuse the channel signals computed by the producer or by a previous
+# attempt.
+enable_result_cache()
 
 job_schema = lcatr.schema.get('BOT_aliveness')
 
@@ -17,29 +27,53 @@ run_number = siteUtils.getRunNumber()
 results = []
 
 raft_names = camera_info.get_raft_names()
-dark_frames = glob.glob('dark_dark_*')
+dark_frames = sorted(get_cached_fs().glob('dark_dark_*'))
+
+# Index each dark frame folder once by raft.
+frame_indexes = {dark_frame: raft_file_index(dark_frame)
+                 for dark_frame in dark_frames}
+
+# Compute the channel signals for all CCDs in all of the dark frames
+# in a single pool, then assemble the channel status table for each
+# frame.
+fits_files = [fits_file for dark_frame in dark_frames
+              for raft_files in frame_indexes[dark_frame].values()
+              for fits_file in raft_files]
+with multiprocessing.Pool(processes=min(len(fits_files),
+                                        os.cpu_count()) or 1) as pool:
+    ccd_signals = dict(zip(fits_files,
+                           pool.map(aliveness_utils.ccd_channel_signals,
+                                    fits_files)))
+
+channel_tables = dict()
+for dark_frame in dark_frames:
+    frame_signals = [ccd_signals[fits_file] for raft_files
+                     in frame_indexes[dark_frame].values()
+                     for fits_file in raft_files]
+    if frame_signals:
+        channel_tables[dark_frame] \
+            = aliveness_utils.make_channel_status_table(frame_signals)
+
 row_template \
     = "%(exptime)s  %(slot_name)s  %(channel)s  %(signal)s  %(status)s\n"
 for raft_name in raft_names:
     file_prefix = '{}_{}'.format(run_number, raft_name)
     bad_channel_entries = []
     for dark_frame in dark_frames:
-        pattern = '{}/*_{}_*.fits'.format(dark_frame, raft_name)
-        fits_files = sorted(glob.glob(pattern))
-        if not fits_files:
+        raft_files = frame_indexes[dark_frame].get(raft_name, [])
+        if not raft_files:
             continue
-        for fits_file in fits_files:
-            results.append(lcatr.schema.fileref.make(fits_file))
-        channel_signal, channel_status, exptime \
-            = aliveness_utils.raft_channel_statuses(fits_files)
-        for slot_name in channel_status:
+        results.extend(make_filerefs(raft_files))
+        raft_table = channel_tables[dark_frame].select(raft=raft_name)
+        exptime = raft_table.exptime
+        for slot_name in raft_table.slots(raft_name):
+            slot_table = raft_table.select(slot=slot_name)
             bad_channels = 0
-            for amp, status in channel_status[slot_name].items():
-                if channel_status[slot_name][amp] == 'bad':
-                    bad_channels += 1
-                    signal = channel_signal[slot_name][amp]
-                    channel = imutils.channelIds[amp]
-                    bad_channel_entries.append(row_template % locals())
+            for row in slot_table.bad_channels():
+                bad_channels += 1
+                signal, status = row['signal'], row['status']
+                channel = aliveness_utils.channelIds[int(row['amp'])]
+                bad_channel_entries.append(row_template % locals())
             results.append(lcatr.schema.valid(job_schema,
                                               exptime=exptime,
                                               slot=slot_name,
@@ -1,17 +1,21 @@
 #!/usr/bin/env python
+import os
 import glob
-from collections import defaultdict
 import multiprocessing
 import numpy as np
 import matplotlib.pyplot as plt
 from ccsTools import ccsProducer, CcsRaftSetup
-import lsst.eotest.sensor as sensorTest
 import lsst.eotest.raft as raftTest
 import siteUtils
-from correlated_noise import correlated_noise, plot_correlated_noise, \
-    raft_level_oscan_correlations
 import camera_components
 import aliveness_utils
+from aliveness_products import AnalysisProduct
+from result_cache import enable_result_cache
+from aliveness_plots import plot_overscan_correlations, \
+    plot_amp_correlations
+
+# Share the per-frame statistics with the validator.
+enable_result_cache()
 
 ccsProducer('rtm_aliveness_exposure', 'ccs_rtm_aliveness_exposure.py',
             ccs_setup_class=CcsRaftSetup)
@@ -25,77 +29,176 @@ raft_id = siteUtils.getUnitId()
 run_number = siteUtils.getRunNumber()
 
 raft = camera_components.Raft.create_from_etrav(raft_id)
-results_files = dict()
-bias_files = dict()
-bbox = None
-for slot, sensor_id in raft.items():
-    # glob the bias files for each sensor.  The correlated noise plots need
-    # at least 2 bias files per ccd.
-    bias_files[slot] = sorted(glob.glob('%s/%s_conn_bias_*.fits'
-                                        % (slot, sensor_id)))[-2:]
 
-    # For the read noise estimates from the overscan region, we
-    # just need one file.
-    ccd = sensorTest.MaskedCCD(bias_files[slot][-1])
 
+def slot_stats(bias_file, frames):
+    """
+    Compute the read noise and the mean signals of the flats for
+    each amp of a CCD, returning the product arrays.
+    """
     # The aliveness_utils.get_read_noise function uses the subregion
     # sampler to estimate the read noise from the overscane regoins.
-    sampled_rn = aliveness_utils.get_read_noise(ccd)
-
-    results_files[slot] = '%s_eotest_results.fits' % sensor_id
-    results = sensorTest.EOTestResults(results_files[slot])
-    for amp in sampled_rn:
-        results.add_seg_result(amp, 'READ_NOISE', sampled_rn[amp])
-    results.write()
-
-    frames = dict()
+    sampled_rn = aliveness_utils.get_read_noise(
+        aliveness_utils.open_ccd(bias_file))
+    seqnos, exptimes, mean_signals = aliveness_utils.get_mean_signals(frames)
+    # Compute the channel signals used by the validator so that they
+    # are available from the result cache.
+    for frame in frames.values():
+        aliveness_utils.get_channel_signals(frame)
+    amps = sorted(sampled_rn)
+    return dict(amps=amps, read_noise=[sampled_rn[amp] for amp in amps],
+                seqnos=seqnos, exptimes=exptimes,
+                mean_signals=np.array([mean_signals[amp] for amp in amps]))
+
+
+def stats_product(sensor_id, input_files=None):
+    "The product for the read noise and mean signal results of a CCD."
+    return AnalysisProduct('{}_{}_aliveness_stats'.format(sensor_id,
+                                                          run_number),
+                           input_files)
+
+
+def compute_slot_stats(bias_file, frames, sensor_id):
+    """
+    Compute the read noise and mean signal results for a CCD, reusing
+    the product file if it is current, and return the results for
+    merging in the parent process.
+    """
+    product = stats_product(sensor_id, [bias_file] + list(frames.values()))
+    return product.compute(slot_stats, bias_file, frames)
+
+
+def correlated_noise_product(sensor_id, bias_files=None):
+    "The product for the correlated noise results of a CCD."
+    return AnalysisProduct('{}_{}_correlated_noise'.format(sensor_id,
+                                                           run_number),
+                           bias_files, params=dict(target=0, border=10))
+
+
+def compute_correlated_noise(bias_files, sensor_id):
+    "Compute the correlated noise for a CCD and save the results."
+    if not bias_files:
+        print("compute_correlated_noise: Needed bias files not found for",
+              sensor_id)
+        return
+    product = correlated_noise_product(sensor_id, bias_files)
+    if product.is_current():
+        return
+    product.save(**aliveness_utils.ccd_correlated_noise(bias_files))
+
+
+def plot_correlated_noise_figure(slot, sensor_id):
+    "Make the correlated noise plot for a CCD from its product file."
+    product = correlated_noise_product(sensor_id)
+    png_file = '{}_{}_correlated_noise.png'.format(sensor_id, run_number)
+    if not os.path.isfile(product.path) or not product.needs_plot(png_file):
+        return
+    data = product.load()
+    plot_amp_correlations(data['amps'], data['corr'], noise=data['noise'],
+                          title='{}, {}, Run {}'.format(slot, sensor_id,
+                                                       run_number))
+    plt.savefig(png_file)
+    plt.close('all')
+
+
+# Find the input files for each sensor.
+bias_files = dict()
+flat_frames = dict()
+for slot, sensor_id in raft.items():
+    # The correlated noise plots need at least 2 bias files per ccd.
+    bias_files[slot] = sorted(glob.glob('%s/%s_conn_bias_*.fits'
+                                        % (slot, sensor_id)))[-2:]
+    flat_frames[slot] = dict()
     for seqno in seqnos:
-        frames[seqno] = sorted(glob.glob('%s/%s_conn_flat_%s_*.fits'
-                                         % (slot, sensor_id, seqno)))[0]
-
-    columns = aliveness_utils.compute_response_diffs(frames,
-                                                     results_files[slot])
-
-file_prefix = '{}_{}'.format(raft_id, run_number)
-title = '{}, Run {}'.format(raft_id, run_number)
-spec_plots = raftTest.RaftSpecPlots(results_files)
-
-spec_plots.make_plot('READ_NOISE', 'noise per pixel (ADU rms)', title=title)
-plt.savefig('{}_read_noise.png'.format(file_prefix))
-plt.close('all')
-
-spec_plots.make_multi_column_plot(columns, 'mean signal (ADU)', title=title)
-plt.savefig('{}_diff_mean_signal.png'.format(file_prefix))
-plt.close('all')
-
-spec_plots.make_plot('SLOPE', 'slope of mean signal vs exptime (adu/s)',
-                     title=title)
-plt.savefig('{}_mean_signal_vs_exptime_slope.png'.format(file_prefix))
-plt.close('all')
-
-def compute_correlated_noise(bias_files, slot, sensor_id):
-    (corr_data, bias_stats), _, _ = correlated_noise(bias_files)
-    f1, f2 = plot_correlated_noise(corr_data, bias_stats)
-    return f1, slot, sensor_id
+        flat_frames[slot][seqno] \
+            = sorted(glob.glob('%s/%s_conn_flat_%s_*.fits'
+                               % (slot, sensor_id, seqno)))[0]
 
+# A single pool is used for all of the per-slot computations and for
+# the correlated noise plots.
 with multiprocessing.Pool(processes=len(list(raft.items()))) as pool:
-    workers = []
+
+    # Compute stage: write the numerical results to product files, skipping
+    # any that are current.  For the read noise estimates from the overscan
+    # region, we just need one bias file.
+    stats_workers = dict()
+    noise_workers = []
     for slot, sensor_id in raft.items():
-        workers.append(pool.apply_async(compute_correlated_noise,
-                                        (bias_files[slot], slot, sensor_id)))
+        stats_workers[slot] = pool.apply_async(
+            compute_slot_stats, (bias_files[slot][-1], flat_frames[slot],
+                                 sensor_id))
+        noise_workers.append(pool.apply_async(compute_correlated_noise,
+                                              (bias_files[slot], sensor_id)))
+    slot_data = {slot: worker.get() for slot, worker in stats_workers.items()}
+    stats_products = {slot: stats_product(sensor_id) for slot, sensor_id
+                      in raft.items()}
+
+    # Plot stage: render the plots from the product files, skipping those
+    # that are up-to-date.
+    file_prefix = '{}_{}'.format(raft_id, run_number)
+    title = '{}, Run {}'.format(raft_id, run_number)
+    png_files = ['{}_{}.png'.format(file_prefix, _) for _ in
+                 ('read_noise', 'diff_mean_signal',
+                  'mean_signal_vs_exptime_slope')]
+
+    if any(product.needs_plot(png_file) for png_file in png_files
+           for product in stats_products.values()):
+        # Write the eotest results files for RaftSpecPlots.
+        results_files = dict()
+        for slot, sensor_id in raft.items():
+            data = slot_data[slot]
+            results_files[slot] = '%s_eotest_results.fits' % sensor_id
+            results = aliveness_utils.EOTestResults(results_files[slot])
+            for amp, read_noise in zip(data['amps'], data['read_noise']):
+                results.add_seg_result(int(amp), 'READ_NOISE',
+                                       float(read_noise))
+            mean_signals = {int(amp): signals for amp, signals
+                            in zip(data['amps'], data['mean_signals'])}
+            columns = aliveness_utils.add_response_diffs(
+                results, list(data['seqnos']), list(data['exptimes']),
+                mean_signals)
+            results.write()
+
+        spec_plots = raftTest.RaftSpecPlots(results_files)
+
+        spec_plots.make_plot('READ_NOISE', 'noise per pixel (ADU rms)',
+                             title=title)
+        plt.savefig(png_files[0])
+        plt.close('all')
+
+        spec_plots.make_multi_column_plot(columns, 'mean signal (ADU)',
+                                          title=title)
+        plt.savefig(png_files[1])
+        plt.close('all')
+
+        spec_plots.make_plot('SLOPE',
+                             'slope of mean signal vs exptime (adu/s)',
+                             title=title)
+        plt.savefig(png_files[2])
+        plt.close('all')
+
+    # The correlated noise plots need the correlated noise products.
+    _ = [_.get() for _ in noise_workers]
+    plot_workers = [pool.apply_async(plot_correlated_noise_figure,
+                                     (slot, sensor_id))
+                    for slot, sensor_id in raft.items()]
     pool.close()
     pool.join()
-    results = [_.get() for _ in workers]
-
-for items in results:
-    fig1, slot, sensor_id = items
-    plt.figure(fig1.number)
-    fig1.suptitle('{}, {}, Run {}'.format(slot, sensor_id, run_number))
-    plt.savefig('{}_{}_correlated_noise.png'.format(sensor_id, run_number))
-
-plt.close('all')
+    _ = [_.get() for _ in plot_workers]
 
-title = 'Overscan correlations, {}, Run {}'.format(raft_id, run_number)
+# Raft-level overscan correlations.
 bias_files = {slot: x[0] for slot, x in bias_files.items()}
-raft_level_oscan_correlations(bias_files, title=title)
-plt.savefig('{}_{}_overscan_correlations.png'.format(raft_id, run_number))
+oscan_product = AnalysisProduct('{}_{}_overscan_correlations'
+                                .format(raft_id, run_number),
+                                bias_files.values(), params=dict(border=10))
+if not oscan_product.is_current():
+    channels, corr = aliveness_utils.raft_overscan_correlations(bias_files)
+    oscan_product.save(slots=[_[0] for _ in channels],
+                       amps=[_[1] for _ in channels], corr=corr)
+png_file = '{}_{}_overscan_correlations.png'.format(raft_id, run_number)
+if oscan_product.needs_plot(png_file):
+    data = oscan_product.load()
+    title = 'Overscan correlations, {}, Run {}'.format(raft_id, run_number)
+    plot_overscan_correlations(list(zip(data['slots'], data['amps'])),
+                               data['corr'], title=title)
+    plt.savefig(png_file)
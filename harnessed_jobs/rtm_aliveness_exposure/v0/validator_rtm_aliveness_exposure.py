@@ -4,9 +4,12 @@ Validator script for rtm_aliveness_exposure job.
 """
 import glob
 import lcatr.schema
-import lsst.eotest.image_utils as imutils
 import siteUtils
 import aliveness_utils
+from result_cache import enable_result_cache
+
+# Reuse the channel signals computed by the producer.
+enable_result_cache()
 
 results = []
 
@@ -32,7 +35,7 @@ with open(outfile, 'w') as output:
                 if channel_status[slot][amp] == 'bad':
                     bad_channels += 1
                     signal = channel_signal[slot][amp]
-                    channel = imutils.channelIds[amp]
+                    channel = aliveness_utils.channelIds[amp]
                     output.write(row_template % locals())
             results.append(lcatr.schema.valid(job_schema,
                                               exptime=exptime,
@@ -0,0 +1,169 @@
+"""
+lsst.eotest-based pixel access for aliveness_utils.  This is the
+default backend; see aliveness_numpy for a lighter-weight alternative.
+"""
+import numpy as np
+import lsst.geom
+import lsst.eotest.image_utils as imutils
+import lsst.eotest.sensor as sensorTest
+from lsst.eotest.sensor import EOTestResults
+
+__all__ = ['open_ccd', 'get_exptime', 'channelIds', 'EOTestResults',
+           'get_read_noise', 'get_mean_image_adu', 'get_median_signal_levels',
+           'get_serial_overscans', 'get_ccd_serial_overscans']
+
+channelIds = imutils.channelIds
+
+
+def open_ccd(fits_file):
+    """
+    Return the lsst.eotest.sensor.MaskedCCD object for a single CCD
+    FITS file.
+    """
+    return sensorTest.MaskedCCD(fits_file)
+
+
+def get_exptime(fits_file):
+    """
+    Return the EXPTIME keyword value from the primary header of a
+    single CCD FITS file.
+    """
+    return imutils.Metadata(fits_file).get('EXPTIME')
+
+
+def get_read_noise(ccd, boxsize=10, nsamp=50):
+    """
+    Compute the read noise per amp derived by randomly subsampling
+    the overscan region and taking the median of the stdev values
+    from the sample of subregions.
+
+    Parameters
+    ----------
+    ccd: lsst.eotest.sensor.MaskedCCD
+        The pixel data for a CCD frame.
+    boxsize: int [10]
+        The linear size in pixels of the square regions for subsampling.
+    nsamp: int [50]
+        The number of subregions to generate.
+
+    Returns
+    -------
+    dict: a dictionary of the stdev values in ADU keyed by amp number.
+    """
+    read_noise = {}
+    for amp in ccd:
+        sampler = imutils.SubRegionSampler(boxsize, boxsize, nsamp,
+                                           imaging=ccd.amp_geom.serial_overscan)
+        image = ccd[amp].Factory(ccd[amp], ccd.amp_geom.serial_overscan)
+        bbox = image.getBBox()
+        stdevs = []
+        for x, y in zip(sampler.xarr, sampler.yarr):
+            subim = sampler.subim(image, x + bbox.getMinX(), y + bbox.getMinY())
+            stdevs.append(np.std(subim.getImage().getArray().ravel()))
+        read_noise[amp] = np.median(stdevs)
+    return read_noise
+
+
+def get_mean_image_adu(ccd, boxsize=50, nsamp=50):
+    """
+    Compute the mean signal in the imaging region by randomly
+    subsampling the overscan subtracted imaging section and taking the
+    median of the mean signal in each subregion.
+
+    Parameters
+    ----------
+    ccd: lsst.eotest.sensor.MaskedCCD
+        The pixel data for a CCD frame.
+    boxsize: int [50]
+        The linear size in pixels of the square regions for subsampling.
+    nsamp: int [50]
+        The number of subregions to generate.
+
+    Returns
+    -------
+    dict: a dictionary of the mean values in ADU keyed by amp number.
+    """
+    medians = {}
+    for amp in ccd:
+        sampler = imutils.SubRegionSampler(boxsize, boxsize, nsamp,
+                                           imaging=ccd.amp_geom.imaging)
+        image = ccd.unbiased_and_trimmed_image(amp)
+        bbox = image.getBBox()
+        values = []
+        for x, y in zip(sampler.xarr, sampler.yarr):
+            subim = sampler.subim(image, x + bbox.getMinX(), y + bbox.getMinY())
+            values.append(np.mean(subim.getImage().getArray().ravel()))
+        medians[amp] = np.median(values)
+    return medians
+
+
+def get_median_signal_levels(ccd, segment_region, boxsize=10, nsamp=50):
+    """
+    Compute the median signal of a segment region by sub-region
+    sampling in order to avoid affects of cosmic rays or other
+    bright/dark defects.   The mean pixel values of the subregions
+    is medianed for each channel
+
+    Parameters
+    ----------
+    ccd: lsst.eotest.sensor.MaskedCCD
+        The pixel data for a CCD frame.
+    segment_region: lsst.afw.geom.Box2I
+        The bounding box for the segment subregion to sample.
+    boxsize: int [10]
+        The linear size in pixels of the square regions for subsampling.
+    nsamp : int [50]
+        The number of subregions to generate.
+
+    Returns
+    -------
+    dict : a dictionary of the median signal values keyed by amp number.
+    """
+    medians = {}
+    for amp in ccd:
+        sampler = imutils.SubRegionSampler(boxsize, boxsize, nsamp,
+                                           imaging=segment_region)
+        image = ccd[amp].Factory(ccd[amp], sampler.imaging)
+        bbox = image.getBBox()
+        means = []
+        for x, y in zip(sampler.xarr, sampler.yarr):
+            subim = sampler.subim(image, x + bbox.getMinX(),
+                                  y + bbox.getMinY())
+            means.append(np.mean(subim.getImage().getArray().ravel()))
+        medians[amp] = np.median(means)
+    return medians
+
+
+def get_serial_overscans(fits_file, border=0):
+    """
+    Return the serial overscan pixels of all amps of a CCD frame.
+
+    Parameters
+    ----------
+    fits_file : str
+        The single sensor FITS file.
+    border : int [0]
+        Number of pixels to trim from each side of the serial overscan
+        region.
+
+    Returns
+    -------
+    (list, numpy.ndarray) : The amp numbers and the (namps, ny, nx)
+        array of serial overscan pixel values.
+    """
+    return get_ccd_serial_overscans(sensorTest.MaskedCCD(fits_file),
+                                    border=border)
+
+
+def get_ccd_serial_overscans(ccd, border=0):
+    """
+    Return the serial overscan pixels of all amps of an opened CCD
+    frame.  See get_serial_overscans.  A copy of the serial overscan
+    bounding box is trimmed, so ccd can be reused.
+    """
+    bbox = lsst.geom.Box2I(ccd.amp_geom.serial_overscan)
+    bbox.grow(-border)
+    amps = list(ccd)
+    oscans = np.array([ccd[amp].getImage().Factory(ccd[amp].getImage(), bbox)
+                       .getArray() for amp in amps], dtype=np.float32)
+    return amps, oscans
@@ -0,0 +1,245 @@
+"""
+Streaming aliveness evaluation of a job directory during acquisition.
+
+The AlivenessMonitor follows a job directory as frame folders appear,
+analyzes each single sensor FITS file as soon as it is complete, and
+keeps a running table of channel statuses for each frame, so that a
+dead REB or CCD can be found within one frame time rather than after
+all of the data have been taken.
+"""
+import os
+import time
+import fnmatch
+import warnings
+import multiprocessing
+from collections import OrderedDict
+import numpy as np
+import aliveness_utils
+from frame_index import scan_frame_folder
+
+__all__ = ['ccd_aliveness_stats', 'AlivenessMonitor', 'FRAME_PATTERNS']
+
+FITS_BLOCK_SIZE = 2880
+
+# The frame folders that are illuminated or have dark current, i.e.,
+# that the aliveness analyses use for the channel signals.  Bias frames
+# have no signal, so all of their channels would be flagged as bad.
+FRAME_PATTERNS = ('*_dark_*', '*_flat_*')
+
+
+def ccd_aliveness_stats(fits_file, border=10):
+    """
+    Compute the per-channel signal and serial overscan statistics for
+    a single sensor FITS file with a filename ending in
+    _<raft>_<slot>.fits, decoding the file only once.  This is suitable
+    for use as a multiprocessing pool function.
+
+    Returns
+    -------
+    dict : The raft, slot, exptime, the channel signals keyed by amp,
+        and the serial overscan means and clipped stdevs keyed by amp.
+    """
+    raft, slot = os.path.basename(fits_file)[:-len('.fits')].split('_')[-2:]
+    ccd = aliveness_utils.open_ccd(fits_file)
+    exptime = int(ccd.md.get('EXPTIME'))
+    signals = aliveness_utils.ccd_signal_levels(ccd)
+    amps, oscans = aliveness_utils.get_ccd_serial_overscans(ccd,
+                                                            border=border)
+    pixels = oscans.reshape(len(amps), -1)
+    means = pixels.mean(axis=1)
+    stdevs = aliveness_utils.clipped_stdev(pixels)
+    return dict(raft=raft, slot=slot, exptime=exptime, signals=signals,
+                oscan_mean={amp: float(_) for amp, _ in zip(amps, means)},
+                oscan_stdev={amp: float(_) for amp, _ in zip(amps, stdevs)})
+
+
+class AlivenessMonitor:
+    """
+    Follow a job directory and evaluate the channel statuses of the
+    CCD frames as they are written.
+    """
+    def __init__(self, job_dir, frame_pattern=FRAME_PATTERNS,
+                 threshold_factor=0.1,
+                 threshold_scope='raft', border=10, settle_time=2.,
+                 processes=None, ccd_analysis=ccd_aliveness_stats):
+        """
+        Parameters
+        ----------
+        job_dir : str
+            The job directory containing the frame folders (or symlinks
+            to them).
+        frame_pattern : str or list [FRAME_PATTERNS]
+            The glob-style pattern, or patterns, for the frame folder
+            names.  The default selects the dark and flat frames.
+        threshold_factor : float [0.1]
+            The bad channel threshold factor passed to
+            aliveness_utils.make_channel_status_table.
+        threshold_scope : str ['raft']
+            The threshold scope passed to
+            aliveness_utils.make_channel_status_table.
+        border : int [10]
+            Number of pixels to trim from each side of the serial
+            overscan region.
+        settle_time : float [2.]
+            A FITS file is considered complete once its size is a
+            multiple of the FITS block size, it is unchanged since the
+            previous poll, and it hasn't been modified for this many
+            seconds.
+        processes : int [None]
+            The number of pool processes.  If None, then os.cpu_count()
+            is used.  If 0, the files are analyzed in the calling process.
+        ccd_analysis : function [ccd_aliveness_stats]
+            The per-CCD analysis function.
+        """
+        self.job_dir = job_dir
+        self.frame_patterns = ((frame_pattern,)
+                               if isinstance(frame_pattern, str)
+                               else tuple(frame_pattern))
+        self.threshold_factor = threshold_factor
+        self.threshold_scope = threshold_scope
+        self.border = border
+        self.settle_time = settle_time
+        self.ccd_analysis = ccd_analysis
+        self.pool = (multiprocessing.Pool(processes=processes)
+                     if processes != 0 else None)
+        self.frames = OrderedDict()
+        self._stats = dict()
+        self._pending = dict()
+        self._done = set()
+
+    def close(self):
+        "Wait for any pending analyses and shut down the pool."
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self._collect()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _frame_folders(self):
+        "The frame folders in the job directory in sorted order."
+        folders = []
+        with os.scandir(self.job_dir) as it:
+            for entry in it:
+                if (not entry.name.startswith('.') and
+                        any(fnmatch.fnmatchcase(entry.name, _)
+                            for _ in self.frame_patterns)
+                        and entry.is_dir()):
+                    folders.append(entry.name)
+        return sorted(folders)
+
+    def _is_complete(self, path):
+        "Return True if a FITS file has finished being written."
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        previous = self._stats.get(path)
+        self._stats[path] = (stat.st_size, stat.st_mtime_ns)
+        return (stat.st_size > 0
+                and stat.st_size % FITS_BLOCK_SIZE == 0
+                and previous == self._stats[path]
+                and time.time() - stat.st_mtime > self.settle_time)
+
+    def _add_result(self, frame, det_name, result):
+        "Record the analysis results for a CCD."
+        self.frames.setdefault(frame, OrderedDict())[det_name] = result
+
+    def _collect(self):
+        "Record the results of the finished pool analyses."
+        new_results = []
+        for key, worker in list(self._pending.items()):
+            if not worker.ready():
+                continue
+            del self._pending[key]
+            self._add_result(*key, worker.get())
+            new_results.append(key)
+        return new_results
+
+    def poll(self):
+        """
+        Scan the job directory, submit the newly completed FITS files
+        for analysis, and record any finished analyses.
+
+        Returns
+        -------
+        list : The (frame, det_name) tuples of the CCDs whose results
+            were recorded in this call.
+        """
+        new_results = []
+        for frame in self._frame_folders():
+            frame_dir = os.path.join(self.job_dir, frame)
+            for det_name, paths in sorted(scan_frame_folder(frame_dir)
+                                          .items()):
+                key = (frame, det_name)
+                if len(paths) > 1 and key not in self._done:
+                    warnings.warn('{} files for {} in {}; using {}'
+                                  .format(len(paths), det_name, frame_dir,
+                                          paths[-1]))
+                path = paths[-1]
+                if key in self._done or not self._is_complete(path):
+                    continue
+                self._done.add(key)
+                if self.pool is None:
+                    self._add_result(frame, det_name,
+                                     self.ccd_analysis(path,
+                                                       border=self.border))
+                    new_results.append(key)
+                else:
+                    self._pending[key] = self.pool.apply_async(
+                        self.ccd_analysis, (path,), dict(border=self.border))
+        return new_results + self._collect()
+
+    @property
+    def npending(self):
+        "The number of CCD analyses that have not finished."
+        return len(self._pending)
+
+    def channel_table(self, frame):
+        """
+        The ChannelStatusTable for the CCDs of a frame analyzed so far.
+        The bad channel thresholds are computed from the available
+        channels, so they are refined as more CCDs arrive.
+        """
+        ccd_signals = [(_['raft'], _['slot'], _['exptime'], _['signals'])
+                       for _ in self.frames[frame].values()]
+        return aliveness_utils.make_channel_status_table(
+            ccd_signals, threshold_factor=self.threshold_factor,
+            threshold_scope=self.threshold_scope)
+
+    def bad_channels(self):
+        """
+        The running bad-channel table over all frames analyzed so far.
+
+        Returns
+        -------
+        list : (frame, raft, slot, amp, signal) tuples.
+        """
+        rows = []
+        for frame in self.frames:
+            for row in self.channel_table(frame).bad_channels():
+                rows.append((frame, str(row['raft']), str(row['slot']),
+                             int(row['amp']), float(row['signal'])))
+        return rows
+
+    def overscan_stats(self, frame):
+        """
+        The serial overscan means and clipped stdevs for the CCDs of a
+        frame analyzed so far.
+
+        Returns
+        -------
+        dict : (mean, stdev) arrays ordered by amp, keyed by detector name.
+        """
+        stats = OrderedDict()
+        for det_name, result in self.frames[frame].items():
+            amps = sorted(result['oscan_mean'])
+            stats[det_name] = (
+                np.array([result['oscan_mean'][amp] for amp in amps]),
+                np.array([result['oscan_stdev'][amp] for amp in amps]))
+        return stats
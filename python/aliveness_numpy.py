@@ -0,0 +1,444 @@
+"""
+NumPy/astropy pixel access for aliveness_utils.  This backend reads
+the raw amplifier HDUs with astropy and uses the DATASEC and BIASSEC
+header keywords for the amplifier geometry, so it avoids the cost of
+importing the afw stack via lsst.eotest.
+
+The image HDUs of uncompressed raw files are memory-mapped rather than
+decoded, so that the sampled statistics only read the pages of the
+file containing the sampled pixels.  Compressed files are decoded in
+full, via the frame_cache module if it is enabled.
+"""
+import re
+from collections import defaultdict
+import numpy as np
+import astropy.io.fits as fits
+from frame_cache import get_frame_cache
+
+__all__ = ['open_ccd', 'get_exptime', 'channelIds', 'EOTestResults',
+           'get_read_noise', 'get_mean_image_adu', 'get_median_signal_levels',
+           'get_serial_overscans', 'Box', 'AmpGeometry', 'RawCCD',
+           'read_amp_data', 'MappedImage', 'map_amp_data',
+           'has_compressed_images', 'get_ccd_serial_overscans']
+
+channelIds = dict([(i, 'C1%s' % x) for i, x in zip(range(1, 9), range(8))]
+                  + [(i, 'C0%s' % x) for i, x in
+                     zip(range(9, 17), range(7, -1, -1))])
+
+
+class Box:
+    """
+    Rectangular pixel region with zero-based, end-exclusive bounds,
+    standing in for lsst.afw.geom.Box2I.
+    """
+    _section_re = re.compile(r'\[(\d+):(\d+),(\d+):(\d+)\]')
+
+    def __init__(self, xmin, ymin, width, height):
+        self.xmin = xmin
+        self.ymin = ymin
+        self.width = width
+        self.height = height
+
+    @staticmethod
+    def from_section(section):
+        """
+        Create a Box from a FITS section string, e.g., '[11:522,1:2002]',
+        which is one-based with inclusive bounds.
+        """
+        match = Box._section_re.match(section.replace(' ', ''))
+        if match is None:
+            raise ValueError("Invalid FITS section string: %s" % section)
+        x1, x2, y1, y2 = (int(_) for _ in match.groups())
+        return Box(x1 - 1, y1 - 1, x2 - x1 + 1, y2 - y1 + 1)
+
+    @property
+    def xmax(self):
+        "End-exclusive x bound."
+        return self.xmin + self.width
+
+    @property
+    def ymax(self):
+        "End-exclusive y bound."
+        return self.ymin + self.height
+
+    @property
+    def slices(self):
+        "(row, column) slices for indexing a 2D array."
+        return slice(self.ymin, self.ymax), slice(self.xmin, self.xmax)
+
+    def grow(self, npix):
+        """
+        Grow the box in place by npix on each side, or shrink it if
+        npix is negative, as lsst.afw.geom.Box2I.grow does.
+        """
+        self.xmin -= npix
+        self.ymin -= npix
+        self.width += 2*npix
+        self.height += 2*npix
+
+    def copy(self):
+        "Return a copy of this box."
+        return Box(self.xmin, self.ymin, self.width, self.height)
+
+    def __repr__(self):
+        return 'Box(%d, %d, %d, %d)' % (self.xmin, self.ymin,
+                                         self.width, self.height)
+
+
+class AmpGeometry:
+    """
+    Imaging and serial overscan regions of a raw amplifier segment
+    derived from its DATASEC and BIASSEC keywords.  The serial overscan
+    is restricted to the rows of the imaging region, following the
+    lsst.eotest.sensor.AmplifierGeometry convention.
+    """
+    def __init__(self, header):
+        self.naxis1 = header['NAXIS1']
+        self.naxis2 = header['NAXIS2']
+        self.imaging = Box.from_section(header['DATASEC'])
+        if 'BIASSEC' in header:
+            biassec = Box.from_section(header['BIASSEC'])
+            xmin, xmax = biassec.xmin, biassec.xmax
+        else:
+            xmin, xmax = self.imaging.xmax, self.naxis1
+        self._serial_overscan = Box(xmin, self.imaging.ymin, xmax - xmin,
+                                    self.imaging.height)
+
+    @property
+    def serial_overscan(self):
+        "Serial overscan region.  A new Box is returned on each access."
+        return self._serial_overscan.copy()
+
+
+def read_amp_data(fits_file):
+    """
+    Read the pixel data of the amplifier image HDUs of a raw CCD file.
+
+    Returns
+    -------
+    numpy.ndarray : (namps, ny, nx) float32 array of pixel values, with
+        BZERO and BSCALE applied.
+    """
+    images = []
+    with fits.open(fits_file) as hdus:
+        for hdu in hdus[1:]:
+            if not hdu.is_image or hdu.header.get('NAXIS', 0) != 2:
+                break
+            images.append(np.asarray(hdu.data, dtype=np.float32))
+    return np.array(images)
+
+
+_BITPIX_DTYPES = {8: 'u1', 16: '>i2', 32: '>i4', 64: '>i8',
+                  -32: '>f4', -64: '>f8'}
+
+
+class MappedImage:
+    """
+    Read-only view of the pixel data of an uncompressed image HDU that
+    is memory-mapped from the file.  Indexing returns float32 arrays
+    with BZERO and BSCALE applied to the selected pixels only, so only
+    the pages of the file containing those pixels are read.
+    """
+    def __init__(self, fits_file, offset, header):
+        """
+        Parameters
+        ----------
+        fits_file : str
+            The FITS file.
+        offset : int
+            The byte offset of the HDU data in the file.
+        header : astropy.io.fits.Header
+            The HDU header.
+        """
+        self.shape = (header['NAXIS2'], header['NAXIS1'])
+        self.raw = np.memmap(fits_file, mode='r', offset=offset,
+                             dtype=_BITPIX_DTYPES[header['BITPIX']],
+                             shape=self.shape)
+        self.bzero = header.get('BZERO', 0)
+        self.bscale = header.get('BSCALE', 1)
+
+    def __getitem__(self, key):
+        values = np.asarray(self.raw[key], dtype=np.float32)
+        if self.bscale != 1:
+            values *= self.bscale
+        if self.bzero != 0:
+            values += self.bzero
+        return values
+
+    def __array__(self, dtype=None):
+        values = self[...]
+        return values if dtype is None else values.astype(dtype)
+
+
+def map_amp_data(fits_file, hdus):
+    """
+    Memory-map the amplifier image HDUs of a raw CCD file.
+
+    Parameters
+    ----------
+    fits_file : str
+        The FITS file.
+    hdus : astropy.io.fits.HDUList
+        The opened file.
+
+    Returns
+    -------
+    list : The MappedImage objects for the amps, or None if the image
+        HDUs are compressed.
+    """
+    images = []
+    for i, hdu in enumerate(hdus[1:], 1):
+        if not hdu.is_image or hdu.header.get('NAXIS', 0) != 2:
+            break
+        if isinstance(hdu, fits.CompImageHDU):
+            return None
+        images.append(MappedImage(fits_file, hdus.fileinfo(i)['datLoc'],
+                                  hdu.header))
+    return images
+
+
+def has_compressed_images(fits_file):
+    """
+    Return True if the image HDUs of a raw file are tile-compressed,
+    in which case RawCCD decodes them via the frame cache rather than
+    memory-mapping them.
+    """
+    with fits.open(fits_file) as hdus:
+        return len(hdus) > 1 and isinstance(hdus[1], fits.CompImageHDU)
+
+
+class RawCCD:
+    """
+    The amplifier pixel data for a single CCD raw file.  This provides
+    the subset of the lsst.eotest.sensor.MaskedCCD interface used by
+    aliveness_utils: iteration over amp numbers, ccd[amp] pixel arrays,
+    .md primary header access, .amp_geom, and
+    .unbiased_and_trimmed_image(amp).  The pixel data of uncompressed
+    files are memory-mapped unless memmap is False; otherwise the
+    decoded pixel data are obtained via the frame_cache module if it
+    is enabled.
+    """
+    def __init__(self, fits_file, memmap=True):
+        self.fits_file = fits_file
+        with fits.open(fits_file) as hdus:
+            self.md = hdus[0].header.copy()
+            self.amp_geom = AmpGeometry(hdus[1].header)
+            pixels = map_amp_data(fits_file, hdus) if memmap else None
+        if pixels is None:
+            frame_cache = get_frame_cache()
+            if frame_cache is None:
+                pixels = read_amp_data(fits_file)
+            else:
+                pixels = frame_cache.get(fits_file, read_amp_data)
+        self._images = {amp: image for amp, image in enumerate(pixels, 1)}
+
+    def __iter__(self):
+        return iter(self._images)
+
+    def __len__(self):
+        return len(self._images)
+
+    def __getitem__(self, amp):
+        return self._images[amp]
+
+    def unbiased_and_trimmed_image(self, amp):
+        """
+        Return the imaging region of an amp with the row-by-row mean
+        of the serial overscan subtracted.
+        """
+        image = self._images[amp]
+        oscan = image[self.amp_geom.serial_overscan.slices]
+        return (image[self.amp_geom.imaging.slices]
+                - oscan.mean(axis=1)[:, np.newaxis])
+
+
+class EOTestResults:
+    """
+    Minimal writer of eotest results files.  The output has the
+    AMPLIFIER_RESULTS binary table layout that
+    lsst.eotest.sensor.EOTestResults reads, so the files can be
+    used with lsst.eotest.raft.RaftSpecPlots.
+    """
+    def __init__(self, outfile, namps=16):
+        self.outfile = outfile
+        self.namps = namps
+        self.columns = defaultdict(dict)
+
+    def add_seg_result(self, amp, column, value):
+        "Set the value of a column for the specified amp."
+        self.columns[column.upper()][amp] = value
+
+    def write(self, outfile=None, overwrite=True):
+        "Write the results to a FITS file."
+        if outfile is None:
+            outfile = self.outfile
+        amps = np.arange(1, self.namps + 1)
+        columns = [fits.Column(name='AMP', format='I', array=amps)]
+        for name, values in self.columns.items():
+            array = [values.get(amp, 0) for amp in amps]
+            columns.append(fits.Column(name=name, format='E', array=array))
+        table = fits.BinTableHDU.from_columns(columns,
+                                              name='AMPLIFIER_RESULTS')
+        fits.HDUList([fits.PrimaryHDU(), table]).writeto(outfile,
+                                                         overwrite=overwrite)
+
+
+def open_ccd(fits_file):
+    """
+    Return the RawCCD object for a single CCD FITS file.
+    """
+    return RawCCD(fits_file)
+
+
+def get_exptime(fits_file):
+    """
+    Return the EXPTIME keyword value from the primary header of a
+    single CCD FITS file.
+    """
+    return fits.getval(fits_file, 'EXPTIME', ext=0)
+
+
+def _subregion_indices(region, boxsize, nsamp):
+    """
+    Return the (nsamp, boxsize, 1) row and (nsamp, 1, boxsize) column
+    index arrays of randomly located square subregions lying within
+    region.  The sampling follows
+    lsst.eotest.image_utils.SubRegionSampler.
+    """
+    xarr = np.random.randint(region.width - boxsize - 1, size=nsamp)
+    yarr = np.random.randint(region.height - boxsize - 1, size=nsamp)
+    offsets = np.arange(boxsize)
+    rows = (region.ymin + yarr[:, np.newaxis] + offsets)[:, :, np.newaxis]
+    cols = (region.xmin + xarr[:, np.newaxis] + offsets)[:, np.newaxis, :]
+    return rows, cols
+
+
+def _subregions(image, region, boxsize, nsamp):
+    """
+    Return an (nsamp, boxsize, boxsize) array of randomly located
+    square subregions of image lying within region.
+    """
+    return image[_subregion_indices(region, boxsize, nsamp)]
+
+
+def get_read_noise(ccd, boxsize=10, nsamp=50):
+    """
+    Compute the read noise per amp derived by randomly subsampling
+    the overscan region and taking the median of the stdev values
+    from the sample of subregions.
+
+    Parameters
+    ----------
+    ccd: RawCCD
+        The pixel data for a CCD frame.
+    boxsize: int [10]
+        The linear size in pixels of the square regions for subsampling.
+    nsamp: int [50]
+        The number of subregions to generate.
+
+    Returns
+    -------
+    dict: a dictionary of the stdev values in ADU keyed by amp number.
+    """
+    oscan = ccd.amp_geom.serial_overscan
+    read_noise = {}
+    for amp in ccd:
+        subims = _subregions(ccd[amp], oscan, boxsize, nsamp)
+        read_noise[amp] = np.median(np.std(subims, axis=(1, 2)))
+    return read_noise
+
+
+def get_mean_image_adu(ccd, boxsize=50, nsamp=50):
+    """
+    Compute the mean signal in the imaging region by randomly
+    subsampling the overscan subtracted imaging section and taking the
+    median of the mean signal in each subregion.
+
+    Parameters
+    ----------
+    ccd: RawCCD
+        The pixel data for a CCD frame.
+    boxsize: int [50]
+        The linear size in pixels of the square regions for subsampling.
+    nsamp: int [50]
+        The number of subregions to generate.
+
+    Returns
+    -------
+    dict: a dictionary of the mean values in ADU keyed by amp number.
+    """
+    imaging = ccd.amp_geom.imaging
+    oscan = ccd.amp_geom.serial_overscan
+    oscan_cols = np.arange(oscan.xmin, oscan.xmax)
+    medians = {}
+    for amp in ccd:
+        # Sample the raw imaging region and subtract the row-by-row
+        # overscan means for the sampled rows only, which is equivalent
+        # to sampling the unbiased and trimmed image.
+        rows, cols = _subregion_indices(imaging, boxsize, nsamp)
+        subims = ccd[amp][rows, cols]
+        subims -= ccd[amp][rows, oscan_cols].mean(axis=2)[:, :, np.newaxis]
+        medians[amp] = np.median(np.mean(subims, axis=(1, 2)))
+    return medians
+
+
+def get_median_signal_levels(ccd, segment_region, boxsize=10, nsamp=50):
+    """
+    Compute the median signal of a segment region by sub-region
+    sampling in order to avoid affects of cosmic rays or other
+    bright/dark defects.   The mean pixel values of the subregions
+    is medianed for each channel
+
+    Parameters
+    ----------
+    ccd: RawCCD
+        The pixel data for a CCD frame.
+    segment_region: Box
+        The bounding box for the segment subregion to sample.
+    boxsize: int [10]
+        The linear size in pixels of the square regions for subsampling.
+    nsamp : int [50]
+        The number of subregions to generate.
+
+    Returns
+    -------
+    dict : a dictionary of the median signal values keyed by amp number.
+    """
+    medians = {}
+    for amp in ccd:
+        subims = _subregions(ccd[amp], segment_region, boxsize, nsamp)
+        medians[amp] = np.median(np.mean(subims, axis=(1, 2)))
+    return medians
+
+
+def get_serial_overscans(fits_file, border=0):
+    """
+    Return the serial overscan pixels of all amps of a CCD frame.
+
+    Parameters
+    ----------
+    fits_file : str
+        The single sensor FITS file.
+    border : int [0]
+        Number of pixels to trim from each side of the serial overscan
+        region.
+
+    Returns
+    -------
+    (list, numpy.ndarray) : The amp numbers and the (namps, ny, nx)
+        array of serial overscan pixel values.
+    """
+    return get_ccd_serial_overscans(RawCCD(fits_file), border=border)
+
+
+def get_ccd_serial_overscans(ccd, border=0):
+    """
+    Return the serial overscan pixels of all amps of an opened CCD
+    frame.  See get_serial_overscans.  A copy of the serial overscan
+    bounding box is trimmed, so ccd can be reused.
+    """
+    oscan = ccd.amp_geom.serial_overscan
+    bbox = Box(oscan.xmin, oscan.ymin, oscan.width, oscan.height)
+    bbox.grow(-border)
+    amps = list(ccd)
+    return amps, np.array([ccd[amp][bbox.slices] for amp in amps])
@@ -0,0 +1,163 @@
+"""
+Plotting functions for aliveness test results that work from
+in-memory per-amp values rather than eotest results files.
+"""
+import numpy as np
+import matplotlib.pyplot as plt
+
+__all__ = ['plot_raft_amp_values', 'plot_overscan_correlations',
+           'plot_amp_correlations']
+
+
+def plot_raft_amp_values(amp_values, ylabel, title=None, figsize=(10, 6),
+                         marker='o'):
+    """
+    Plot per-amp values for the CCDs in a raft, with the amps for each
+    slot grouped together along the x-axis in the same manner as
+    lsst.eotest.raft.RaftSpecPlots.make_plot.
+
+    Parameters
+    ----------
+    amp_values : dict
+        Dictionary of dictionaries of per-amp values, keyed by slot
+        name and amp number.
+    ylabel : str
+        The y-axis label.
+    title : str [None]
+        The plot title.
+    figsize : tuple [(10, 6)]
+        The figure size in inches.
+    marker : str ['o']
+        The matplotlib marker style.
+
+    Returns
+    -------
+    matplotlib.figure.Figure
+    """
+    fig = plt.figure(figsize=figsize)
+    slots = sorted(amp_values)
+    xticks = []
+    for i, slot in enumerate(slots):
+        amps = sorted(amp_values[slot])
+        namps = len(amps)
+        xvals = i*namps + np.arange(namps)
+        plt.plot(xvals, [amp_values[slot][amp] for amp in amps],
+                 marker=marker, linestyle='-', color='k')
+        xticks.append(i*namps + (namps - 1)/2.)
+        if i > 0:
+            plt.axvline(i*namps - 0.5, linestyle=':', color='k', alpha=0.5)
+    plt.xticks(xticks, slots)
+    plt.xlabel('slot')
+    plt.ylabel(ylabel)
+    if title is not None:
+        plt.title(title)
+    return fig
+
+
+def plot_overscan_correlations(channels, corr, title=None, vrange=None,
+                               figsize=(8, 8), cmap='jet'):
+    """
+    Plot a channel-by-channel overscan correlation matrix, with the
+    channels grouped by CCD, in the same manner as
+    correlated_noise.raft_level_oscan_correlations.
+
+    Parameters
+    ----------
+    channels : list
+        The (CCD name, amp) tuples labeling the rows of the matrix.
+    corr : numpy.ndarray
+        The correlation matrix.
+    title : str [None]
+        The plot title.
+    vrange : tuple [None]
+        The (vmin, vmax) range of the color scale.  If None, then the
+        range of the off-diagonal values is used.
+    figsize : tuple [(8, 8)]
+        The figure size in inches.
+    cmap : str ['jet']
+        The matplotlib colormap.
+
+    Returns
+    -------
+    matplotlib.figure.Figure
+    """
+    corr = np.array(corr)
+    if vrange is None:
+        offdiag = corr[~np.eye(len(corr), dtype=bool)]
+        vrange = (offdiag.min(), offdiag.max()) if offdiag.size else (0, 1)
+    fig = plt.figure(figsize=figsize)
+    ax = fig.add_subplot(1, 1, 1)
+    image = ax.imshow(corr, interpolation='nearest', cmap=cmap,
+                      vmin=vrange[0], vmax=vrange[1])
+    fig.colorbar(image, fraction=0.046, pad=0.04)
+    ccd_names = []
+    boundaries = []
+    for i, (ccd_name, _) in enumerate(channels):
+        if not ccd_names or ccd_name != ccd_names[-1]:
+            ccd_names.append(ccd_name)
+            boundaries.append(i)
+    boundaries.append(len(channels))
+    for boundary in boundaries[1:-1]:
+        ax.axvline(boundary - 0.5, color='k', linewidth=0.5)
+        ax.axhline(boundary - 0.5, color='k', linewidth=0.5)
+    centers = [(xmin + xmax - 1)/2. for xmin, xmax
+               in zip(boundaries[:-1], boundaries[1:])]
+    ax.set_xticks(centers)
+    ax.set_xticklabels(ccd_names, rotation=90)
+    ax.set_yticks(centers)
+    ax.set_yticklabels(ccd_names)
+    if title is not None:
+        ax.set_title(title)
+    return fig
+
+
+def plot_amp_correlations(amps, corr, noise=None, title=None,
+                          figsize=(12, 5), cmap='jet'):
+    """
+    Plot the amp-to-amp read noise correlation matrix of a CCD and,
+    optionally, the read noise of each amp.
+
+    Parameters
+    ----------
+    amps : list
+        The amp numbers labeling the rows of the matrix.
+    corr : numpy.ndarray
+        The correlation matrix.
+    noise : list [None]
+        The read noise of each amp in ADU rms.
+    title : str [None]
+        The figure title.
+    figsize : tuple [(12, 5)]
+        The figure size in inches.
+    cmap : str ['jet']
+        The matplotlib colormap.
+
+    Returns
+    -------
+    matplotlib.figure.Figure
+    """
+    corr = np.array(corr)
+    amps = [int(_) for _ in amps]
+    fig = plt.figure(figsize=figsize)
+    ax = fig.add_subplot(1, 2, 1) if noise is not None \
+        else fig.add_subplot(1, 1, 1)
+    offdiag = corr[~np.eye(len(corr), dtype=bool)]
+    vrange = (offdiag.min(), offdiag.max()) if offdiag.size else (0, 1)
+    image = ax.imshow(corr, interpolation='nearest', cmap=cmap,
+                      vmin=vrange[0], vmax=vrange[1])
+    fig.colorbar(image, ax=ax, fraction=0.046, pad=0.04)
+    ax.set_xticks(range(len(amps)))
+    ax.set_xticklabels(amps)
+    ax.set_yticks(range(len(amps)))
+    ax.set_yticklabels(amps)
+    ax.set_xlabel('amp')
+    ax.set_ylabel('amp')
+    ax.set_title('correlation coefficient')
+    if noise is not None:
+        ax = fig.add_subplot(1, 2, 2)
+        ax.plot(amps, noise, marker='o', linestyle='-', color='k')
+        ax.set_xlabel('amp')
+        ax.set_ylabel('noise per pixel (ADU rms)')
+    if title is not None:
+        fig.suptitle(title)
+    return fig
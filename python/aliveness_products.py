@@ -0,0 +1,133 @@
+"""
+Intermediate data products for the aliveness analyses.
+
+The numerical results of each analysis are written to a .npz file
+along with a fingerprint of the input files and analysis parameters,
+so that the plots can be rendered in a separate stage, and so that
+re-running a job, e.g., after a plotting failure, doesn't redo the
+pixel-level computations for unchanged inputs.  Plots are considered
+up-to-date if the png file is newer than its product file; set the
+ALIVENESS_REPLOT environment variable to force them to be re-rendered.
+"""
+import os
+import hashlib
+import numpy as np
+
+__all__ = ['file_fingerprint', 'AnalysisProduct']
+
+
+def file_fingerprint(files, params=None):
+    """
+    Compute a fingerprint for a set of input files from their resolved
+    paths, sizes and modification times, plus any analysis parameters.
+
+    Parameters
+    ----------
+    files : list
+        The input file paths.
+    params : dict [None]
+        Analysis parameters that affect the results.
+
+    Returns
+    -------
+    str : The hex digest of the fingerprint.
+    """
+    sha1 = hashlib.sha1()
+    for item in sorted(files):
+        stat = os.stat(item)
+        sha1.update('{}:{}:{}\n'.format(os.path.realpath(item), stat.st_size,
+                                        stat.st_mtime_ns).encode())
+    if params:
+        sha1.update(repr(sorted(params.items())).encode())
+    return sha1.hexdigest()
+
+
+def _box(value):
+    "Wrap non-array values, e.g., dicts, in 0-d object arrays."
+    if isinstance(value, (np.ndarray, int, float, str, list)):
+        return value
+    boxed = np.empty((), dtype=object)
+    boxed[()] = value
+    return boxed
+
+
+def _unbox(value):
+    "Unwrap 0-d object arrays."
+    if value.dtype == object and value.shape == ():
+        return value.item()
+    return value
+
+
+class AnalysisProduct:
+    """
+    A .npz file of analysis results keyed by the fingerprint of the
+    analysis inputs.
+    """
+    def __init__(self, name, input_files, params=None, outdir='.'):
+        """
+        Parameters
+        ----------
+        name : str
+            The product name, e.g., '<run>_<raft>_read_noise'.  The
+            product is written to <outdir>/<name>.npz.
+        input_files : list
+            The input files of the analysis.  This can be None for
+            reading an existing product, e.g., in a plotting stage.
+        params : dict [None]
+            Analysis parameters that affect the results.
+        outdir : str ['.']
+            The output directory.
+        """
+        self.name = name
+        self.path = os.path.join(outdir, name + '.npz')
+        if input_files is None:
+            self.fingerprint = None
+        else:
+            self.fingerprint = file_fingerprint(input_files, params=params)
+
+    def is_current(self):
+        """
+        Return True if the product file exists and was computed from
+        the current inputs.
+        """
+        if self.fingerprint is None:
+            return False
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                return str(data['_fingerprint']) == self.fingerprint
+        except (OSError, KeyError, ValueError):
+            return False
+
+    def save(self, **arrays):
+        "Write the analysis results to the product file."
+        arrays = {key: _box(value) for key, value in arrays.items()}
+        tmp_file = self.path + '.tmp.npz'
+        np.savez(tmp_file, _fingerprint=self.fingerprint, **arrays)
+        os.replace(tmp_file, self.path)
+
+    def load(self):
+        "Read the analysis results from the product file as a dict."
+        with np.load(self.path, allow_pickle=True) as data:
+            return {key: _unbox(data[key]) for key in data.files
+                    if key != '_fingerprint'}
+
+    def compute(self, func, *args, **kwds):
+        """
+        Return the results from the product file if it is current,
+        otherwise call func(*args, **kwds), which should return a dict
+        of arrays, and save its output.
+        """
+        if self.is_current():
+            return self.load()
+        results = func(*args, **kwds)
+        self.save(**results)
+        return results
+
+    def needs_plot(self, png_file):
+        """
+        Return True if png_file is missing or older than the product
+        file, or if ALIVENESS_REPLOT is set.
+        """
+        if 'ALIVENESS_REPLOT' in os.environ or not os.path.isfile(png_file):
+            return True
+        return os.path.getmtime(png_file) < os.path.getmtime(self.path)
@@ -1,161 +1,170 @@
 """
 Utility functions for RTM aliveness testing.
+
+The pixel-level functions are provided by one of two backends that is
+selected at import time via the ALIVENESS_BACKEND environment variable:
+
+'eotest' (default)
+    lsst.eotest.sensor.MaskedCCD-based implementation in aliveness_eotest.
+'numpy'
+    astropy/NumPy implementation in aliveness_numpy, which avoids the
+    cost of importing the afw stack.
 """
 import os
+import glob
 from collections import defaultdict
+import multiprocessing
 import numpy as np
-import lsst.eotest.image_utils as imutils
-import lsst.eotest.sensor as sensorTest
+from result_cache import cached_result
 
-__all__ = ['compute_response_diffs', 'get_read_noise', 'get_mean_image_adu',
-           'get_median_signal_levels', 'raft_channel_statuses']
+ALIVENESS_BACKEND = os.environ.get('ALIVENESS_BACKEND', 'eotest')
+if ALIVENESS_BACKEND == 'eotest':
+    from aliveness_eotest import *
+elif ALIVENESS_BACKEND == 'numpy':
+    from aliveness_numpy import *
+else:
+    raise ValueError("Unknown ALIVENESS_BACKEND: %s" % ALIVENESS_BACKEND)
 
+__all__ = ['ALIVENESS_BACKEND', 'compute_response_diffs', 'get_mean_signals',
+           'add_response_diffs', 'get_read_noise',
+           'get_mean_image_adu', 'get_median_signal_levels',
+           'raft_channel_statuses', 'open_ccd', 'get_exptime', 'channelIds',
+           'get_channel_signals', 'ChannelStatusTable',
+           'focal_plane_channel_statuses', 'ccd_channel_signals',
+           'make_channel_status_table', 'get_serial_overscans',
+           'clipped_stdev', 'raft_read_noise', 'EOTestResults',
+           'overscan_correlation_matrix', 'raft_overscan_correlations',
+           'focal_plane_overscan_correlations', 'ccd_correlated_noise',
+           'get_frame_mean_signals', 'ccd_signal_levels',
+           'get_ccd_serial_overscans']
 
-def compute_response_diffs(frames, results_file):
+
+def get_mean_signals(frames):
     """
-    For each amp, compute the difference in response of sequential frames
-    sorted by exposure time.
+    Compute the mean signal per amp for each of a set of single CCD
+    frames.
 
     Parameters
     ----------
     frames: dict
         Filenames for single CCD frames, keyed by sequence number.
-    results_file: str
-        Filename of eotest results file to which the response differences
-        are written.
 
     Returns
     -------
-    list of column names
+    (list, list, dict) : The sorted sequence numbers, the corresponding
+        exposure times, and lists of the mean signals in ADU, keyed by
+        amp number.
     """
     seqnos = sorted(frames.keys())
-    results = sensorTest.EOTestResults(results_file)
     mean_signals = defaultdict(list)
-    columns = set()
     exptimes = []
-    for i, seqno in enumerate(seqnos):
-        ccd = sensorTest.MaskedCCD(frames[seqno])
-        exptimes.append(ccd.md.get('EXPTIME'))
-        means = get_mean_image_adu(ccd)
-        for amp, value in means.items():
+    for seqno in seqnos:
+        exptime, signals = get_frame_mean_signals(frames[seqno])
+        exptimes.append(exptime)
+        for amp, value in signals.items():
             mean_signals[amp].append(value)
-            if i > 0:
-                column = 'MEAN_SIGNAL_{}_minus_{}'.format(seqnos[i],
-                                                          seqnos[i-1])
-                columns.add(column)
-                delta_signal = float(value - mean_signals[amp][i-1])
-                results.add_seg_result(amp, column, delta_signal)
+    return seqnos, exptimes, mean_signals
 
+
+@cached_result(backend=ALIVENESS_BACKEND)
+def get_frame_mean_signals(fits_file):
+    """
+    Compute the mean signal per amp of a single CCD frame.  The results
+    are stored in the result cache, if it is enabled.
+
+    Returns
+    -------
+    (float, dict) : The exposure time and the mean signals in ADU,
+        keyed by amp number.
+    """
+    ccd = open_ccd(fits_file)
+    return ccd.md.get('EXPTIME'), get_mean_image_adu(ccd)
+
+
+def add_response_diffs(results, seqnos, exptimes, mean_signals):
+    """
+    Add the differences in response of sequential frames, and the slope
+    and intercept of the mean signal vs exposure time, for each amp to
+    an eotest results object.
+
+    Parameters
+    ----------
+    results: EOTestResults
+        The eotest results object.
+    seqnos: list
+        The sorted sequence numbers of the frames.
+    exptimes: list
+        The exposure times of the frames.
+    mean_signals: dict
+        Lists of the mean signals of the frames, keyed by amp number.
+
+    Returns
+    -------
+    list of column names
+    """
+    columns = set()
     for amp, signal in mean_signals.items():
+        for i in range(1, len(seqnos)):
+            column = 'MEAN_SIGNAL_{}_minus_{}'.format(seqnos[i], seqnos[i-1])
+            columns.add(column)
+            results.add_seg_result(amp, column, float(signal[i] - signal[i-1]))
         pars = np.polyfit(exptimes, signal, 1)
         results.add_seg_result(amp, 'SLOPE', float(pars[0]))
         results.add_seg_result(amp, 'INTERCEPT', float(pars[1]))
-
-    results.write()
     return columns
 
 
-def get_read_noise(ccd, boxsize=10, nsamp=50):
+def compute_response_diffs(frames, results_file):
     """
-    Compute the read noise per amp derived by randomly subsampling
-    the overscan region and taking the median of the stdev values
-    from the sample of subregions.
+    For each amp, compute the difference in response of sequential frames
+    sorted by exposure time.
 
     Parameters
     ----------
-    ccd: lsst.eotest.sensor.MaskedCCD
-        The pixel data for a CCD frame.
-    boxsize: int [10]
-        The linear size in pixels of the square regions for subsampling.
-    nsamp: int [50]
-        The number of subregions to generate.
-
-    Returns
-    -------
-    dict: a dictionary of the stdev values in ADU keyed by amp number.
-    """
-    read_noise = {}
-    for amp in ccd:
-        sampler = imutils.SubRegionSampler(boxsize, boxsize, nsamp,
-                                           imaging=ccd.amp_geom.serial_overscan)
-        image = ccd[amp].Factory(ccd[amp], ccd.amp_geom.serial_overscan)
-        bbox = image.getBBox()
-        stdevs = []
-        for x, y in zip(sampler.xarr, sampler.yarr):
-            subim = sampler.subim(image, x + bbox.getMinX(), y + bbox.getMinY())
-            stdevs.append(np.std(subim.getImage().getArray().ravel()))
-        read_noise[amp] = np.median(stdevs)
-    return read_noise
+    frames: dict
+        Filenames for single CCD frames, keyed by sequence number.
+    results_file: str
+        Filename of eotest results file to which the response differences
+        are written.
 
+    Returns
+    -------
+    list of column names
+    """
+    results = EOTestResults(results_file)
+    columns = add_response_diffs(results, *get_mean_signals(frames))
+    results.write()
+    return columns
 
-def get_mean_image_adu(ccd, boxsize=50, nsamp=50):
+
+@cached_result(backend=ALIVENESS_BACKEND)
+def get_channel_signals(fits_file):
     """
-    Compute the mean signal in the imaging region by randomly
-    subsampling the overscan subtracted imaging section and taking the
-    median of the mean signal in each subregion.
+    Compute the overscan-subtracted signal level of each channel of
+    a single CCD frame.  The results are stored in the result cache,
+    if it is enabled.
 
     Parameters
     ----------
-    ccd: lsst.eotest.sensor.MaskedCCD
-        The pixel data for a CCD frame.
-    boxsize: int [50]
-        The linear size in pixels of the square regions for subsampling.
-    nsamp: int [50]
-        The number of subregions to generate.
+    fits_file : str
+        The single sensor FITS file.
 
     Returns
     -------
-    dict: a dictionary of the mean values in ADU keyed by amp number.
+    dict : The median imaging minus median overscan signal, keyed by
+        amp number.
     """
-    medians = {}
-    for amp in ccd:
-        sampler = imutils.SubRegionSampler(boxsize, boxsize, nsamp,
-                                           imaging=ccd.amp_geom.imaging)
-        image = ccd.unbiased_and_trimmed_image(amp)
-        bbox = image.getBBox()
-        values = []
-        for x, y in zip(sampler.xarr, sampler.yarr):
-            subim = sampler.subim(image, x + bbox.getMinX(), y + bbox.getMinY())
-            values.append(np.mean(subim.getImage().getArray().ravel()))
-        medians[amp] = np.median(values)
-    return medians
+    return ccd_signal_levels(open_ccd(fits_file))
 
 
-def get_median_signal_levels(ccd, segment_region, boxsize=10, nsamp=50):
+def ccd_signal_levels(ccd):
     """
-    Compute the median signal of a segment region by sub-region
-    sampling in order to avoid affects of cosmic rays or other
-    bright/dark defects.   The mean pixel values of the subregions
-    is medianed for each channel
-
-    Parameters
-    ----------
-    ccd: lsst.eotest.sensor.MaskedCCD
-        The pixel data for a CCD frame.
-    segment_region: lsst.afw.geom.Box2I
-        The bounding box for the segment subregion to sample.
-    boxsize: int [10]
-        The linear size in pixels of the square regions for subsampling.
-    nsamp : int [50]
-        The number of subregions to generate.
-
-    Returns
-    -------
-    dict : a dictionary of the median signal values keyed by amp number.
-    """
-    medians = {}
-    for amp in ccd:
-        sampler = imutils.SubRegionSampler(boxsize, boxsize, nsamp,
-                                           imaging=segment_region)
-        image = ccd[amp].Factory(ccd[amp], sampler.imaging)
-        bbox = image.getBBox()
-        means = []
-        for x, y in zip(sampler.xarr, sampler.yarr):
-            subim = sampler.subim(image, x + bbox.getMinX(),
-                                  y + bbox.getMinY())
-            means.append(np.mean(subim.getImage().getArray().ravel()))
-        medians[amp] = np.median(means)
-    return medians
+    Compute the overscan-subtracted signal level of each channel of an
+    opened CCD frame.  See get_channel_signals.
+    """
+    imaging = get_median_signal_levels(ccd, ccd.amp_geom.imaging)
+    oscan = get_median_signal_levels(ccd, ccd.amp_geom.serial_overscan)
+    return {amp: imaging[amp] - oscan[amp] for amp in ccd}
 
 
 def raft_channel_statuses(fits_files, threshold_factor=0.1):
@@ -180,8 +189,7 @@ def raft_channel_statuses(fits_files, threshold_factor=0.1):
         the channel status values of "good" or "bad"; the int is the exposure
         time in seconds.
     """
-    exptimes = [int(imutils.Metadata(item).get('EXPTIME'))
-                for item in fits_files]
+    exptimes = [int(get_exptime(item)) for item in fits_files]
 
     if min(exptimes) != max(exptimes):
         print(fits_files)
@@ -192,12 +200,9 @@ def raft_channel_statuses(fits_files, threshold_factor=0.1):
     signal_values = []
     for fits_file in fits_files:
         slot = fits_file.split(os.path.sep)[0]
-        ccd = sensorTest.MaskedCCD(fits_file)
-        imaging = get_median_signal_levels(ccd, ccd.amp_geom.imaging)
-        oscan = get_median_signal_levels(ccd, ccd.amp_geom.serial_overscan)
-        for amp in ccd:
-            signal_values.append(imaging[amp] - oscan[amp])
-            channel_signal[slot][amp] = signal_values[-1]
+        for amp, signal in get_channel_signals(fits_file).items():
+            signal_values.append(signal)
+            channel_signal[slot][amp] = signal
     # Check for bad channels using the specified threshold factor times
     # the median channel signal level
     threshold = threshold_factor*np.median(signal_values)
@@ -208,3 +213,399 @@ def raft_channel_statuses(fits_files, threshold_factor=0.1):
             else:
                 channel_status[slot][amp] = 'good'
     return channel_signal, channel_status, exptimes[0]
+
+
+class ChannelStatusTable:
+    """
+    Array-backed table of per-channel signal levels and statuses,
+    with one row per (raft, slot, amp).
+    """
+    dtype = np.dtype([('raft', 'U3'), ('slot', 'U3'), ('amp', 'i2'),
+                      ('signal', 'f4'), ('status', 'U4')])
+
+    def __init__(self, data, exptime):
+        """
+        Parameters
+        ----------
+        data : numpy.ndarray
+            Structured array with ChannelStatusTable.dtype.
+        exptime : int
+            The exposure time in seconds of the frame.
+        """
+        self.data = data
+        self.exptime = exptime
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    @property
+    def rafts(self):
+        "Sorted list of raft names in the table."
+        return sorted(set(self.data['raft']))
+
+    def slots(self, raft):
+        "Sorted list of slot names for the specified raft."
+        return sorted(set(self.data['slot'][self.data['raft'] == raft]))
+
+    def select(self, raft=None, slot=None):
+        """
+        Return the subset of the table for the specified raft and/or slot.
+        """
+        index = np.ones(len(self.data), dtype=bool)
+        if raft is not None:
+            index &= self.data['raft'] == raft
+        if slot is not None:
+            index &= self.data['slot'] == slot
+        return ChannelStatusTable(self.data[index], self.exptime)
+
+    def bad_channels(self):
+        "Return the subset of the table for the bad channels."
+        return ChannelStatusTable(self.data[self.data['status'] == 'bad'],
+                                  self.exptime)
+
+
+def ccd_channel_signals(fits_file):
+    """
+    Compute the channel signals for a single sensor FITS file with a
+    filename ending in _<raft>_<slot>.fits.  This is suitable for use
+    as a multiprocessing pool function.
+
+    Returns
+    -------
+    (str, str, int, dict) : The raft name, slot name, exposure time,
+        and the channel signals keyed by amp number.
+    """
+    raft, slot = os.path.basename(fits_file)[:-len('.fits')].split('_')[-2:]
+    return raft, slot, int(get_exptime(fits_file)), \
+        get_channel_signals(fits_file)
+
+
+def make_channel_status_table(ccd_signals, threshold_factor=0.1,
+                              threshold_scope='raft'):
+    """
+    Assemble the channel signals for the CCDs in a frame into a
+    ChannelStatusTable and set the channel statuses.
+
+    Parameters
+    ----------
+    ccd_signals : list
+        The ccd_channel_signals outputs for the CCD files in the frame.
+    threshold_factor : float, optional
+        The factor to mulitply the median of the channel signals to
+        provide the threshold between a "bad" and "good" channel.
+    threshold_scope : str ['raft']
+        If 'raft', the median is computed separately for each raft,
+        as in raft_channel_statuses.  If 'focal_plane', a single median
+        over all channels is used.
+
+    Returns
+    -------
+    ChannelStatusTable
+    """
+    if threshold_scope not in ('raft', 'focal_plane'):
+        raise ValueError("Invalid threshold_scope: %s" % threshold_scope)
+    exptimes = [_[2] for _ in ccd_signals]
+    if min(exptimes) != max(exptimes):
+        raise RuntimeError("The exposure times differ among the " +
+                           "input FITS files for this frame.")
+
+    rows = []
+    for raft, slot, _, signals in ccd_signals:
+        rows.extend((raft, slot, amp, signal, 'good')
+                    for amp, signal in signals.items())
+    data = np.array(rows, dtype=ChannelStatusTable.dtype)
+
+    # Check for bad channels using the specified threshold factor times
+    # the median channel signal level
+    if threshold_scope == 'focal_plane':
+        threshold = threshold_factor*np.median(data['signal'])
+        data['status'][data['signal'] < threshold] = 'bad'
+    else:
+        for raft in set(data['raft']):
+            index = data['raft'] == raft
+            threshold = threshold_factor*np.median(data['signal'][index])
+            data['status'][index & (data['signal'] < threshold)] = 'bad'
+    return ChannelStatusTable(data, exptimes[0])
+
+
+def focal_plane_channel_statuses(frame_dir, threshold_factor=0.1,
+                                 threshold_scope='raft', processes=None):
+    """
+    Compute the connectivity status of each channel in the focal plane
+    given a frame folder containing the single sensor images for each
+    CCD.  The FITS filenames are assumed to end with
+    _<raft>_<slot>.fits.  The per-CCD signal levels are computed
+    across a multiprocessing pool.
+
+    Parameters
+    ----------
+    frame_dir : str
+        The folder containing the single sensor FITS files for a frame.
+    threshold_factor : float, optional
+        The factor to mulitply the median of the channel signals to
+        provide the threshold between a "bad" and "good" channel.
+    threshold_scope : str ['raft']
+        If 'raft', the median is computed separately for each raft,
+        as in raft_channel_statuses.  If 'focal_plane', a single median
+        over all channels is used.
+    processes : int [None]
+        The number of pool processes.  If None, then os.cpu_count() is used.
+
+    Returns
+    -------
+    ChannelStatusTable : The table of signal levels and statuses for
+        all channels in the frame.
+    """
+    fits_files = sorted(glob.glob(os.path.join(frame_dir,
+                                               '*_R??_S??.fits')))
+    if not fits_files:
+        raise FileNotFoundError("No single sensor FITS files found in %s"
+                                % frame_dir)
+    with multiprocessing.Pool(processes=processes) as pool:
+        ccd_signals = pool.map(ccd_channel_signals, fits_files)
+    return make_channel_status_table(ccd_signals,
+                                     threshold_factor=threshold_factor,
+                                     threshold_scope=threshold_scope)
+
+
+def clipped_stdev(pixels, nsig=3., niter=3):
+    """
+    Compute the sigma-clipped standard deviation of each row of a 2D
+    array.  The initial clipping is about the median using the
+    interquartile range as the width estimate, and subsequent
+    iterations clip about the mean of the retained pixels, similar to
+    lsst.afw.math.STDEVCLIP.
+
+    Parameters
+    ----------
+    pixels : numpy.ndarray
+        (nrows, npix) array with one set of pixel values per row, e.g.,
+        the flattened overscan region of each amp.
+    nsig : float [3.]
+        The clipping threshold in units of the standard deviation.
+    niter : int [3]
+        The number of clipping iterations.
+
+    Returns
+    -------
+    numpy.ndarray : The clipped standard deviation for each row.
+    """
+    data = np.asarray(pixels, dtype=np.float64)
+    q25, center, q75 = np.percentile(data, (25, 50, 75), axis=1)
+    sigma = 0.741*(q75 - q25)
+    for _ in range(niter):
+        mask = np.abs(data - center[:, None]) <= nsig*sigma[:, None]
+        npix = mask.sum(axis=1)
+        center = np.where(mask, data, 0).sum(axis=1)/npix
+        resids = np.where(mask, data - center[:, None], 0)
+        sigma = np.sqrt((resids**2).sum(axis=1)/(npix - 1))
+    return sigma
+
+
+def raft_read_noise(bias_files, border=10, nsig=3., niter=3):
+    """
+    Compute the read noise of each channel in a raft as the clipped
+    stdev of the serial overscan pixels.  The overscan regions of all
+    amps of all CCDs are processed together.
+
+    Parameters
+    ----------
+    bias_files : dict
+        Single sensor bias FITS files, keyed by slot name.
+    border : int [10]
+        Number of pixels to trim from each side of the serial overscan
+        region.
+    nsig : float [3.]
+        The clipping threshold passed to clipped_stdev.
+    niter : int [3]
+        The number of clipping iterations passed to clipped_stdev.
+
+    Returns
+    -------
+    dict : The read noise values in ADU rms, keyed by slot and amp number.
+    """
+    # Group the overscans by shape since ITL and e2v regions differ.
+    stacks = defaultdict(list)
+    for slot, bias_file in bias_files.items():
+        amps, oscans = get_serial_overscans(bias_file, border=border)
+        stacks[oscans.shape[1:]].append((slot, amps, oscans))
+    read_noise = defaultdict(dict)
+    for items in stacks.values():
+        pixels = np.concatenate([_[2].reshape(len(_[1]), -1) for _ in items])
+        stdevs = iter(clipped_stdev(pixels, nsig=nsig, niter=niter))
+        for slot, amps, _ in items:
+            for amp in amps:
+                read_noise[slot][amp] = float(next(stdevs))
+    return read_noise
+
+
+def _overscan_stack(bias_files, border=10):
+    """
+    Stack the serial overscans of all amps of a set of CCDs into a
+    mean-subtracted (nchannels, npix) float32 array.  The overscans
+    are cropped to their common shape, e.g., for mixed ITL and e2v
+    CCDs.
+
+    Returns
+    -------
+    (list, numpy.ndarray) : The (key, amp) tuples for the channels and
+        the stacked overscan pixels.
+    """
+    channels = []
+    oscans = []
+    for key in sorted(bias_files):
+        amps, ccd_oscans = get_serial_overscans(bias_files[key],
+                                                border=border)
+        channels.extend((key, amp) for amp in amps)
+        oscans.append(np.asarray(ccd_oscans, dtype=np.float32))
+    ny = min(_.shape[1] for _ in oscans)
+    nx = min(_.shape[2] for _ in oscans)
+    stack = np.empty((len(channels), ny*nx), dtype=np.float32)
+    row = 0
+    for i, ccd_oscans in enumerate(oscans):
+        namps = len(ccd_oscans)
+        stack[row:row + namps] = ccd_oscans[:, :ny, :nx].reshape(namps, -1)
+        row += namps
+        oscans[i] = None
+    stack -= stack.mean(axis=1, dtype=np.float64,
+                        keepdims=True).astype(np.float32)
+    return channels, stack
+
+
+def overscan_correlation_matrix(pixels, chunk_size=None):
+    """
+    Compute the correlation matrix of a set of channels from a single
+    matrix product of the stacked pixel values.
+
+    Parameters
+    ----------
+    pixels : numpy.ndarray
+        (nchannels, npix) array of mean-subtracted pixel values, one
+        row per channel.
+    chunk_size : int [None]
+        If not None, the product is accumulated in blocks of this many
+        pixels to bound the size of the temporary arrays.
+
+    Returns
+    -------
+    numpy.ndarray : The (nchannels, nchannels) correlation matrix.
+    """
+    pixels = np.asarray(pixels, dtype=np.float32)
+    if chunk_size is None:
+        cov = np.dot(pixels, pixels.T).astype(np.float64)
+    else:
+        cov = np.zeros((len(pixels), len(pixels)), dtype=np.float64)
+        for imin in range(0, pixels.shape[1], chunk_size):
+            block = pixels[:, imin:imin + chunk_size]
+            cov += np.dot(block, block.T)
+    norms = np.sqrt(np.diag(cov))
+    return cov/np.outer(norms, norms)
+
+
+def raft_overscan_correlations(bias_files, border=10, chunk_size=None):
+    """
+    Compute the correlations between the serial overscans of all
+    channels in a raft, i.e., the 144x144 matrix computed pairwise by
+    correlated_noise.raft_level_oscan_correlations.
+
+    Parameters
+    ----------
+    bias_files : dict
+        Single sensor bias FITS files, keyed by slot name.
+    border : int [10]
+        Number of pixels to trim from each side of the serial overscan
+        region.
+    chunk_size : int [None]
+        Passed to overscan_correlation_matrix.
+
+    Returns
+    -------
+    (list, numpy.ndarray) : The (slot, amp) tuples of the channels and
+        the correlation matrix.
+    """
+    channels, stack = _overscan_stack(bias_files, border=border)
+    return channels, overscan_correlation_matrix(stack,
+                                                 chunk_size=chunk_size)
+
+
+def focal_plane_overscan_correlations(bias_files, border=10,
+                                      chunk_size=2000):
+    """
+    Compute the correlations between the serial overscans of all
+    channels in the focal plane for crosstalk and noise studies.  The
+    overscans are cropped to the common ITL/e2v shape.
+
+    Parameters
+    ----------
+    bias_files : dict
+        Single sensor bias FITS files for a frame, keyed by detector
+        name, e.g., 'R22_S11'.
+    border : int [10]
+        Number of pixels to trim from each side of the serial overscan
+        region.
+    chunk_size : int [2000]
+        Passed to overscan_correlation_matrix.
+
+    Returns
+    -------
+    (list, numpy.ndarray) : The (det_name, amp) tuples of the channels
+        and the correlation matrix.
+    """
+    channels, stack = _overscan_stack(bias_files, border=border)
+    return channels, overscan_correlation_matrix(stack,
+                                                 chunk_size=chunk_size)
+
+
+def ccd_correlated_noise(bias_files, target=0, border=10):
+    """
+    Compute the amp-to-amp correlated read noise of a CCD from the
+    serial overscans of a stack of bias frames.  The mean of the
+    non-target frames is subtracted from the target frame to remove
+    fixed bias structure, and the 16x16 covariance and correlation
+    matrices are computed for all amps together.  If there is only
+    one bias frame, only the mean of each amp is subtracted.
+
+    Parameters
+    ----------
+    bias_files : list
+        The single sensor bias FITS files for the CCD.
+    target : int [0]
+        The index of the target frame in bias_files.
+    border : int [10]
+        Number of pixels to trim from each side of the serial overscan
+        region.
+
+    Returns
+    -------
+    dict : The amp numbers, the covariance and correlation matrices,
+        and the mean bias levels and noise (ADU rms) of the target
+        frame for each amp.
+    """
+    bias_files = list(bias_files)
+    stack = []
+    for bias_file in bias_files:
+        amps, oscans = get_serial_overscans(bias_file, border=border)
+        stack.append(np.asarray(oscans, dtype=np.float64)
+                     .reshape(len(amps), -1))
+    stack = np.array(stack)
+    target_pixels = stack[target]
+    bias_mean = target_pixels.mean(axis=1)
+    nframes = len(stack)
+    if nframes > 1:
+        others = np.delete(stack, target, axis=0).mean(axis=0)
+        # Scale so that the difference has the single frame variance.
+        pixels = (target_pixels - others)*np.sqrt((nframes - 1.)/nframes)
+    else:
+        pixels = target_pixels
+    pixels = pixels - pixels.mean(axis=1)[:, None]
+    cov = np.dot(pixels, pixels.T)/(pixels.shape[1] - 1)
+    noise = np.sqrt(np.diag(cov))
+    corr = cov/np.outer(noise, noise)
+    return dict(amps=np.array(amps), cov=cov, corr=corr,
+                bias_mean=bias_mean, noise=noise)
@@ -0,0 +1,101 @@
+"""
+Functions for the BOT_acq_recovery job, which aggregates the frame
+symlinks from all of the retry attempts of a BOT_acq run and removes
+the frames listed as bad.
+"""
+import os
+import re
+import fnmatch
+from cached_fs import get_cached_fs
+from bot_acq_retry import activity_id_key
+
+__all__ = ['index_attempt_dirs', 'bad_frame_folders']
+
+
+def index_attempt_dirs(acqs_dir):
+    """
+    Index the frame symlinks and .cfg files in the retry attempt
+    directories with one scan per directory.  Newer attempts take
+    precedence over older ones for a given frame name.
+
+    Returns
+    -------
+    dict : The source paths, keyed by frame (or .cfg file) name.
+    """
+    try:
+        with os.scandir(acqs_dir) as it:
+            job_ids = [_.name for _ in it if _.name[:1].isdigit()]
+    except FileNotFoundError:
+        return dict()
+    merged = dict()
+    for job_id in sorted(job_ids, key=activity_id_key, reverse=True):
+        with os.scandir(os.path.join(acqs_dir, job_id)) as it:
+            for entry in it:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_symlink() or entry.name.endswith('.cfg'):
+                    merged.setdefault(entry.name, entry.path)
+    return merged
+
+
+def _has_magic(entry):
+    "Return True if a bad frame entry contains glob characters."
+    return any(_ in entry for _ in '*?[')
+
+
+def bad_frame_folders(outdir, bad_frames, fs=None):
+    """
+    Find the frame folders in outdir that contain FITS files matching
+    any of the bad frame entries, i.e., with file names matching
+    *<entry>*.fits.  The patterns are combined into a single regular
+    expression, so the file names are scanned once.  Entries that
+    don't match any FITS files are reported.
+
+    Parameters
+    ----------
+    outdir : str
+        The directory containing the frame folders.
+    bad_frames : list
+        The bad frame entries.  Empty entries are ignored.
+    fs : CachedFS [None]
+        The file system view for listing the frame folders.  If None,
+        then use cached_fs.get_cached_fs().
+
+    Returns
+    -------
+    list : The sorted paths of the frame folders.
+    """
+    bad_frames = [_ for _ in dict.fromkeys(bad_frames) if _]
+    if not bad_frames:
+        return []
+    fs = get_cached_fs() if fs is None else fs
+    # Literal entries share one alternation, so that each name is
+    # scanned once rather than once per entry, which backtracks over
+    # the leading wildcard.  Entries with glob characters are
+    # translated individually.
+    literals = [_ for _ in bad_frames if not _has_magic(_)]
+    globs = [_ for _ in bad_frames if _has_magic(_)]
+    patterns = [fnmatch.translate(f'*{_}*.fits') for _ in globs]
+    if literals:
+        patterns.insert(0, r'(?s:.*(?:{}).*\.fits)\Z'
+                        .format('|'.join(map(re.escape, literals))))
+    regex = re.compile('|'.join(patterns))
+    bad_folders = set()
+    matched_names = []
+    for path in fs.glob(os.path.join(outdir, '*', '*.fits')):
+        name = os.path.basename(path)
+        if regex.match(name):
+            bad_folders.add(os.path.dirname(path))
+            matched_names.append(name)
+    # Only the names that matched need to be checked against each
+    # entry to find the ones that matched nothing.
+    for bad_frame in bad_frames:
+        if _has_magic(bad_frame):
+            entry_regex = re.compile(fnmatch.translate(f'*{bad_frame}*.fits'))
+            found = any(entry_regex.match(_) for _ in matched_names)
+        else:
+            found = any(bad_frame in _ for _ in matched_names)
+        if not found:
+            print('Bad frame list entry', bad_frame,
+                  'does not match any frame folder.')
+    return sorted(bad_folders)
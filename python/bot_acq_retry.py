@@ -1,44 +1,251 @@
 import os
-import shutil
-import glob
+import json
+import fnmatch
 import warnings
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
-def copy_exposure_symlinks(copy_links=True):
-    """
-    If the current job execution is a retry, there will be a previous
-    working directory with symlinks to the successful BOT exposures.
-    This function finds the last working directory by sorting on the
-    activityId directory names, copies the exposure symlinks to the
-    current directory and returns the largest sequence number plus one.
-    If there are no missing frames then that will equal the number of
-    symlinks it made.
-
-    If there is no previous working directory, zero is returned.
-    """
-    current_dir = os.path.abspath('.').split('/')[-1]
-    try:
-        last_dir = sorted([_ for _ in glob.glob('../*')
-                           if current_dir not in _])[-1]
-    except IndexError:
-        return 0
-
-    seqnums = []
-    num_symlinks = 0
-    for item in glob.glob(os.path.join(last_dir, '*_[0-9]*')):
-        if os.path.islink(item):
-            exposure_name = os.path.basename(item)
-            try:
-                seqnum = int(exposure_name.split('_')[-1])
-            except ValueError:
-                # This symlink doesn't have a properly formulated
-                # sequence number in the folder name, so skip it.
-                continue
-            seqnums.append(seqnum)
-            num_symlinks += 1
-            if copy_links and not os.path.islink(exposure_name):
-                shutil.copy(item, exposure_name, follow_symlinks=False)
-    next_seqnum = max(seqnums) + 1 if seqnums else 0
-    if next_seqnum != num_symlinks:
-        warnings.warn(f"There were {next_seqnum - num_symlinks} "
-                      f"missing frames in {last_dir}.")
-    return next_seqnum
+__all__ = ['copy_exposure_symlinks', 'index_exposure_symlinks',
+           'activity_id_key', 'prior_attempt_dirs', 'missing_seqnums',
+           'seqnum_ranges',
+           'ExposureSymlinks', 'RetryPlan']
+
+
+ExposureSymlinks = namedtuple('ExposureSymlinks',
+                              ['next_seqnum', 'missing_seqnums',
+                               'links_created'])
+
+
+def activity_id_key(dirname):
+    "Sort key for activityId directory names in numerical order."
+    return (int(dirname), dirname) if dirname.isdigit() else (-1, dirname)
+
+
+def prior_attempt_dirs():
+    """
+    Return the working directories of the previous attempts of the
+    current job execution, i.e., the sibling activityId directories,
+    with the most recent, i.e., the largest activityId, first.
+    """
+    current_dir = os.path.basename(os.path.abspath('.'))
+    with os.scandir('..') as it:
+        names = [_.name for _ in it if _.name != current_dir
+                 and not _.name.startswith('.') and _.is_dir()]
+    return [os.path.join('..', _) for _ in
+            sorted(names, key=activity_id_key, reverse=True)]
+
+
+def index_exposure_symlinks(attempt_dirs):
+    """
+    Index the exposure symlinks in a set of attempt directories by
+    sequence number, with one directory scan per attempt.  If a
+    sequence number appears in more than one attempt, the symlink
+    from the first directory in attempt_dirs, i.e., the most recent
+    attempt, is used.
+
+    Returns
+    -------
+    dict : The symlink paths keyed by sequence number.
+    """
+    exposures = dict()
+    for attempt_dir in attempt_dirs:
+        with os.scandir(attempt_dir) as it:
+            for entry in it:
+                if (not fnmatch.fnmatchcase(entry.name, '*_[0-9]*')
+                        or not entry.is_symlink()):
+                    continue
+                try:
+                    seqnum = int(entry.name.split('_')[-1])
+                except ValueError:
+                    # This symlink doesn't have a properly formulated
+                    # sequence number in the folder name, so skip it.
+                    continue
+                exposures.setdefault(seqnum, entry.path)
+    return exposures
+
+
+def missing_seqnums(seqnums):
+    """
+    Return the sorted sequence numbers missing from the range
+    0..max(seqnums).
+    """
+    seqnums = set(seqnums)
+    if not seqnums:
+        return []
+    return sorted(set(range(max(seqnums) + 1)) - seqnums)
+
+
+def seqnum_ranges(seqnums):
+    """
+    Group sorted sequence numbers into contiguous (first, count) ranges.
+    """
+    ranges = []
+    for seqnum in seqnums:
+        if ranges and seqnum == sum(ranges[-1]):
+            ranges[-1] = (ranges[-1][0], ranges[-1][1] + 1)
+        else:
+            ranges.append((seqnum, 1))
+    return ranges
+
+
+def _copy_symlink(src, dest):
+    "Make a copy of the symlink src at dest."
+    os.symlink(os.readlink(src), dest)
+
+
+def copy_exposure_symlinks(copy_links=True, exposures=None, max_workers=16):
+    """
+    If the current job execution is a retry, there will be previous
+    working directories with symlinks to the successful BOT exposures.
+    This function indexes the exposure symlinks across all of those
+    directories, with the most recent attempt taking precedence for
+    each sequence number, and copies them to the current directory.
+    The symlinks are created across a thread pool since each one is
+    a round trip to the file server.
+
+    Parameters
+    ----------
+    copy_links : bool [True]
+        Flag to copy the symlinks.
+    exposures : dict [None]
+        The output of index_exposure_symlinks, to avoid indexing the
+        previous attempts again.
+    max_workers : int [16]
+        The number of threads for creating the symlinks.
+
+    Returns
+    -------
+    ExposureSymlinks : The largest sequence number plus one (zero if
+        there is no previous working directory), the missing sequence
+        numbers below that, and the number of symlinks created.
+    """
+    if exposures is None:
+        exposures = index_exposure_symlinks(prior_attempt_dirs())
+    links_created = 0
+    if copy_links:
+        with os.scandir('.') as it:
+            existing = set(_.name for _ in it)
+        srcs = [_ for _ in exposures.values()
+                if os.path.basename(_) not in existing]
+        dests = [os.path.basename(_) for _ in srcs]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(_copy_symlink, srcs, dests))
+        links_created = len(srcs)
+    next_seqnum = max(exposures) + 1 if exposures else 0
+    missing = missing_seqnums(exposures)
+    if missing:
+        warnings.warn(f"There were {len(missing)} "
+                      "missing frames in the previous attempts.")
+    return ExposureSymlinks(next_seqnum, missing, links_created)
+
+
+class RetryPlan:
+    """
+    Acquisition plan for a retry of a BOT acquisition.  The plan is a
+    list of segments, each with the number of exposures of the
+    acquisition sequence to skip and the number of exposures to take
+    (None for the rest of the sequence), covering each gap in the
+    previous attempts followed by the exposures after the last one
+    taken.  The plan is rebuilt for each attempt from the exposure
+    symlinks that exist, and is saved to a json file in the attempt
+    directory, with the segments whose exposures have been verified
+    to have symlinks marked as done.
+    """
+    def __init__(self, segments, plan_file=None):
+        """
+        Parameters
+        ----------
+        segments : list
+            dicts with 'skip', 'limit' and 'done' entries.
+        plan_file : str [None]
+            The json file for saving the plan.
+        """
+        self.segments = segments
+        self.plan_file = plan_file
+
+    @staticmethod
+    def from_seqnums(missing, next_seqnum, plan_file=None):
+        """
+        Create a plan for taking the missing sequence numbers and the
+        sequence numbers from next_seqnum onwards.
+        """
+        segments = [dict(skip=first, limit=count, done=False)
+                    for first, count in seqnum_ranges(missing)]
+        segments.append(dict(skip=next_seqnum, limit=None, done=False))
+        return RetryPlan(segments, plan_file=plan_file)
+
+    @staticmethod
+    def read(plan_file):
+        "Read a plan from a json file."
+        with open(plan_file) as fd:
+            return RetryPlan(json.load(fd)['segments'], plan_file=plan_file)
+
+    @staticmethod
+    def create(plan_file='bot_acq_retry_plan.json', copy_links=True):
+        """
+        Copy the exposure symlinks from the previous attempts, create
+        the plan from the sequence numbers missing from the symlinks in
+        the current directory and the previous attempts, and save it.
+        Any existing plan file is overwritten, since the symlinks, not
+        the plans, record which exposures were taken.
+        """
+        exposures = index_exposure_symlinks(['.'] + prior_attempt_dirs())
+        symlinks = copy_exposure_symlinks(copy_links=copy_links,
+                                          exposures=exposures)
+        plan = RetryPlan.from_seqnums(symlinks.missing_seqnums,
+                                      symlinks.next_seqnum,
+                                      plan_file=plan_file)
+        plan.save()
+        return plan
+
+    def save(self):
+        "Write the plan to the plan file."
+        if self.plan_file is None:
+            return
+        tmp_file = self.plan_file + '.tmp'
+        with open(tmp_file, 'w') as fd:
+            json.dump(dict(segments=self.segments), fd, indent=2)
+        os.replace(tmp_file, self.plan_file)
+
+    def pending(self):
+        "The segments that have not been completed."
+        return [_ for _ in self.segments if not _['done']]
+
+    def gaps(self):
+        "The pending segments for the gaps in the previous attempts."
+        return [_ for _ in self.pending() if _['limit'] is not None]
+
+    @staticmethod
+    def segment_taken(segment, seqnums, total_frames=None):
+        """
+        Check if the exposures of a segment have been taken.
+
+        Parameters
+        ----------
+        segment : dict
+            The plan segment.
+        seqnums : iterable
+            The sequence numbers of the exposure symlinks.
+        total_frames : int [None]
+            The number of exposures in the acquisition sequence.  If
+            None, then a final segment is taken if there are no gaps
+            in the sequence numbers and at least one of them is in
+            the segment.
+
+        Returns
+        -------
+        bool
+        """
+        seqnums = set(seqnums)
+        skip = segment['skip']
+        if segment['limit'] is not None:
+            return seqnums.issuperset(range(skip, skip + segment['limit']))
+        if total_frames is not None:
+            return seqnums.issuperset(range(skip, total_frames))
+        return (not missing_seqnums(seqnums)
+                and any(_ >= skip for _ in seqnums))
+
+    def mark_done(self, segment):
+        "Record a segment as completed and save the plan."
+        segment['done'] = True
+        self.save()
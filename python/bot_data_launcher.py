@@ -0,0 +1,288 @@
+"""
+Launcher for the bot-data.py acquisition script.
+
+Rather than blocking in subprocess.check_call for the hours that an
+acquisition takes, the BotDataLauncher streams the script's output,
+follows the frame symlinks that it makes in the job directory, and
+writes a json progress file with the frame rate, the mean time between
+frames, and the estimated time remaining.  Each new frame is passed to
+any downstream hooks as it appears.  As with check_call, a non-zero
+exit status of the script raises subprocess.CalledProcessError.
+
+The command is run in its own session, so that if the launcher is
+interrupted, the whole process group, i.e., the shell and bot-data.py
+along with anything they started, is killed.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import fnmatch
+import threading
+import subprocess
+import configparser
+
+__all__ = ['BotDataLauncher', 'run_bot_data', 'count_cfg_frames']
+
+
+def _cfg_lines(value):
+    "Split a multi-line cfg entry into the fields of each line."
+    return [_.split() for _ in value.replace('\n', ',').split(',')
+            if _.strip()]
+
+
+def _count_acq_frames(acq_type, section):
+    """
+    The number of frames for an acquisition type, or None if the
+    type isn't supported.
+    """
+    bcount = int(section.get('bcount', 0))
+    if acq_type == 'bias':
+        return int(section['count'])
+    if acq_type == 'fe55':
+        # Exposure time and image count for each set.
+        return sum(bcount + int(_[1]) for _ in _cfg_lines(section['count']))
+    if acq_type == 'dark':
+        # Exposure time and image count for each set.
+        return sum(bcount + int(_[1]) for _ in _cfg_lines(section['dark']))
+    if acq_type == 'sflat':
+        # Filter, signal, image count and ND filter for each set.
+        return sum(bcount + int(_[2]) for _ in _cfg_lines(section['sflat']))
+    if acq_type == 'lambda':
+        imcount = int(section.get('imcount', 1))
+        return len(_cfg_lines(section['lambda']))*(bcount + imcount)
+    if acq_type == 'flat':
+        # The flats are taken in pairs.
+        return len(_cfg_lines(section['flat']))*(bcount + 2)
+    if acq_type == 'persistence':
+        # A flat followed by a number of darks for each set.
+        return sum(bcount + 1 + int(_[1])
+                   for _ in _cfg_lines(section['persistence']))
+    return None
+
+
+def count_cfg_frames(cfg_file):
+    """
+    Estimate the number of frames that bot-data.py takes for an
+    acquisition cfg file, from the [ACQUIRE] section and the image
+    and bias counts in the section of each acquisition type.  The
+    count is only used for progress estimates, so acquisition types
+    that aren't supported or whose sections are missing or can't be
+    parsed are reported and left out of the count.
+
+    Returns
+    -------
+    int : The number of frames, or None if the cfg file can't be read
+        or has no [ACQUIRE] section.
+    """
+    cfg = configparser.ConfigParser(allow_no_value=True,
+                                    inline_comment_prefixes=('#',))
+    try:
+        if not cfg.read(cfg_file):
+            return None
+        acq_types = cfg.options('ACQUIRE')
+    except configparser.Error as eobj:
+        print('Could not count the frames in', cfg_file, ':', eobj)
+        return None
+    nframes = 0
+    for acq_type in acq_types:
+        try:
+            count = _count_acq_frames(acq_type, cfg[acq_type.upper()])
+        except (configparser.Error, KeyError, IndexError,
+                ValueError) as eobj:
+            print('Could not count the', acq_type, 'frames in', cfg_file,
+                  ':', repr(eobj))
+            continue
+        if count is None:
+            print('Skipping unsupported acquisition type', acq_type,
+                  'in the frame count.')
+            continue
+        nframes += count
+    return nframes
+
+
+def frame_symlinks(job_dir='.', pattern='*_[0-9]*'):
+    "The names of the frame symlinks in a job directory."
+    with os.scandir(job_dir) as it:
+        return set(_.name for _ in it if fnmatch.fnmatchcase(_.name, pattern)
+                   and _.is_symlink())
+
+
+class BotDataLauncher:
+    """
+    Run a bot-data.py command while following the frames it takes.
+    """
+    def __init__(self, command, job_dir='.', expected_frames=None,
+                 hooks=(), progress_file='bot_data_progress.json',
+                 poll_interval=10., frame_pattern='*_[0-9]*'):
+        """
+        Parameters
+        ----------
+        command : str
+            The bot-data.py command, which is run in a shell.
+        job_dir : str ['.']
+            The directory where the frame symlinks are made.
+        expected_frames : int [None]
+            The number of frames to be taken, for the ETA estimate.
+        hooks : list [()]
+            Functions that are called with the path to each new frame
+            symlink.  Exceptions raised by the hooks are reported, but
+            do not stop the acquisition.
+        progress_file : str ['bot_data_progress.json']
+            The json file with the acquisition progress.  If None, then
+            no progress file is written.
+        poll_interval : float [10.]
+            Time in seconds between scans of the job directory.
+        frame_pattern : str ['*_[0-9]*']
+            Glob pattern for the frame symlink names.
+        """
+        self.command = command
+        self.job_dir = job_dir
+        self.expected_frames = expected_frames
+        self.hooks = list(hooks)
+        self.progress_file = progress_file
+        self.poll_interval = poll_interval
+        self.frame_pattern = frame_pattern
+        self.frames = []
+        self.arrival_times = []
+        self._known = None
+        self.start_time = None
+
+    def poll(self):
+        """
+        Scan the job directory for new frame symlinks, pass them to the
+        hooks, and update the progress file.
+
+        Returns
+        -------
+        list : The paths of the new frames.
+        """
+        current = frame_symlinks(self.job_dir, self.frame_pattern)
+        now = time.time()
+        new_frames = [os.path.join(self.job_dir, _)
+                      for _ in sorted(current - self._known)]
+        self._known |= current
+        for frame in new_frames:
+            self.frames.append(frame)
+            self.arrival_times.append(now)
+            for hook in self.hooks:
+                try:
+                    hook(frame)
+                except Exception as eobj:
+                    print('Error in frame hook for', frame, ':', eobj)
+        self.write_progress('running')
+        return new_frames
+
+    def progress(self, status):
+        """
+        The progress summary with the number of frames taken since the
+        launch, the frames per hour, the mean time in seconds between
+        frames, and the ETA in seconds if expected_frames is known.
+        """
+        elapsed = time.time() - self.start_time
+        nframes = len(self.frames)
+        frames_per_hour = 3600.*nframes/elapsed if elapsed > 0 else None
+        mean_gap = None
+        if nframes > 1:
+            mean_gap = ((self.arrival_times[-1] - self.arrival_times[0])
+                        /(nframes - 1))
+        eta = None
+        if self.expected_frames is not None and nframes > 0:
+            eta = max(self.expected_frames - nframes, 0)*elapsed/nframes
+        return dict(command=self.command, status=status,
+                    start_time=self.start_time, elapsed=elapsed,
+                    frames=nframes, expected_frames=self.expected_frames,
+                    frames_per_hour=frames_per_hour, mean_gap=mean_gap,
+                    eta=eta, last_frame=self.frames[-1] if nframes else None)
+
+    def write_progress(self, status, returncode=None):
+        "Write the progress file."
+        if self.progress_file is None:
+            return
+        progress = self.progress(status)
+        progress['returncode'] = returncode
+        tmp_file = self.progress_file + '.tmp'
+        with open(tmp_file, 'w') as fd:
+            json.dump(progress, fd, indent=2)
+        os.replace(tmp_file, self.progress_file)
+
+    @staticmethod
+    def _stream_output(stream, output):
+        "Copy a child process output stream to output as it is written."
+        for line in stream:
+            output.write(line)
+            output.flush()
+
+    @staticmethod
+    def _kill(process):
+        "Kill the process group of the command and wait for it to exit."
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        process.wait()
+
+    def run(self):
+        """
+        Run the command, following the frames until it exits.
+
+        Returns
+        -------
+        list : The paths of the frames taken.
+
+        Raises
+        ------
+        subprocess.CalledProcessError : if the command has a non-zero
+            exit status.
+        """
+        # Frames from previous attempts that were already symlinked
+        # into the job directory aren't counted.
+        self._known = frame_symlinks(self.job_dir, self.frame_pattern)
+        self.start_time = time.time()
+        print("executing:", self.command)
+        sys.stdout.flush()
+        process = subprocess.Popen(self.command, shell=True,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE,
+                                   universal_newlines=True,
+                                   start_new_session=True)
+        readers = [threading.Thread(target=self._stream_output,
+                                    args=(stream, output), daemon=True)
+                   for stream, output in ((process.stdout, sys.stdout),
+                                          (process.stderr, sys.stderr))]
+        for reader in readers:
+            reader.start()
+        try:
+            while True:
+                try:
+                    process.wait(timeout=self.poll_interval)
+                    break
+                except subprocess.TimeoutExpired:
+                    self.poll()
+        except BaseException:
+            self._kill(process)
+            raise
+        finally:
+            for reader in readers:
+                reader.join()
+        self.poll()
+        returncode = process.returncode
+        status = 'finished' if returncode == 0 else 'failed'
+        self.write_progress(status, returncode=returncode)
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, self.command)
+        return self.frames
+
+
+def run_bot_data(command, **kwds):
+    """
+    Run a bot-data.py command with a BotDataLauncher, as a replacement
+    for subprocess.check_call(command, shell=True).  The keyword
+    arguments are passed to the BotDataLauncher.
+
+    Returns
+    -------
+    list : The paths of the frames taken.
+    """
+    return BotDataLauncher(command, **kwds).run()
@@ -0,0 +1,237 @@
+"""
+Cached view of the file system for job directories of frame symlinks.
+
+BOT job directories are farms of symlinks to the frame folders (see
+PRESERVE_SYMLINKS), so each glob and stat in a validator resolves the
+symlinks and stats their targets over GPFS, and the next tool does the
+same again.  The CachedFS resolves each path once, caches the results
+of the lstat, stat and listdir calls, including failures, and makes
+those calls concurrently for batches of paths in prefetch and glob.
+
+The cache is not updated when files change, so code that modifies a
+directory it has already looked at must call invalidate().
+"""
+import os
+import stat
+import fnmatch
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+__all__ = ['CachedFS', 'get_cached_fs']
+
+
+def _has_magic(pattern):
+    return any(_ in pattern for _ in '*?[')
+
+
+class CachedFS:
+    """
+    File system view with cached lstat, stat, realpath and listdir
+    results, keyed by absolute path.
+    """
+    def __init__(self, max_workers=16):
+        """
+        Parameters
+        ----------
+        max_workers : int [16]
+            The number of threads for concurrent file system calls.
+        """
+        self.max_workers = max_workers
+        self._lstat = dict()
+        self._stat = dict()
+        self._realpath = dict()
+        self._listdir = dict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, cache, path, func):
+        """
+        Return the cached value of func(path), computing it if needed.
+        OSErrors are cached and re-raised.  The file system call is
+        made outside of the lock, so concurrent lookups of the same
+        path may both make it, but the first result is kept.
+        """
+        key = os.path.abspath(path)
+        try:
+            value = cache[key]
+        except KeyError:
+            try:
+                value = func(key)
+            except OSError as eobj:
+                value = eobj
+            with self._lock:
+                value = cache.setdefault(key, value)
+        if isinstance(value, OSError):
+            raise type(value)(value.errno, value.strerror, path)
+        return value
+
+    def lstat(self, path):
+        "Cached os.lstat."
+        return self._lookup(self._lstat, path, os.lstat)
+
+    def realpath(self, path):
+        "Cached os.path.realpath."
+        return self._lookup(self._realpath, path, os.path.realpath)
+
+    def stat(self, path):
+        """
+        Cached os.stat.  Symlinks are resolved once, and the results
+        are cached by the resolved path, so links to the same target
+        share the stat call.
+        """
+        return self._lookup(self._stat, self.realpath(path), os.stat)
+
+    def listdir(self, path):
+        "Cached, sorted os.listdir."
+        return list(self._lookup(self._listdir, path,
+                                 lambda _: sorted(os.listdir(_))))
+
+    def exists(self, path):
+        "Cached os.path.exists."
+        try:
+            self.stat(path)
+        except OSError:
+            return False
+        return True
+
+    def lexists(self, path):
+        "Cached os.path.lexists."
+        try:
+            self.lstat(path)
+        except OSError:
+            return False
+        return True
+
+    def isdir(self, path):
+        "Cached os.path.isdir."
+        try:
+            return stat.S_ISDIR(self.stat(path).st_mode)
+        except OSError:
+            return False
+
+    def isfile(self, path):
+        "Cached os.path.isfile."
+        try:
+            return stat.S_ISREG(self.stat(path).st_mode)
+        except OSError:
+            return False
+
+    def islink(self, path):
+        "Cached os.path.islink."
+        try:
+            return stat.S_ISLNK(self.lstat(path).st_mode)
+        except OSError:
+            return False
+
+    def getsize(self, path):
+        "Cached os.path.getsize."
+        return self.stat(path).st_size
+
+    def _map(self, func, paths):
+        "Apply func to the paths with a thread pool."
+        paths = list(paths)
+        if len(paths) < 2:
+            return [func(_) for _ in paths]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(func, paths))
+
+    def prefetch(self, paths, follow_symlinks=True):
+        """
+        Fill the cache for a batch of paths with concurrent stat, or
+        lstat, calls.
+        """
+        func = self.exists if follow_symlinks else self.lexists
+        self._map(func, paths)
+
+    def _names(self, path):
+        try:
+            return self.listdir(path or '.')
+        except OSError:
+            return []
+
+    def glob(self, pattern):
+        """
+        Cached equivalent of glob.glob, with the directory listings
+        and stat calls for each level of the pattern made concurrently.
+        As with glob, names starting with '.' are only matched by
+        patterns starting with '.'.
+
+        Returns
+        -------
+        list : The matching paths, in sorted order within each directory.
+        """
+        dirname, basename = os.path.split(pattern)
+        if _has_magic(dirname):
+            dirs = self.glob(dirname)
+            self.prefetch(dirs)
+            dirs = [_ for _ in dirs if self.isdir(_)]
+        else:
+            dirs = [dirname]
+        if not _has_magic(basename):
+            paths = [os.path.join(_, basename) for _ in dirs]
+            self.prefetch(paths, follow_symlinks=False)
+            return [_ for _ in paths if self.lexists(_)]
+        matches = []
+        for folder, names in zip(dirs, self._map(self._names, dirs)):
+            if not basename.startswith('.'):
+                names = [_ for _ in names if not _.startswith('.')]
+            matches.extend(os.path.join(folder, _)
+                           for _ in fnmatch.filter(names, basename))
+        return matches
+
+    def discard(self, paths):
+        """
+        Drop the cached results for a batch of files, including the
+        stat results of their resolved paths and the listings of the
+        folders containing them, e.g., once they have been processed,
+        so that the cache doesn't grow with the number of files.
+        Unlike invalidate(), the contents of folders aren't searched.
+        """
+        with self._lock:
+            keys = set()
+            for path in paths:
+                key = os.path.abspath(path)
+                keys.add(key)
+                realpath = self._realpath.get(key)
+                if realpath is not None:
+                    keys.add(realpath)
+            folders = set(os.path.dirname(_) for _ in keys)
+            for cache in (self._lstat, self._stat, self._realpath):
+                for key in keys:
+                    cache.pop(key, None)
+            for folder in folders:
+                self._listdir.pop(folder, None)
+
+    def invalidate(self, path=None):
+        """
+        Remove the cached results for a path and everything under it,
+        and the listing of its parent directory.  If path is None, the
+        whole cache is cleared.
+        """
+        with self._lock:
+            caches = (self._lstat, self._stat, self._realpath, self._listdir)
+            if path is None:
+                for cache in caches:
+                    cache.clear()
+                return
+            keys = {os.path.abspath(path)}
+            try:
+                keys.add(self._realpath[os.path.abspath(path)])
+            except KeyError:
+                pass
+            prefixes = tuple(_ + os.sep for _ in keys)
+            for cache in caches:
+                for key in [_ for _ in cache if _ in keys
+                            or _.startswith(prefixes)]:
+                    del cache[key]
+            self._listdir.pop(os.path.dirname(os.path.abspath(path)), None)
+
+
+_cached_fs = None
+
+
+def get_cached_fs():
+    "The process-wide CachedFS."
+    global _cached_fs
+    if _cached_fs is None:
+        _cached_fs = CachedFS()
+    return _cached_fs
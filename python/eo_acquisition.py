@@ -17,7 +17,8 @@ from ccs_scripting_tools import CcsSubsystems, CCS
 from ts8_utils import set_ccd_info, write_REB_info
 
 __all__ = ["hit_target_pressure", "EOAcquisition",
-           "PhotodiodeReadout", "EOAcqConfig", "AcqMetadata", "logger"]
+           "PhotodiodeReadout", "EOAcqConfig", "AcqMetadata",
+           "SequencerCommandMonitor", "logger"]
 
 CCS.setThrowExceptions(True)
 
@@ -59,6 +60,57 @@ def hit_target_pressure(vac_sub, target, wait=5, tmax=7200, logger=logger):
 
 AcqMetadata = namedtuple('AcqMetadata', 'cwd raft_id run_number'.split())
 
+# ts8 subsystem commands that load or modify the sequencer, and so
+# invalidate any previous verification of the sequencer parameters.
+SEQUENCER_MUTATING_COMMANDS = ('loadSequencer', 'setSequencerParameter',
+                               'loadCategories')
+
+
+class SequencerCommandMonitor(object):
+    """
+    Wrapper for a CCS subsystem that calls a function whenever a
+    command that loads or modifies the sequencer is sent.  All other
+    attributes are those of the wrapped subsystem.
+    """
+    def __init__(self, subsystem, on_sequencer_change):
+        """
+        Parameters
+        ----------
+        subsystem : CCS subsystem
+            The subsystem to wrap, e.g., ts8.
+        on_sequencer_change : function
+            Function with no arguments that is called after a sequencer
+            command is sent.
+        """
+        self._subsystem = subsystem
+        self._on_sequencer_change = on_sequencer_change
+
+    def _check_command(self, command):
+        tokens = str(command).split()
+        if tokens and tokens[0] in SEQUENCER_MUTATING_COMMANDS:
+            self._on_sequencer_change()
+
+    def synchCommand(self, timeout, command, *args):
+        """
+        Send a synchronous command to the subsystem.  The sequencer
+        change function is called even if the command fails since the
+        sequencer state is then unknown.
+        """
+        try:
+            return self._subsystem.synchCommand(timeout, command, *args)
+        finally:
+            self._check_command(command)
+
+    def asynchCommand(self, command, *args):
+        "Send an asynchronous command to the subsystem."
+        try:
+            return self._subsystem.asynchCommand(command, *args)
+        finally:
+            self._check_command(command)
+
+    def __getattr__(self, attr):
+        return getattr(self._subsystem, attr)
+
 
 class EOAcqConfig(dict):
     """
@@ -122,11 +174,23 @@ class EOAcquisition(object):
             Log commands using the logger.info(...) function.
         slit_id: int [2]
             ID of the monochormator slit to set via ._set_slitwidth(...)
+
+        Notes
+        -----
+        The sequencer parameters are verified before the first exposure
+        after the sequencer is loaded or modified.  Setting
+        SEQ_VERIFY_INTERVAL in the acquisition configuration file to N > 0
+        also re-verifies them every N exposures.
         """
         if subsystems is None:
             subsystems = dict(ts8='ts8', pd='ts8/Monitor',
                               mono='ts8/Monochromator')
         self.sub = CcsSubsystems(subsystems=subsystems, logger=logger)
+        self._seq_params_verified = False
+        self._frames_since_verify = 0
+        if hasattr(self.sub, 'ts8'):
+            self.sub.ts8 = SequencerCommandMonitor(
+                self.sub.ts8, self.invalidate_sequencer_params)
         self.sub.write_versions(os.path.join(metadata.cwd, 'ccs_versions.txt'))
         self._check_subsystems()
         write_REB_info(self.sub.ts8,
@@ -136,6 +200,8 @@ class EOAcquisition(object):
                                   % metadata.cwd)
         self.seqfile = seqfile
         self.eo_config = EOAcqConfig(acq_config_file)
+        self.seq_verify_interval \
+            = int(self.eo_config.get('SEQ_VERIFY_INTERVAL', default='0'))
         self.acqname = acqname
         self.md = metadata
         self.logger = logger
@@ -317,7 +383,7 @@ class EOAcquisition(object):
         self.sub.ts8.synchCommand(10, "setImageType", image_type)
         self.sub.ts8.synchCommand(10, "setSeqInfo", seqno)
 
-        self.verify_sequencer_params()
+        self.check_sequencer_params()
         self.ccd_clear(1)
 
         command = 'exposeAcquireAndSave %d %s %s "%s"' \
@@ -466,6 +532,29 @@ class EOAcquisition(object):
             self.logger.info("SeqParam ClearCount:%s invalid", res)
             raise java.lang.Exception("Bad Sequencer: ClearCount=1 required")
 
+    def invalidate_sequencer_params(self):
+        """
+        Force the sequencer parameters to be verified before the next
+        exposure.
+        """
+        self._seq_params_verified = False
+
+    def check_sequencer_params(self):
+        """
+        Verify the sequencer parameters if they have not been verified
+        since the sequencer was loaded or modified, or if
+        seq_verify_interval > 0 exposures have been taken since they were
+        last verified.
+        """
+        if (self._seq_params_verified and
+                (self.seq_verify_interval <= 0 or
+                 self._frames_since_verify < self.seq_verify_interval)):
+            self._frames_since_verify += 1
+            return
+        self.verify_sequencer_params()
+        self._seq_params_verified = True
+        self._frames_since_verify = 1
+
     def ccd_clear(self, nclears):
         """
         clear the ccd
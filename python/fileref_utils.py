@@ -0,0 +1,187 @@
+"""
+Tools for creating lcatr.schema.fileref entries for large numbers of
+files.
+
+The fileref records are computed across a thread pool, and each
+record is saved in a cache that is shared by all jobs, so that
+validator retries and BOT_acq_recovery re-validations, which run in
+new activityId directories, reuse the records rather than re-reading
+the files to recompute the checksums.  The cache is a SQLite database,
+filerefs.db, in the directory set by the FILEREF_CACHE_DIR environment
+variable, with ~/.cache/lcatr_filerefs as the default, and the records
+are keyed by the real path of each file.  An entry is reused only if
+the file's size, mtime and inode are unchanged and it was made for the
+same path as given by the caller, so that the cached records don't
+depend on how lcatr.schema.fileref.make normalizes the paths.  The
+files are processed in chunks: the cache entries for each chunk are
+looked up and written together, and the chunk's entries in the
+process-wide CachedFS, through which the files are statted
+concurrently, are dropped afterwards, so that the memory used doesn't
+grow with the number of files.  Nothing is written into the frame
+folders, which in the BOT jobs are symlinks into the raw data area.
+"""
+import os
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import lcatr.schema
+from cached_fs import get_cached_fs
+
+__all__ = ['make_filerefs', 'default_cache_dir', 'FilerefCache']
+
+SCHEMA = """
+create table if not exists filerefs (
+    realpath text primary key,
+    path text not null,
+    size integer,
+    mtime_ns integer,
+    inode integer,
+    record text not null);
+"""
+
+
+def default_cache_dir():
+    "The fileref cache directory."
+    return os.environ.get('FILEREF_CACHE_DIR',
+                          os.path.expanduser(os.path.join(
+                              '~', '.cache', 'lcatr_filerefs')))
+
+
+class FilerefCache:
+    """
+    SQLite cache of fileref records keyed by real path.
+    """
+    # Maximum number of parameters per query for older SQLite versions.
+    max_params = 500
+
+    def __init__(self, cache_dir=None, timeout=60.):
+        """
+        Parameters
+        ----------
+        cache_dir : str [None]
+            The cache directory.  If None, then use default_cache_dir().
+        timeout : float [60.]
+            Time in seconds to wait for other jobs' writes to finish.
+        """
+        self.cache_dir = default_cache_dir() if cache_dir is None \
+            else cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(self.cache_dir,
+                                                 'filerefs.db'),
+                                    timeout=timeout)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        "Close the database connection."
+        self.conn.close()
+
+    def lookup(self, realpaths):
+        """
+        Return the cache entries for a list of real paths.
+
+        Returns
+        -------
+        dict : The entries, with 'path', 'key' and 'record' fields,
+            keyed by real path.
+        """
+        entries = dict()
+        realpaths = sorted(set(realpaths))
+        for start in range(0, len(realpaths), self.max_params):
+            batch = realpaths[start:start + self.max_params]
+            query = ('select realpath, path, size, mtime_ns, inode, record '
+                     'from filerefs where realpath in ({})'
+                     .format(','.join('?'*len(batch))))
+            for row in self.conn.execute(query, batch):
+                entries[row[0]] = dict(path=row[1], key=list(row[2:5]),
+                                       record=json.loads(row[5]))
+        return entries
+
+    def update(self, entries):
+        "Add or replace entries, keyed by real path, in one transaction."
+        with self.conn:
+            self.conn.executemany(
+                'insert or replace into filerefs (realpath, path, size, '
+                'mtime_ns, inode, record) values (?, ?, ?, ?, ?, ?)',
+                [(realpath, _['path'], *_['key'], json.dumps(_['record']))
+                 for realpath, _ in entries.items()])
+
+
+def _file_key(path):
+    "The (size, mtime, inode) cache key of a file."
+    stat = get_cached_fs().stat(path)
+    return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+
+def _make_fileref(path, cached):
+    """
+    Return the fileref record for a file and its cache entry, reusing
+    the cached record if it was made for the same path and the file's
+    size, mtime and inode match.
+    """
+    key = _file_key(path)
+    if (cached is not None and cached.get('path') == path
+            and cached.get('key') == key):
+        return cached['record'], None
+    record = lcatr.schema.fileref.make(path)
+    return record, dict(path=path, key=key, record=record)
+
+
+def make_filerefs(paths, max_workers=16, cache_dir=None, use_cache=True,
+                  chunk_size=1000):
+    """
+    Create lcatr.schema.fileref entries for a list of files using a
+    thread pool, since the cost is dominated by reading the files to
+    compute their checksums.  The entries are generated in chunks, so
+    that they can be written out as they are made rather than held in
+    memory.
+
+    Parameters
+    ----------
+    paths : list
+        The file paths.
+    max_workers : int [16]
+        The number of threads.
+    cache_dir : str [None]
+        The cache directory.  If None, then use default_cache_dir().
+    use_cache : bool [True]
+        Flag to reuse and save the records in the cache.
+    chunk_size : int [1000]
+        The number of files processed in each chunk.
+
+    Yields
+    ------
+    dict : The fileref entries in the same order as the input paths.
+    """
+    paths = list(paths)
+    cache = None
+    if use_cache:
+        try:
+            cache = FilerefCache(cache_dir)
+        except (OSError, sqlite3.Error) as eobj:
+            print('Fileref cache not available:', eobj)
+    fs = get_cached_fs()
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for start in range(0, len(paths), chunk_size):
+                chunk = paths[start:start + chunk_size]
+                if cache is None:
+                    yield from executor.map(lcatr.schema.fileref.make, chunk)
+                    continue
+                fs.prefetch(chunk)
+                realpaths = [fs.realpath(_) for _ in chunk]
+                entries = cache.lookup(realpaths)
+                cached = [entries.get(_) for _ in realpaths]
+                outputs = list(executor.map(_make_fileref, chunk, cached))
+                updates = {realpath: entry for realpath, (_, entry)
+                           in zip(realpaths, outputs) if entry is not None}
+                if updates:
+                    try:
+                        cache.update(updates)
+                    except sqlite3.Error as eobj:
+                        print('Error writing to the fileref cache:', eobj)
+                fs.discard(chunk)
+                for record, _ in outputs:
+                    yield record
+    finally:
+        if cache is not None:
+            cache.close()
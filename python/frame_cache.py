@@ -0,0 +1,184 @@
+"""
+Memory-bounded cache of decoded CCD pixel data that is shared among
+processes.
+
+The decoded amp arrays for each FITS file are stored as .npy files in
+a cache directory that should be on a RAM-backed filesystem such as
+/dev/shm.  Pool workers in separate processes then share the decoded
+data through the page cache by reading it with
+np.load(..., mmap_mode='r').  Entries are keyed by the resolved path,
+modification time and size of the FITS file, and the least recently
+used entries are evicted when the cache exceeds its size limit.
+
+The cache is configured with environment variables so that it is
+inherited by pool workers:
+
+ALIVENESS_FRAME_CACHE_DIR
+    The cache directory.  If not set, caching is disabled.
+ALIVENESS_FRAME_CACHE_MB
+    The size limit in MB.  The default is one quarter of the
+    physical memory of the node.  A value of 0 disables caching.
+"""
+import os
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+
+__all__ = ['FrameCache', 'get_frame_cache', 'make_cache_dir']
+
+
+class FrameCache:
+    """
+    LRU cache of decoded pixel arrays stored as .npy files.
+    """
+    def __init__(self, cache_dir, max_bytes):
+        """
+        Parameters
+        ----------
+        cache_dir : str
+            The directory for the cached arrays.
+        max_bytes : int
+            The maximum total size of the cached .npy files in bytes.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(fits_file):
+        "The cache key for a FITS file based on its path, mtime and size."
+        stat = os.stat(fits_file)
+        token = '{}:{}:{}'.format(os.path.realpath(fits_file),
+                                  stat.st_mtime_ns, stat.st_size)
+        return hashlib.sha1(token.encode()).hexdigest()
+
+    def get(self, fits_file, loader):
+        """
+        Return the decoded array for a FITS file, calling
+        loader(fits_file) to decode it if it is not in the cache.
+        Cached arrays are returned as read-only memory maps.
+        """
+        path = os.path.join(self.cache_dir, self.key(fits_file) + '.npy')
+        try:
+            data = np.load(path, mmap_mode='r')
+        except (FileNotFoundError, ValueError):
+            # ValueError would indicate an unreadable entry, so
+            # just overwrite it.
+            pass
+        else:
+            self.hits += 1
+            try:
+                # Update the mtime for the LRU bookkeeping.
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+            return data
+        self.misses += 1
+        data = np.ascontiguousarray(loader(fits_file))
+        if data.nbytes <= self.max_bytes:
+            self._store(path, data)
+        return data
+
+    def _store(self, path, data):
+        """
+        Write an array to the cache, evicting old entries as needed.
+        The cache size is accounted with the sizes of the .npy files,
+        i.e., including their headers.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write to a temporary file and rename so that other processes
+        # never see a partially written entry.
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'wb') as fd:
+            np.save(fd, data)
+        size = os.path.getsize(tmp_path)
+        if size > self.max_bytes:
+            os.remove(tmp_path)
+            return
+        self.evict(self.max_bytes - size)
+        os.replace(tmp_path, path)
+
+    def _entries(self):
+        "List of (mtime, size, path) for the cached arrays."
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith('.npy'):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    @property
+    def nbytes(self):
+        "The total size in bytes of the cached .npy files."
+        return sum(_[1] for _ in self._entries())
+
+    def evict(self, target_bytes):
+        """
+        Remove the least recently used entries until the cache size is
+        at most target_bytes.
+        """
+        entries = sorted(self._entries())
+        total = sum(_[1] for _ in entries)
+        for _, size, path in entries:
+            if total <= target_bytes:
+                break
+            try:
+                # Processes that have this entry memory-mapped can still
+                # read it after it is removed.
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        "Remove the cache directory and its contents."
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+def _default_max_mb():
+    "One quarter of the physical memory in MB."
+    try:
+        return os.sysconf('SC_PHYS_PAGES')*os.sysconf('SC_PAGE_SIZE')/4/2**20
+    except (ValueError, OSError):
+        return 4096
+
+
+_frame_cache = None
+
+
+def get_frame_cache():
+    """
+    Return the process-wide FrameCache configured from the
+    ALIVENESS_FRAME_CACHE_DIR and ALIVENESS_FRAME_CACHE_MB environment
+    variables, or None if caching is disabled.
+    """
+    global _frame_cache
+    cache_dir = os.environ.get('ALIVENESS_FRAME_CACHE_DIR', None)
+    max_mb = float(os.environ.get('ALIVENESS_FRAME_CACHE_MB',
+                                  _default_max_mb()))
+    if cache_dir is None or max_mb <= 0:
+        return None
+    if (_frame_cache is None or _frame_cache.cache_dir != cache_dir
+            or _frame_cache.max_bytes != int(max_mb*2**20)):
+        _frame_cache = FrameCache(cache_dir, int(max_mb*2**20))
+    return _frame_cache
+
+
+def make_cache_dir(prefix='aliveness_frames_'):
+    """
+    Create a new cache directory on /dev/shm, if available, or in the
+    default temporary directory otherwise, and return its path.
+    """
+    shm_dir = '/dev/shm'
+    root_dir = shm_dir if os.path.isdir(shm_dir) else None
+    return tempfile.mkdtemp(prefix=prefix, dir=root_dir)
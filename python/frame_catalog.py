@@ -0,0 +1,303 @@
+"""
+SQLite catalog of the files in BOT and TS8 frame folders.
+
+Each frame folder, e.g., MC_C_20210101_000123, is scanned once and its
+files are recorded with their detector names, sizes and mtimes, along
+with the frame's sequence number, run number, image type, test type
+and exposure time from the folder's _index.json file.  Each folder's
+entries are listed and compared with the stored names, sizes and
+mtimes of its files, and the folder is only re-ingested if those, or
+the mtime of the folder or of its _index.json file, have changed, so
+the catalog can be updated cheaply as data arrive and queried, e.g.,
+for the flat files for R22_S11 in a run, without touching the file
+system.
+"""
+import os
+import json
+import fnmatch
+import sqlite3
+from frame_index import det_name_from_filename
+
+__all__ = ['FrameCatalog', 'read_frame_index']
+
+INDEX_NAME = '_index.json'
+
+SCHEMA = """
+create table if not exists frames (
+    frame_id integer primary key,
+    folder text unique not null,
+    name text not null,
+    seqnum integer,
+    dayobs text,
+    run text,
+    imgtype text,
+    testtype text,
+    exptime real,
+    folder_mtime_ns integer,
+    index_mtime_ns integer);
+create table if not exists files (
+    file_id integer primary key,
+    frame_id integer not null references frames(frame_id)
+        on delete cascade,
+    path text unique not null,
+    name text not null,
+    det_name text,
+    kind text not null,
+    size integer,
+    mtime_ns integer);
+create index if not exists frames_run on frames(run, imgtype, testtype);
+create index if not exists frames_seqnum on frames(seqnum);
+create index if not exists files_det_name on files(det_name, kind);
+create index if not exists files_frame_id on files(frame_id);
+"""
+
+# Header keywords in the _index.json files for the frame metadata.
+FRAME_KEYWORDS = dict(seqnum='SEQNUM', dayobs='DAYOBS', run='RUNNUM',
+                      imgtype='IMGTYPE', testtype='TESTTYPE',
+                      exptime='EXPTIME')
+
+
+def read_frame_index(folder):
+    """
+    Read the frame metadata from the _index.json file in a frame
+    folder, combining the __COMMON__ entries with those of the first
+    file entry for keywords that differ between files.
+
+    Returns
+    -------
+    dict : The header keyword values, or an empty dict if the index
+        file is missing or unreadable.
+    """
+    try:
+        with open(os.path.join(folder, INDEX_NAME)) as fd:
+            index = json.load(fd)
+    except (OSError, ValueError):
+        return dict()
+    metadata = dict()
+    for key, value in index.items():
+        if not key.startswith('__') and isinstance(value, dict):
+            metadata.update(value)
+            break
+    metadata.update(index.get('__COMMON__', dict()))
+    return metadata
+
+
+def file_kind(filename):
+    "The kind of file in a frame folder: 'fits', 'pd' or 'other'."
+    if fnmatch.fnmatchcase(filename, '*_R??_S??.fits'):
+        return 'fits'
+    if fnmatch.fnmatchcase(filename, 'Photodiode_Readings*.txt'):
+        return 'pd'
+    return 'other'
+
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class FrameCatalog:
+    """
+    SQLite catalog of frame folders and their files.
+    """
+    def __init__(self, db_file='frame_catalog.db'):
+        """
+        Parameters
+        ----------
+        db_file : str ['frame_catalog.db']
+            The SQLite database file, which is created if needed.
+        """
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('pragma foreign_keys = on')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        "Close the database connection."
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def ingest_folder(self, folder):
+        """
+        Add or update a frame folder in the catalog.  The folder is
+        only re-ingested if it, its _index.json file, or the names,
+        sizes or mtimes of its files have changed since it was last
+        ingested.
+
+        Returns
+        -------
+        bool : True if the folder was re-ingested.
+        """
+        folder = os.path.realpath(folder)
+        folder_mtime = _mtime_ns(folder)
+        index_mtime = _mtime_ns(os.path.join(folder, INDEX_NAME))
+
+        files = []
+        with os.scandir(folder) as it:
+            for entry in it:
+                if entry.name.startswith('.') or entry.name == INDEX_NAME:
+                    continue
+                stat = entry.stat()
+                kind = file_kind(entry.name)
+                det_name = (det_name_from_filename(entry.name)
+                            if kind == 'fits' else None)
+                files.append((entry.path, entry.name, det_name, kind,
+                              stat.st_size, stat.st_mtime_ns))
+
+        row = self.conn.execute('select frame_id, folder_mtime_ns, '
+                                'index_mtime_ns from frames where folder=?',
+                                (folder,)).fetchone()
+        if (row is not None and row['folder_mtime_ns'] == folder_mtime
+                and row['index_mtime_ns'] == index_mtime):
+            # Files can be rewritten in place, e.g., by a transfer
+            # that is completed, without changing the folder mtime.
+            stored = set(tuple(_) for _ in self.conn.execute(
+                'select name, size, mtime_ns from files where frame_id=?',
+                (row['frame_id'],)))
+            if stored == set((_[1], _[4], _[5]) for _ in files):
+                return False
+
+        name = os.path.basename(folder)
+        metadata = read_frame_index(folder)
+        values = {key: metadata.get(keyword)
+                  for key, keyword in FRAME_KEYWORDS.items()}
+        suffix = name.split('_')[-1]
+        if suffix.isdigit():
+            values['seqnum'] = int(suffix)
+        if values['run'] is not None:
+            values['run'] = str(values['run'])
+
+        with self.conn:
+            if row is not None:
+                self.conn.execute('delete from frames where frame_id=?',
+                                  (row['frame_id'],))
+            cursor = self.conn.execute(
+                'insert into frames (folder, name, seqnum, dayobs, run, '
+                'imgtype, testtype, exptime, folder_mtime_ns, '
+                'index_mtime_ns) values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (folder, name, values['seqnum'], values['dayobs'],
+                 values['run'], values['imgtype'], values['testtype'],
+                 values['exptime'], folder_mtime, index_mtime))
+            frame_id = cursor.lastrowid
+            self.conn.executemany(
+                'insert into files (frame_id, path, name, det_name, kind, '
+                'size, mtime_ns) values (?, ?, ?, ?, ?, ?, ?)',
+                [(frame_id,) + _ for _ in files])
+        return True
+
+    def ingest(self, data_dir, pattern='*_[0-9]*'):
+        """
+        Add or update the frame folders in a directory, e.g., a day's
+        worth of BOT data or a job directory of frame symlinks, and
+        remove folders that no longer exist.
+
+        Parameters
+        ----------
+        data_dir : str
+            The directory containing the frame folders.
+        pattern : str ['*_[0-9]*']
+            Glob-style pattern for the frame folder names, which
+            matches both the raw data folders, e.g.,
+            MC_C_20210101_000123, and the frame symlinks in a job
+            directory, e.g., flat_001.
+
+        Returns
+        -------
+        int : The number of folders that were re-ingested.
+        """
+        folders = set()
+        with os.scandir(data_dir) as it:
+            for entry in it:
+                if (fnmatch.fnmatchcase(entry.name, pattern)
+                        and entry.is_dir()):
+                    folders.add(os.path.realpath(entry.path))
+        nscanned = sum(self.ingest_folder(_) for _ in sorted(folders))
+        self.prune()
+        return nscanned
+
+    def prune(self):
+        "Remove folders that no longer exist from the catalog."
+        folders = [_[0] for _
+                   in self.conn.execute('select folder from frames')]
+        missing = [(_,) for _ in folders if not os.path.isdir(_)]
+        with self.conn:
+            self.conn.executemany('delete from frames where folder=?',
+                                  missing)
+
+    @staticmethod
+    def _where(clauses):
+        "Build the where clause and parameters for a query."
+        conditions, params = [], []
+        for column, value in clauses:
+            if value is None:
+                continue
+            if column.endswith('>=') or column.endswith('<='):
+                conditions.append(f'{column} ?')
+            else:
+                conditions.append(f'{column} = ?')
+            params.append(value)
+        where = ' where ' + ' and '.join(conditions) if conditions else ''
+        return where, params
+
+    def frames(self, run=None, imgtype=None, testtype=None,
+               min_seqnum=None, max_seqnum=None):
+        """
+        Query the frames.
+
+        Returns
+        -------
+        list : sqlite3.Row objects with the frames table columns, in
+            order of folder name.
+        """
+        where, params = self._where(
+            [('run', None if run is None else str(run)),
+             ('imgtype', imgtype), ('testtype', testtype),
+             ('seqnum >=', min_seqnum), ('seqnum <=', max_seqnum)])
+        return self.conn.execute(f'select * from frames{where} order by name',
+                                 params).fetchall()
+
+    def files(self, det_name=None, kind='fits', run=None, imgtype=None,
+              testtype=None, min_seqnum=None, max_seqnum=None):
+        """
+        Query the file paths, e.g., files(det_name='R22_S11',
+        imgtype='FLAT', run='12345').  Arguments that are None are not
+        used in the selection.
+
+        Returns
+        -------
+        list : The file paths in order of frame folder and file name.
+        """
+        where, params = self._where(
+            [('files.det_name', det_name), ('files.kind', kind),
+             ('frames.run', None if run is None else str(run)),
+             ('frames.imgtype', imgtype), ('frames.testtype', testtype),
+             ('frames.seqnum >=', min_seqnum),
+             ('frames.seqnum <=', max_seqnum)])
+        query = ('select files.path from files join frames '
+                 f'using (frame_id){where} order by frames.name, files.name')
+        return [_[0] for _ in self.conn.execute(query, params)]
+
+    def testtype_counts(self, run=None):
+        "The numbers of frames keyed by test type."
+        where, params = self._where(
+            [('run', None if run is None else str(run))])
+        query = (f'select testtype, count(*) from frames{where} '
+                 'group by testtype order by testtype')
+        return dict(tuple(_) for _ in self.conn.execute(query, params))
+
+    def det_names(self, run=None):
+        "The sorted detector names of the FITS files."
+        where, params = self._where(
+            [('files.kind', 'fits'),
+             ('frames.run', None if run is None else str(run))])
+        query = ('select distinct files.det_name from files join frames '
+                 f'using (frame_id){where} order by files.det_name')
+        return [_[0] for _ in self.conn.execute(query, params)]
@@ -0,0 +1,165 @@
+"""
+Functions to index the files in BOT and TS8 frame folders with a
+single directory scan, rather than globbing the same folders
+repeatedly for each detector or raft.
+"""
+import os
+import fnmatch
+from collections import defaultdict
+
+__all__ = ['det_name_from_filename', 'scan_frame_folder', 'raft_file_index',
+           'JobFileIndex']
+
+
+def det_name_from_filename(filename):
+    """
+    Return the detector name, e.g., 'R22_S11', for a single sensor
+    FITS file with a name of the form *_<raft>_<slot>.fits.
+    """
+    stem = os.path.basename(filename)[:-len('.fits')]
+    return '_'.join(stem.split('_')[-2:])
+
+
+def scan_frame_folder(frame_dir, pattern='*_R??_S??.fits'):
+    """
+    List the single sensor FITS files in a frame folder with one
+    directory scan.
+
+    Parameters
+    ----------
+    frame_dir : str
+        The frame folder.
+    pattern : str ['*_R??_S??.fits']
+        The glob-style pattern that the filenames must match.  As with
+        glob, files starting with '.' are skipped.
+
+    Returns
+    -------
+    dict : The sorted lists of file paths, formed as
+        os.path.join(frame_dir, <filename>), keyed by detector name.
+        As with glob, every matching file is returned, including
+        multiple files for the same detector, e.g., a re-written frame.
+    """
+    files = defaultdict(list)
+    try:
+        with os.scandir(frame_dir) as it:
+            for entry in it:
+                if (entry.name.startswith('.') or
+                        not fnmatch.fnmatchcase(entry.name, pattern)):
+                    continue
+                files[det_name_from_filename(entry.name)].append(
+                    os.path.join(frame_dir, entry.name))
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    return {det_name: sorted(paths) for det_name, paths in files.items()}
+
+
+def raft_file_index(frame_dir, pattern='*_R??_S??.fits'):
+    """
+    Index the single sensor FITS files in a frame folder by raft.
+
+    Returns
+    -------
+    dict : The sorted lists of file paths, keyed by raft name.
+    """
+    index = defaultdict(list)
+    for det_name, paths in scan_frame_folder(frame_dir, pattern).items():
+        index[det_name.split('_')[0]].extend(paths)
+    return {raft: sorted(paths) for raft, paths in index.items()}
+
+
+class JobFileIndex:
+    """
+    Index of the files in a job directory and in its frame folders
+    from a single scan of each directory.  The file lists are ordered
+    as the corresponding glob calls would order them.
+    """
+    def __init__(self, job_dir='.', fs=None):
+        """
+        Parameters
+        ----------
+        job_dir : str ['.']
+            The job directory.  The file paths are formed relative to
+            it as glob would, i.e., '<folder>/<filename>' if job_dir is
+            '.'.
+        fs : CachedFS [None]
+            A cached file system view, e.g., cached_fs.get_cached_fs(),
+            through which to list the directories, so that the
+            listings and stat results are shared with other tools.  If
+            None, then the directories are scanned directly.
+        """
+        self.job_dir = job_dir
+        self.fits_files = defaultdict(list)
+        self.other_files = []
+        if fs is None:
+            self.top_level_files, folder_files = self._scan()
+        else:
+            entries = fs.glob(self._path('*'))
+            fs.prefetch(entries)
+            self.top_level_files = [_ for _ in entries if not fs.isdir(_)]
+            folder_files = fs.glob(self._path('*', '*'))
+        for path in folder_files:
+            if path.endswith('.fits'):
+                self.fits_files[det_name_from_filename(path)].append(path)
+            else:
+                self.other_files.append(path)
+        for paths in self.fits_files.values():
+            paths.sort()
+        self.other_files.sort()
+
+    def _scan(self):
+        """
+        Scan the job directory and its folders.
+
+        Returns
+        -------
+        (list, list) : The paths of the top-level files and of the
+            files in the folders.
+        """
+        top_level_files, folder_files, folders = [], [], []
+        with os.scandir(self.job_dir) as it:
+            for entry in it:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir():
+                    folders.append(entry.name)
+                else:
+                    top_level_files.append(self._path(entry.name))
+        for folder in folders:
+            try:
+                entries = list(os.scandir(os.path.join(self.job_dir, folder)))
+            except OSError:
+                # glob skips unreadable folders, so do the same.
+                continue
+            folder_files.extend(self._path(folder, entry.name)
+                                for entry in entries
+                                if not entry.name.startswith('.'))
+        return top_level_files, folder_files
+
+    def _path(self, *names):
+        if self.job_dir == '.':
+            return os.path.join(*names)
+        return os.path.join(self.job_dir, *names)
+
+    def det_files(self, det_name):
+        """
+        The FITS files in the frame folders for a detector, i.e.,
+        sorted(glob.glob('*/*_<det_name>.fits')).
+        """
+        return list(self.fits_files.get(det_name, []))
+
+    def folder_files(self, pattern):
+        """
+        The non-FITS files in the frame folders with names matching
+        pattern, i.e., sorted(glob.glob('*/<pattern>')).
+        """
+        return [_ for _ in self.other_files
+                if fnmatch.fnmatchcase(os.path.basename(_), pattern)]
+
+    def top_level(self, pattern):
+        """
+        The files in the job directory with names matching pattern, in
+        directory order as returned by glob.glob(pattern).
+        """
+        return [_ for _ in self.top_level_files
+                if fnmatch.fnmatchcase(os.path.basename(_), pattern)]
@@ -0,0 +1,204 @@
+"""
+On-disk cache of per-file analysis results, so that a validator can
+reuse the statistics computed by its producer, or by a previous
+attempt of the job, rather than re-reading the FITS files.
+
+Entries are pickle files keyed by the function name, the analysis
+parameters, and the resolved path, size and modification time of the
+input file.  The least recently used entries are evicted when the
+cache exceeds its size limit.
+
+The cache is configured with environment variables so that it is
+inherited by pool workers:
+
+ALIVENESS_RESULT_CACHE_DIR
+    The cache directory.  If not set, caching is disabled.
+ALIVENESS_RESULT_CACHE_MB
+    The size limit in MB.  The default is 100.
+ALIVENESS_RESULT_CACHE_BYPASS
+    If set, the cache is neither read nor written.
+"""
+import os
+import pickle
+import shutil
+import hashlib
+import functools
+
+__all__ = ['ResultCache', 'get_result_cache', 'enable_result_cache',
+           'cached_result']
+
+
+class ResultCache:
+    """
+    LRU cache of picklable analysis results for single input files.
+    """
+    def __init__(self, cache_dir, max_bytes):
+        """
+        Parameters
+        ----------
+        cache_dir : str
+            The directory for the cached results.
+        max_bytes : int
+            The maximum total size of the cached results in bytes.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(func_name, params, path):
+        """
+        The cache key for the results of a function applied to a file
+        based on the function name, the parameters, and the path,
+        size and mtime of the file.
+        """
+        stat = os.stat(path)
+        token = '{}:{}:{}:{}:{}'.format(func_name, repr(params),
+                                        os.path.realpath(path),
+                                        stat.st_size, stat.st_mtime_ns)
+        return hashlib.sha1(token.encode()).hexdigest()
+
+    def get(self, func_name, params, path, compute):
+        """
+        Return the cached result for func_name applied to path with
+        the specified parameters, calling compute() to obtain it if it
+        is not in the cache.
+        """
+        entry = os.path.join(self.cache_dir,
+                             self.key(func_name, params, path) + '.pkl')
+        try:
+            with open(entry, 'rb') as fd:
+                result = pickle.load(fd)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            # An unreadable entry is just overwritten.
+            pass
+        else:
+            self.hits += 1
+            try:
+                # Update the mtime for the LRU bookkeeping.
+                os.utime(entry)
+            except FileNotFoundError:
+                pass
+            return result
+        self.misses += 1
+        result = compute()
+        self._store(entry, result)
+        return result
+
+    def _store(self, entry, result):
+        "Write a result to the cache, evicting old entries as needed."
+        data = pickle.dumps(result)
+        if len(data) > self.max_bytes:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.evict(self.max_bytes - len(data))
+            # Write to a temporary file and rename so that other
+            # processes never see a partially written entry.
+            tmp_entry = '{}.{}.tmp'.format(entry, os.getpid())
+            with open(tmp_entry, 'wb') as fd:
+                fd.write(data)
+            os.replace(tmp_entry, entry)
+        except OSError:
+            # The cache is an optimization, so an unwritable cache
+            # directory is ignored.
+            pass
+
+    def _entries(self):
+        "List of (mtime, size, path) for the cached results."
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith('.pkl'):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    @property
+    def nbytes(self):
+        "The total size in bytes of the cached results."
+        return sum(_[1] for _ in self._entries())
+
+    def evict(self, target_bytes):
+        """
+        Remove the least recently used entries until the cache size is
+        at most target_bytes.
+        """
+        entries = sorted(self._entries())
+        total = sum(_[1] for _ in entries)
+        for _, size, path in entries:
+            if total <= target_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        "Remove the cache directory and its contents."
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+_result_cache = None
+
+
+def get_result_cache():
+    """
+    Return the process-wide ResultCache configured from the
+    ALIVENESS_RESULT_CACHE_* environment variables, or None if caching
+    is disabled or bypassed.
+    """
+    global _result_cache
+    cache_dir = os.environ.get('ALIVENESS_RESULT_CACHE_DIR', None)
+    max_mb = float(os.environ.get('ALIVENESS_RESULT_CACHE_MB', 100))
+    if (cache_dir is None or max_mb <= 0
+            or 'ALIVENESS_RESULT_CACHE_BYPASS' in os.environ):
+        return None
+    if (_result_cache is None or _result_cache.cache_dir != cache_dir
+            or _result_cache.max_bytes != int(max_mb*2**20)):
+        _result_cache = ResultCache(cache_dir, int(max_mb*2**20))
+    return _result_cache
+
+
+def enable_result_cache(cache_dir='aliveness_result_cache'):
+    """
+    Enable the result cache for this process and its children, unless
+    a cache directory has already been specified, and return the
+    cache directory.  A relative cache_dir is resolved against the
+    current directory, so that the producer and validator of a job
+    share the cache.
+    """
+    if 'ALIVENESS_RESULT_CACHE_DIR' not in os.environ:
+        os.environ['ALIVENESS_RESULT_CACHE_DIR'] = os.path.abspath(cache_dir)
+    return os.environ['ALIVENESS_RESULT_CACHE_DIR']
+
+
+def cached_result(**params):
+    """
+    Decorator for functions of the form func(path, *args, **kwds) to
+    cache their results in the result cache.  The keyword arguments
+    of the decorator, e.g., the name of the pixel-level backend, are
+    included in the cache key along with the function arguments.
+    """
+    def decorator(func):
+        func_name = '{}.{}'.format(func.__module__, func.__qualname__)
+
+        @functools.wraps(func)
+        def wrapper(path, *args, **kwds):
+            cache = get_result_cache()
+            if cache is None:
+                return func(path, *args, **kwds)
+            key_params = (sorted(params.items()), args, sorted(kwds.items()))
+            return cache.get(func_name, key_params, path,
+                             lambda: func(path, *args, **kwds))
+        return wrapper
+    return decorator
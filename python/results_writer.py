@@ -0,0 +1,86 @@
+"""
+Streaming writer for summary.lims files.
+
+lcatr.schema.write_file serializes a complete in-memory list of
+results and lcatr.schema.validate_file then reads it all back to
+validate it.  For validators with hundreds of thousands of fileref
+records, the ResultsWriter instead validates each record and writes it
+as it is produced.  The output is the same JSON list of records, with
+one record per line, and it is moved into place when the writer is
+closed so that a partial summary.lims is never left behind.
+"""
+import os
+import json
+import lcatr.schema
+
+__all__ = ['ResultsWriter']
+
+
+def validate_record(record):
+    """
+    Validate a results record with lcatr.schema.validate against the
+    schema named in it, as lcatr.schema.validate_file does for each
+    record in a file.
+    """
+    schema = lcatr.schema.get(record['schema_name'], record['schema_version'])
+    lcatr.schema.validate(schema, **record)
+
+
+class ResultsWriter:
+    """
+    Write results records to a summary.lims file as they are produced.
+    """
+    def __init__(self, filename='summary.lims', validate=True):
+        """
+        Parameters
+        ----------
+        filename : str ['summary.lims']
+            The output file.
+        validate : bool [True]
+            Flag to validate each record before writing it.
+        """
+        self.filename = filename
+        self.validate = validate
+        self.nrecords = 0
+        self._tmp_file = '{}.{}.tmp'.format(filename, os.getpid())
+        self._output = open(self._tmp_file, 'w')
+        self._output.write('[')
+
+    def append(self, record):
+        "Validate and write a record."
+        if self.validate:
+            validate_record(record)
+        self._output.write('\n' if self.nrecords == 0 else ',\n')
+        self._output.write(json.dumps(record))
+        self.nrecords += 1
+
+    def extend(self, records):
+        "Validate and write each record of an iterable."
+        for record in records:
+            self.append(record)
+
+    def close(self):
+        "Finish the JSON list and move the file into place."
+        if self._output is None:
+            return
+        self._output.write('\n]\n')
+        self._output.close()
+        self._output = None
+        os.replace(self._tmp_file, self.filename)
+
+    def abort(self):
+        "Discard the output without replacing any existing file."
+        if self._output is None:
+            return
+        self._output.close()
+        self._output = None
+        os.remove(self._tmp_file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,257 @@
+"""
+Staging of the CCS sequencer files into a job's working directory.
+
+The sequencer files are fetched with a single scp command for all of
+the files that are not already in a local content-addressed cache,
+or, if files from different directories have the same name, with one
+scp command for each set of files with distinct names.
+The cache index is keyed by the source path and its modification time
+on the remote host, and the files are stored by their sha256 digests,
+so unchanged files are hard-linked from the cache rather than
+transferred again on each job attempt.
+
+The cache directory is set by the BOT_ACQ_SEQUENCER_CACHE_DIR
+environment variable, with ~/.cache/bot_acq_sequencer_files as the
+default.
+"""
+import os
+import json
+import shlex
+import shutil
+import hashlib
+import tempfile
+import subprocess
+from collections import defaultdict
+
+__all__ = ['SequencerCache', 'stage_sequencer_files', 'source_mtimes']
+
+
+def default_cache_dir():
+    "The sequencer file cache directory."
+    return os.environ.get('BOT_ACQ_SEQUENCER_CACHE_DIR',
+                          os.path.expanduser(os.path.join(
+                              '~', '.cache', 'bot_acq_sequencer_files')))
+
+
+def split_source(source):
+    """
+    Split an scp source into (host, path), with host=None for local
+    files.  As for scp, a colon before any slash separates the host.
+    """
+    host, sep, path = source.partition(':')
+    if sep and host and '/' not in host:
+        return host, path
+    return None, source
+
+
+def source_mtimes(sources):
+    """
+    Get the modification times of the sequencer files with one ssh
+    stat command per remote host.
+
+    Returns
+    -------
+    dict : The mtimes in integer seconds keyed by source, with None for
+        files whose mtimes could not be obtained.
+    """
+    mtimes = {_: None for _ in sources}
+    remote_paths = defaultdict(dict)
+    for source in sources:
+        host, path = split_source(source)
+        if host is None:
+            try:
+                mtimes[source] = int(os.stat(path).st_mtime)
+            except OSError:
+                pass
+        else:
+            remote_paths[host][path] = source
+    for host, paths in remote_paths.items():
+        command = 'stat -L -c "%Y %n" -- ' \
+            + ' '.join(shlex.quote(_) for _ in paths)
+        try:
+            output = subprocess.run(['ssh', host, command],
+                                    stdout=subprocess.PIPE,
+                                    universal_newlines=True).stdout
+        except OSError:
+            continue
+        # Files that are missing on the remote host are just left
+        # out of the output, so parse whatever was returned.
+        for line in output.splitlines():
+            mtime, _, path = line.partition(' ')
+            if path in paths and mtime.isdigit():
+                mtimes[paths[path]] = int(mtime)
+    return mtimes
+
+
+def sha256sum(filename, blocksize=2**20):
+    "The sha256 hex digest of a file."
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as fd:
+        for block in iter(lambda: fd.read(blocksize), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class SequencerCache:
+    """
+    Content-addressed store of sequencer files with an index keyed by
+    source path and modification time.
+    """
+    def __init__(self, cache_dir=None):
+        """
+        Parameters
+        ----------
+        cache_dir : str [None]
+            The cache directory.  If None, then use default_cache_dir().
+        """
+        self.cache_dir = default_cache_dir() if cache_dir is None \
+            else cache_dir
+        self.objects_dir = os.path.join(self.cache_dir, 'objects')
+        self.index_file = os.path.join(self.cache_dir, 'index.json')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.index = self._read_index()
+
+    def _read_index(self):
+        try:
+            with open(self.index_file) as fd:
+                return json.load(fd)
+        except (OSError, ValueError):
+            return dict()
+
+    @staticmethod
+    def key(source, mtime):
+        "The index key for a source file."
+        return f'{source}:{mtime}'
+
+    def lookup(self, source, mtime):
+        """
+        Return the path of the cached copy of source if it is in the
+        cache with the same mtime, otherwise None.
+        """
+        if mtime is None:
+            return None
+        digest = self.index.get(self.key(source, mtime))
+        if digest is None:
+            return None
+        path = os.path.join(self.objects_dir, digest)
+        return path if os.path.isfile(path) else None
+
+    def add(self, source, mtime, filename):
+        """
+        Move a fetched copy of source into the cache and return the
+        path of the cached copy.  The cached copy is made read-only
+        since it is hard-linked into the job directories.
+        """
+        digest = sha256sum(filename)
+        path = os.path.join(self.objects_dir, digest)
+        if os.path.isfile(path):
+            os.remove(filename)
+        else:
+            os.chmod(filename, 0o444)
+            os.replace(filename, path)
+        if mtime is not None:
+            self.index[self.key(source, mtime)] = digest
+        return path
+
+    def save(self):
+        """
+        Write the index, merging in any entries added by other jobs
+        since it was read.
+        """
+        index = self._read_index()
+        index.update(self.index)
+        tmp_file = '{}.{}.tmp'.format(self.index_file, os.getpid())
+        with open(tmp_file, 'w') as fd:
+            json.dump(index, fd, indent=2)
+        os.replace(tmp_file, self.index_file)
+        self.index = index
+
+
+def _basename_batches(sources):
+    """
+    Split sources into batches with distinct file names, so that each
+    batch can be copied into a directory with one scp command.
+    """
+    batches = []
+    for source in sources:
+        name = os.path.basename(split_source(source)[1])
+        for batch in batches:
+            if name not in batch:
+                break
+        else:
+            batch = dict()
+            batches.append(batch)
+        batch[name] = source
+    return [list(_.values()) for _ in batches]
+
+
+def _link_or_copy(src, dest):
+    "Hard-link src to dest, copying it if a link is not possible."
+    if os.path.lexists(dest):
+        os.remove(dest)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copyfile(src, dest)
+
+
+def stage_sequencer_files(sources, dest_dir='.', cache_dir=None):
+    """
+    Stage sequencer files into dest_dir, fetching the files that are
+    not in the cache with a single scp command.  Duplicate sources are
+    staged once.  For sources with the same file name, the last one is
+    staged in dest_dir.
+
+    Parameters
+    ----------
+    sources : list
+        The scp sources, i.e., [<host>:]<path>, of the sequencer files.
+    dest_dir : str ['.']
+        The destination directory.
+    cache_dir : str [None]
+        The cache directory.  If None, then use default_cache_dir().
+
+    Returns
+    -------
+    list : The staged files in dest_dir.
+    """
+    sources = list(dict.fromkeys(sources))
+    try:
+        cache = SequencerCache(cache_dir)
+    except OSError as eobj:
+        print('Sequencer file cache not available:', eobj)
+        for batch in _basename_batches(sources):
+            subprocess.check_call(['scp', '-p'] + batch + [dest_dir])
+        return [os.path.join(dest_dir, os.path.basename(split_source(_)[1]))
+                for _ in sources]
+
+    mtimes = source_mtimes(sources)
+    cached = {_: cache.lookup(_, mtimes[_]) for _ in sources}
+    missing = [_ for _ in sources if cached[_] is None]
+    if missing:
+        tmp_dir = tempfile.mkdtemp(dir=cache.cache_dir)
+        try:
+            # Each batch is fetched into its own subdirectory, so that
+            # files with the same name don't overwrite each other.
+            for i, batch in enumerate(_basename_batches(missing)):
+                batch_dir = os.path.join(tmp_dir, str(i))
+                os.mkdir(batch_dir)
+                command = ['scp', '-p'] + batch + [batch_dir]
+                print(' '.join(command))
+                subprocess.check_call(command)
+                for source in batch:
+                    filename = os.path.basename(split_source(source)[1])
+                    cached[source] = cache.add(
+                        source, mtimes[source],
+                        os.path.join(batch_dir, filename))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        cache.save()
+
+    staged = []
+    for source in sources:
+        dest = os.path.join(dest_dir,
+                            os.path.basename(split_source(source)[1]))
+        _link_or_copy(cached[source], dest)
+        staged.append(dest)
+    return staged
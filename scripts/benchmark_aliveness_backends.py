@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Script to compare the import time and per-frame processing time of
+the aliveness_utils backends.  Each backend is run in a separate
+python process with ALIVENESS_BACKEND set accordingly.
+"""
+import os
+import sys
+import json
+import time
+import subprocess
+import argparse
+
+
+def run_backend(backend, fits_files, nrepeat):
+    """
+    Time the import of aliveness_utils and the per-frame statistics
+    in the current process.  This is run in a subprocess for each
+    backend.
+    """
+    t0 = time.time()
+    import aliveness_utils
+    import_time = time.time() - t0
+    assert aliveness_utils.ALIVENESS_BACKEND == backend
+
+    timings = dict(open_ccd=[], get_read_noise=[],
+                   get_median_signal_levels=[])
+    for _ in range(nrepeat):
+        for fits_file in fits_files:
+            t0 = time.time()
+            ccd = aliveness_utils.open_ccd(fits_file)
+            timings['open_ccd'].append(time.time() - t0)
+
+            t0 = time.time()
+            aliveness_utils.get_read_noise(ccd)
+            timings['get_read_noise'].append(time.time() - t0)
+
+            t0 = time.time()
+            aliveness_utils.get_median_signal_levels(ccd,
+                                                     ccd.amp_geom.imaging)
+            aliveness_utils.get_median_signal_levels(
+                ccd, ccd.amp_geom.serial_overscan)
+            timings['get_median_signal_levels'].append(time.time() - t0)
+
+    t0 = time.time()
+    aliveness_utils.raft_channel_statuses(fits_files)
+    raft_time = time.time() - t0
+
+    per_frame = {key: sum(values)/len(values)
+                 for key, values in timings.items()}
+    return dict(backend=backend, import_time=import_time,
+                per_frame=per_frame, raft_channel_statuses=raft_time)
+
+
+def benchmark(backend, fits_files, nrepeat):
+    """
+    Run the benchmark for a backend in a fresh python process and
+    return the results, including the interpreter startup time.
+    """
+    env = dict(os.environ, ALIVENESS_BACKEND=backend)
+    command = [sys.executable, __file__, '--worker', backend,
+               '--nrepeat', str(nrepeat)] + fits_files
+    t0 = time.time()
+    output = subprocess.check_output(command, env=env)
+    startup_time = time.time() - t0
+    results = json.loads(output.decode().splitlines()[-1])
+    results['process_time'] = startup_time
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('fits_files', type=str, nargs='+',
+                        help='single CCD raw FITS files, one per slot, '
+                        'with paths of the form <slot>/<filename>')
+    parser.add_argument('--backends', type=str, nargs='+',
+                        default=['eotest', 'numpy'],
+                        help='aliveness_utils backends to compare')
+    parser.add_argument('--nrepeat', type=int, default=3,
+                        help='number of passes over the input files')
+    parser.add_argument('--worker', type=str, default=None,
+                        help=argparse.SUPPRESS)
+    parser.add_argument('--outfile', type=str, default=None,
+                        help='json file for the benchmark results')
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        print(json.dumps(run_backend(args.worker, args.fits_files,
+                                     args.nrepeat)))
+        sys.exit(0)
+
+    all_results = [benchmark(_, args.fits_files, args.nrepeat)
+                   for _ in args.backends]
+    for results in all_results:
+        print(results['backend'])
+        print('  process wall time:       %8.3f s' % results['process_time'])
+        print('  aliveness_utils import:  %8.3f s' % results['import_time'])
+        for key, value in results['per_frame'].items():
+            print('  %-24s %8.3f s/frame' % (key + ':', value))
+        print('  raft_channel_statuses:   %8.3f s'
+              % results['raft_channel_statuses'])
+    if args.outfile is not None:
+        with open(args.outfile, 'w') as fd:
+            json.dump(all_results, fd, indent=2)
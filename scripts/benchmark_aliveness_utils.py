@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+"""
+Benchmark suite for the aliveness_utils functions on synthetic raw
+frames with ITL and e2v geometries and injected bad channels.
+
+The synthetic datasets are written once to a work directory and each
+benchmark task is run in a separate python process so that its peak
+RSS can be measured.  The results are written to a json file that can
+be compared against a stored baseline to catch performance
+regressions, e.g.,
+
+  benchmark_aliveness_utils.py --outfile bench.json --baseline baseline.json
+
+exits with status 1 if any task is slower, or uses more memory, than
+the baseline by more than the specified tolerance.
+"""
+import os
+import sys
+import json
+import time
+import resource
+import subprocess
+import argparse
+import numpy as np
+import astropy.io.fits as fits
+
+# Amplifier geometries of the raw segments.
+GEOMETRIES = dict(ITL=dict(naxis1=576, naxis2=2048,
+                           datasec='[4:512,1:2000]',
+                           biassec='[513:576,1:2000]'),
+                  e2v=dict(naxis1=576, naxis2=2048,
+                           datasec='[11:522,1:2002]',
+                           biassec='[523:576,1:2002]'))
+
+CHANNEL_IDS = ['10', '11', '12', '13', '14', '15', '16', '17',
+               '07', '06', '05', '04', '03', '02', '01', '00']
+
+SLOTS = ['S%d%d' % (i, j) for i in range(3) for j in range(3)]
+
+DATASETS = dict(raft=2, focal_plane=21)
+
+TASKS = ['get_read_noise', 'get_median_signal_levels',
+         'raft_channel_statuses', 'compute_response_diffs']
+
+
+def write_synthetic_frame(outfile, geometry, exptime, bad_amps=(),
+                          bias_level=20000, flux=100., read_noise=6.,
+                          seed=None):
+    """
+    Write a synthetic single sensor raw frame with a uniform
+    illumination of flux ADU/s in the imaging region of each good amp.
+
+    Parameters
+    ----------
+    outfile : str
+        The output FITS file.
+    geometry : str
+        'ITL' or 'e2v'.
+    exptime : float
+        The exposure time in seconds.
+    bad_amps : list [()]
+        The amps with no signal.
+    bias_level : float [20000]
+        The bias level in ADU.
+    flux : float [100.]
+        The illumination in ADU/s.
+    read_noise : float [6.]
+        The read noise in ADU rms.
+    seed : int [None]
+        Random number seed.
+    """
+    geom = GEOMETRIES[geometry]
+    rng = np.random.default_rng(seed)
+    ny, nx = geom['naxis2'], geom['naxis1']
+    xmin, xmax = [int(_) for _ in geom['datasec'][1:-1].split(',')[0]
+                  .split(':')]
+    ymin, ymax = [int(_) for _ in geom['datasec'][1:-1].split(',')[1]
+                  .split(':')]
+    primary = fits.PrimaryHDU()
+    primary.header['EXPTIME'] = exptime
+    primary.header['DETSIZE'] = '[1:%d,1:%d]' % (8*(xmax - xmin + 1),
+                                                 2*(ymax - ymin + 1))
+    primary.header['LSST_NUM'] = '%s-SYNTH' % geometry
+    hdus = [primary]
+    for amp, channel in enumerate(CHANNEL_IDS, 1):
+        image = (bias_level + read_noise*rng.standard_normal((ny, nx),
+                                                              dtype=np.float32))
+        if amp not in bad_amps:
+            image[ymin - 1:ymax, xmin - 1:xmax] += flux*exptime
+        hdu = fits.ImageHDU(data=np.round(image).astype(np.int32))
+        hdu.header['EXTNAME'] = 'Segment%s' % channel
+        hdu.header['CHANNEL'] = amp
+        hdu.header['DATASEC'] = geom['datasec']
+        hdu.header['BIASSEC'] = geom['biassec']
+        hdus.append(hdu)
+    fits.HDUList(hdus).writeto(outfile, overwrite=True)
+
+
+def make_dataset(workdir, dataset, exptimes=(1, 2, 4), nbad=2, seed=1001):
+    """
+    Write the synthetic frames for a dataset, if they don't already
+    exist.  Each raft is given ITL or e2v geometry in turn.  The first
+    exposure is written for all CCDs, with nbad bad channels per CCD,
+    and the full exposure sequence is written for slot S00 of each
+    raft for compute_response_diffs.
+
+    Returns
+    -------
+    dict : The geometry of each raft folder, keyed by the raft folder.
+    """
+    rng = np.random.default_rng(seed)
+    rafts = dict()
+    for i in range(DATASETS[dataset]):
+        geometry = ('ITL', 'e2v')[i % 2]
+        raft = 'R%02d' % (i + 1)
+        raft_dir = os.path.join(workdir, dataset, raft)
+        rafts[raft_dir] = geometry
+        for slot in SLOTS:
+            os.makedirs(os.path.join(raft_dir, slot), exist_ok=True)
+            bad_amps = rng.permutation(range(1, 17))[:nbad]
+            seqnos = range(len(exptimes)) if slot == 'S00' else [0]
+            for seqno in seqnos:
+                outfile = os.path.join(raft_dir, slot, '%s_%s_flat_%03d.fits'
+                                       % (raft, slot, seqno))
+                if not os.path.isfile(outfile):
+                    write_synthetic_frame(outfile, geometry, exptimes[seqno],
+                                          bad_amps=bad_amps,
+                                          seed=rng.integers(2**31))
+    return rafts
+
+
+def raft_files(raft_dir, seqno=0):
+    "The <slot>/<filename> paths of a raft's frames for an exposure."
+    return [os.path.join(slot, _) for slot in SLOTS
+            for _ in sorted(os.listdir(os.path.join(raft_dir, slot)))
+            if _.endswith('_flat_%03d.fits' % seqno)]
+
+
+def run_task(task, raft_dirs):
+    """
+    Run a benchmark task over the raft folders in the current process
+    and return the elapsed time and peak RSS.  This is run in a
+    subprocess for each task.
+    """
+    import aliveness_utils
+    elapsed = 0
+    for raft_dir in raft_dirs:
+        os.chdir(raft_dir)
+        fits_files = raft_files(raft_dir)
+        t0 = time.time()
+        if task == 'get_read_noise':
+            for fits_file in fits_files:
+                aliveness_utils.get_read_noise(
+                    aliveness_utils.open_ccd(fits_file))
+        elif task == 'get_median_signal_levels':
+            for fits_file in fits_files:
+                ccd = aliveness_utils.open_ccd(fits_file)
+                aliveness_utils.get_median_signal_levels(
+                    ccd, ccd.amp_geom.imaging)
+                aliveness_utils.get_median_signal_levels(
+                    ccd, ccd.amp_geom.serial_overscan)
+        elif task == 'raft_channel_statuses':
+            aliveness_utils.raft_channel_statuses(fits_files)
+        elif task == 'compute_response_diffs':
+            frames = {'%03d' % i: os.path.join('S00', _) for i, _ in
+                      enumerate(sorted(os.listdir('S00')))}
+            aliveness_utils.compute_response_diffs(
+                frames, 'bench_eotest_results.fits')
+        else:
+            raise ValueError('Unknown task: %s' % task)
+        elapsed += time.time() - t0
+    # ru_maxrss is in kB on Linux.
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024.
+    return dict(time=elapsed, peak_rss_mb=peak_rss)
+
+
+def benchmark(task, raft_dirs):
+    """
+    Run a benchmark task in a fresh python process, bypassing the
+    result cache so that the computations are actually done.
+    """
+    env = dict(os.environ, ALIVENESS_RESULT_CACHE_BYPASS='1')
+    command = [sys.executable, os.path.abspath(__file__), '--worker', task] \
+        + raft_dirs
+    output = subprocess.check_output(command, env=env)
+    return json.loads(output.decode().splitlines()[-1])
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Compare benchmark results to a baseline and return a list of
+    descriptions of the regressions.
+    """
+    regressions = []
+    for key, values in results.items():
+        if key not in baseline:
+            continue
+        for quantity in ('time', 'peak_rss_mb'):
+            reference = baseline[key][quantity]
+            if values[quantity] > (1. + tolerance)*reference:
+                regressions.append('%s %s: %.3f vs baseline %.3f'
+                                   % (key, quantity, values[quantity],
+                                      reference))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('raft_dirs', type=str, nargs='*',
+                        help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', type=str, default='aliveness_bench',
+                        help='directory for the synthetic datasets')
+    parser.add_argument('--datasets', type=str, nargs='+', default=['raft'],
+                        choices=sorted(DATASETS),
+                        help='datasets to run.  The focal_plane dataset '
+                        'needs about 17 GB of disk space.')
+    parser.add_argument('--tasks', type=str, nargs='+', default=TASKS,
+                        choices=TASKS, help='benchmark tasks')
+    parser.add_argument('--outfile', type=str, default=None,
+                        help='json file for the benchmark results')
+    parser.add_argument('--baseline', type=str, default=None,
+                        help='json file of baseline results to compare to')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='fractional tolerance for regressions')
+    parser.add_argument('--worker', type=str, default=None,
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        print(json.dumps(run_task(args.worker, args.raft_dirs)))
+        sys.exit(0)
+
+    results = dict()
+    for dataset in args.datasets:
+        rafts = make_dataset(os.path.abspath(args.workdir), dataset)
+        for geometry in GEOMETRIES:
+            raft_dirs = [_ for _ in rafts if rafts[_] == geometry]
+            for task in args.tasks:
+                key = '/'.join((dataset, geometry, task))
+                results[key] = benchmark(task, raft_dirs)
+                print('%-50s %8.3f s  %8.1f MB' % (key, results[key]['time'],
+                                                   results[key]['peak_rss_mb']))
+                sys.stdout.flush()
+
+    output = dict(backend=os.environ.get('ALIVENESS_BACKEND', 'eotest'),
+                  results=results)
+    if args.outfile is not None:
+        with open(args.outfile, 'w') as fd:
+            json.dump(output, fd, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as fd:
+            baseline = json.load(fd)['results']
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for line in regressions:
+            print('Regression:', line)
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,80 @@
+"""
+Script to follow a BOT or TS8 job directory during acquisition and
+report the bad channels of each CCD frame as soon as it is written.
+"""
+import os
+import sys
+import time
+import argparse
+import logging
+from aliveness_monitor import AlivenessMonitor, FRAME_PATTERNS
+
+parser = argparse.ArgumentParser()
+parser.add_argument('job_dir', type=str,
+                    help='job directory containing the frame folders')
+parser.add_argument('--frame_pattern', type=str, nargs='+',
+                    default=FRAME_PATTERNS,
+                    help='glob patterns for the frame folder names')
+parser.add_argument('--interval', type=float, default=5.,
+                    help='polling interval in seconds')
+parser.add_argument('--max_idle', type=float, default=600.,
+                    help='exit after this many seconds without new files')
+parser.add_argument('--threshold_factor', type=float, default=0.1,
+                    help='bad channel threshold factor')
+parser.add_argument('--max_bad_channels', type=int, default=None,
+                    help='exit with status 1 if the number of bad channels '
+                    'in a frame exceeds this value')
+parser.add_argument('--bad_channel_file', type=str, default=None,
+                    help='file to write the running bad-channel table')
+parser.add_argument('--processes', type=int, default=None,
+                    help='number of pool processes')
+
+args = parser.parse_args()
+
+logging.basicConfig(format='%(asctime)s %(name)s: %(message)s',
+                    stream=sys.stdout)
+logger = logging.getLogger('monitor_aliveness.py')
+logger.setLevel(logging.INFO)
+
+
+def write_bad_channels(bad_channels, outfile):
+    "Write the bad channel table, replacing any existing file."
+    tmp_file = outfile + '.tmp'
+    with open(tmp_file, 'w') as output:
+        for row in bad_channels:
+            output.write('%s  %s  %s  %d  %.1f\n' % row)
+    os.replace(tmp_file, outfile)
+
+
+status = 0
+with AlivenessMonitor(args.job_dir, frame_pattern=args.frame_pattern,
+                      threshold_factor=args.threshold_factor,
+                      processes=args.processes) as monitor:
+    last_update = time.time()
+    while time.time() - last_update < args.max_idle or monitor.npending:
+        new_results = monitor.poll()
+        if not new_results:
+            time.sleep(args.interval)
+            continue
+        last_update = time.time()
+        for frame in sorted(set(_[0] for _ in new_results)):
+            table = monitor.channel_table(frame)
+            nbad = len(table.bad_channels())
+            logger.info('%s: %d CCDs analyzed, %d bad channels', frame,
+                        len(monitor.frames[frame]), nbad)
+            for det_name, (means, stdevs) \
+                    in monitor.overscan_stats(frame).items():
+                if (frame, det_name) in new_results:
+                    logger.info('  %s overscan mean: %.1f, stdev: %.2f',
+                                det_name, means.mean(), stdevs.mean())
+            if args.max_bad_channels is not None \
+               and nbad > args.max_bad_channels:
+                logger.info('%s has more than %d bad channels', frame,
+                            args.max_bad_channels)
+                status = 1
+        if args.bad_channel_file is not None:
+            write_bad_channels(monitor.bad_channels(), args.bad_channel_file)
+        if status != 0:
+            break
+
+sys.exit(status)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""
+Script to update and query a SQLite catalog of BOT or TS8 frame folders.
+"""
+import argparse
+from frame_catalog import FrameCatalog
+
+parser = argparse.ArgumentParser()
+parser.add_argument('db_file', type=str, help='catalog database file')
+parser.add_argument('--ingest', type=str, nargs='+', default=(),
+                    help='directories of frame folders to add or update')
+parser.add_argument('--frame_pattern', type=str, default='*_[0-9]*',
+                    help='glob pattern for the frame folder names')
+parser.add_argument('--det_name', type=str, default=None,
+                    help='detector name, e.g., R22_S11')
+parser.add_argument('--kind', type=str, default='fits',
+                    choices=('fits', 'pd', 'other'), help='kind of file')
+parser.add_argument('--run', type=str, default=None, help='run number')
+parser.add_argument('--imgtype', type=str, default=None,
+                    help='image type, e.g., FLAT')
+parser.add_argument('--testtype', type=str, default=None,
+                    help='test type, e.g., FLAT')
+parser.add_argument('--min_seqnum', type=int, default=None,
+                    help='minimum sequence number')
+parser.add_argument('--max_seqnum', type=int, default=None,
+                    help='maximum sequence number')
+parser.add_argument('--frames', action='store_true', default=False,
+                    help='list the frame folders rather than the files')
+
+args = parser.parse_args()
+
+# When updating the catalog, only list the query results if a
+# selection is given.
+selection = (args.det_name, args.run, args.imgtype, args.testtype,
+             args.min_seqnum, args.max_seqnum)
+list_results = (not args.ingest or args.frames
+                or any(_ is not None for _ in selection))
+
+with FrameCatalog(args.db_file) as catalog:
+    for data_dir in args.ingest:
+        nscanned = catalog.ingest(data_dir, pattern=args.frame_pattern)
+        print(f'{data_dir}: {nscanned} frame folders scanned')
+    if list_results and args.frames:
+        for frame in catalog.frames(run=args.run, imgtype=args.imgtype,
+                                    testtype=args.testtype,
+                                    min_seqnum=args.min_seqnum,
+                                    max_seqnum=args.max_seqnum):
+            print(frame['folder'], frame['seqnum'], frame['imgtype'],
+                  frame['testtype'], frame['exptime'])
+    elif list_results:
+        for path in catalog.files(det_name=args.det_name, kind=args.kind,
+                                  run=args.run, imgtype=args.imgtype,
+                                  testtype=args.testtype,
+                                  min_seqnum=args.min_seqnum,
+                                  max_seqnum=args.max_seqnum):
+            print(path)
@@ -0,0 +1,68 @@
+"""
+Test code for aliveness_monitor module.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from aliveness_monitor import AlivenessMonitor, FITS_BLOCK_SIZE
+
+
+def ccd_analysis(fits_file, border=10):
+    "Stand-in for ccd_aliveness_stats."
+    raft, slot = os.path.basename(fits_file)[:-len('.fits')].split('_')[-2:]
+    signal = 1 if slot == 'S00' else 1000
+    return dict(raft=raft, slot=slot, exptime=15,
+                signals={amp: signal for amp in range(1, 17)},
+                oscan_mean={amp: 0. for amp in range(1, 17)},
+                oscan_stdev={amp: 5. for amp in range(1, 17)})
+
+
+class AlivenessMonitorTestCase(unittest.TestCase):
+    "Test case class for the AlivenessMonitor class."
+    def setUp(self):
+        self.job_dir = tempfile.mkdtemp()
+        self.frame_dir = os.path.join(self.job_dir, 'dark_dark_000')
+        os.mkdir(self.frame_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.job_dir)
+
+    def write_file(self, det_name, nblocks):
+        "Write a FITS-like file of the specified size."
+        path = os.path.join(self.frame_dir, 'MC_C_001_%s.fits' % det_name)
+        with open(path, 'wb') as output:
+            output.write(b' '*nblocks*FITS_BLOCK_SIZE)
+        os.utime(path, (1e9, 1e9))
+        return path
+
+    def test_poll(self):
+        "Test that complete files are analyzed once."
+        monitor = AlivenessMonitor(self.job_dir, processes=0,
+                                   ccd_analysis=ccd_analysis)
+        self.write_file('R22_S00', 2)
+        self.write_file('R22_S01', 2)
+        # Files are analyzed only once their sizes are unchanged.
+        self.assertEqual(monitor.poll(), [])
+        self.write_file('R22_S01', 3)
+        self.assertEqual(monitor.poll(), [('dark_dark_000', 'R22_S00')])
+        self.assertEqual(monitor.poll(), [('dark_dark_000', 'R22_S01')])
+        self.assertEqual(monitor.poll(), [])
+
+        # Bias frames are not analyzed by default.
+        bias_dir = os.path.join(self.job_dir, 'dark_bias_000')
+        os.mkdir(bias_dir)
+        os.rename(self.write_file('R22_S02', 2),
+                  os.path.join(bias_dir, 'MC_C_000_R22_S02.fits'))
+        self.assertEqual(monitor.poll(), [])
+        self.assertEqual(monitor.poll(), [])
+
+        table = monitor.channel_table('dark_dark_000')
+        self.assertEqual(len(table), 32)
+        self.assertEqual(len(monitor.bad_channels()), 16)
+        self.assertEqual(set(_[2] for _ in monitor.bad_channels()), {'S00'})
+        monitor.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
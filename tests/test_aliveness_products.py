@@ -0,0 +1,72 @@
+"""
+Test code for aliveness_products module.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from aliveness_products import AnalysisProduct
+
+
+class AnalysisProductTestCase(unittest.TestCase):
+    "Test case class for the AnalysisProduct class."
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.input_file = os.path.join(self.tmp_dir, 'bias.fits')
+        with open(self.input_file, 'w') as fd:
+            fd.write('bias\n')
+        self.ncalls = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def compute(self, value):
+        "Stand-in for an analysis function."
+        self.ncalls += 1
+        return dict(read_noise=np.full(16, value),
+                    stats=dict(nframes=2))
+
+    def test_compute(self):
+        "Test that products are reused for unchanged inputs."
+        product = AnalysisProduct('R22_read_noise', [self.input_file],
+                                  outdir=self.tmp_dir)
+        self.assertFalse(product.is_current())
+        product.compute(self.compute, 5.)
+        self.assertTrue(product.is_current())
+        data = product.compute(self.compute, 5.)
+        self.assertEqual(self.ncalls, 1)
+        np.testing.assert_array_equal(data['read_noise'], np.full(16, 5.))
+        self.assertEqual(data['stats'], dict(nframes=2))
+
+        # Changing the parameters or the inputs invalidates the product.
+        product = AnalysisProduct('R22_read_noise', [self.input_file],
+                                  params=dict(border=10),
+                                  outdir=self.tmp_dir)
+        self.assertFalse(product.is_current())
+        product.compute(self.compute, 5.)
+        os.utime(self.input_file, ns=(0, 10**9))
+        product = AnalysisProduct('R22_read_noise', [self.input_file],
+                                  params=dict(border=10),
+                                  outdir=self.tmp_dir)
+        self.assertFalse(product.is_current())
+
+    def test_needs_plot(self):
+        "Test the needs_plot method."
+        product = AnalysisProduct('R22_read_noise', [self.input_file],
+                                  outdir=self.tmp_dir)
+        product.save(read_noise=np.zeros(16))
+        png_file = os.path.join(self.tmp_dir, 'R22_read_noise.png')
+        self.assertTrue(product.needs_plot(png_file))
+        with open(png_file, 'w') as fd:
+            fd.write('png\n')
+        os.utime(product.path, ns=(0, 10**9))
+        self.assertFalse(product.needs_plot(png_file))
+        reader = AnalysisProduct('R22_read_noise', None, outdir=self.tmp_dir)
+        self.assertFalse(reader.is_current())
+        np.testing.assert_array_equal(reader.load()['read_noise'],
+                                      np.zeros(16))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,11 +4,14 @@ Test code for aliveness_utils module.
 import os
 import unittest
 import itertools
+import numpy as np
 from numpy.random import permutation
 import astropy.io.fits as fits
 import lsst.eotest.sensor as sensorTest
 from lsst.eotest.sensor.sim_tools import simulateFlat
 import aliveness_utils
+import aliveness_eotest
+import aliveness_numpy
 
 class AlivenessUtilsTestCase(unittest.TestCase):
     "Test case class for aliveness test utilities"
@@ -98,5 +101,149 @@ class AlivenessUtilsTestCase(unittest.TestCase):
                            if x == 'bad'])
             self.assertEqual(num_bad, self.nbad[slot])
 
+    def test_focal_plane_channel_statuses(self):
+        "Test the focal_plane_channel_statuses function."
+        self.make_raft_files()
+        frame_dir = 'temp_frame'
+        os.mkdir(frame_dir)
+        fp_files = []
+        for slot, raft_file in zip(self.slots, self.raft_files):
+            fp_files.append(os.path.join(frame_dir,
+                                         'frame_R22_%s.fits' % slot))
+            os.rename(raft_file, fp_files[-1])
+        try:
+            table = aliveness_utils.focal_plane_channel_statuses(
+                frame_dir, processes=2)
+            self.assertEqual(table.exptime, 1)
+            self.assertEqual(table.rafts, ['R22'])
+            self.assertEqual(len(table), 16*len(self.slots))
+            for slot in self.slots:
+                self.assertEqual(len(table.select(slot=slot).bad_channels()),
+                                 self.nbad[slot])
+        finally:
+            for item in fp_files:
+                os.remove(item)
+            os.rmdir(frame_dir)
+
+    def test_clipped_stdev(self):
+        "Test the clipped_stdev function against outlier contamination."
+        sigmas = np.array([2., 5., 10.])
+        pixels = np.random.normal(1000., sigmas[:, None], size=(3, 20000))
+        pixels[:, :50] = 1e5
+        stdevs = aliveness_utils.clipped_stdev(pixels)
+        np.testing.assert_allclose(stdevs, sigmas, rtol=0.05)
+
+    def test_overscan_correlation_matrix(self):
+        """
+        Test the matrix-product overscan correlations against pairwise
+        np.corrcoef, as used by raft_level_oscan_correlations.
+        """
+        np.random.seed(1001)
+        common = np.random.normal(size=(1, 2000))
+        pixels = (np.random.normal(size=(20, 2000))
+                  + np.linspace(0, 1, 20)[:, None]*common + 1000.)
+        expected = np.array([[np.corrcoef(x, y)[0, 1] for y in pixels]
+                             for x in pixels])
+        stack = pixels - pixels.mean(axis=1)[:, None]
+        for chunk_size in (None, 300):
+            corr = aliveness_utils.overscan_correlation_matrix(
+                stack, chunk_size=chunk_size)
+            np.testing.assert_allclose(corr, expected, atol=1e-4)
+
+        bias_files = {'S00': self.bias_file, 'S01': self.flat_file}
+        channels, corr \
+            = aliveness_utils.raft_overscan_correlations(bias_files)
+        self.assertEqual(len(channels), 32)
+        self.assertEqual(corr.shape, (32, 32))
+        amps, oscans = aliveness_utils.get_serial_overscans(self.bias_file,
+                                                            border=10)
+        self.assertAlmostEqual(
+            corr[0, 1], np.corrcoef(oscans[0].ravel(),
+                                    oscans[1].ravel())[0, 1], places=4)
+
+    def test_ccd_serial_overscans(self):
+        """
+        Test that an opened CCD can be reused for the serial overscans,
+        i.e., that its bounding box isn't trimmed in place.
+        """
+        for backend, ccd in ((aliveness_eotest,
+                              sensorTest.MaskedCCD(self.bias_file)),
+                             (aliveness_numpy,
+                              aliveness_numpy.RawCCD(self.bias_file))):
+            _, oscans0 = backend.get_ccd_serial_overscans(ccd, border=10)
+            _, oscans1 = backend.get_ccd_serial_overscans(ccd, border=10)
+            np.testing.assert_array_equal(oscans0, oscans1)
+
+    def test_ccd_correlated_noise(self):
+        """
+        Test the stacked-bias correlated noise estimator against the
+        pairwise correlations of the differenced overscans.
+        """
+        bias_files = [self.bias_file, self.flat_file]
+        results = aliveness_utils.ccd_correlated_noise(bias_files)
+        self.assertEqual(results['corr'].shape, (16, 16))
+        np.testing.assert_allclose(np.diag(results['corr']), 1.)
+        amps, oscans0 = aliveness_utils.get_serial_overscans(bias_files[0],
+                                                             border=10)
+        _, oscans1 = aliveness_utils.get_serial_overscans(bias_files[1],
+                                                          border=10)
+        diffs = (np.asarray(oscans0, dtype=float)
+                 - np.asarray(oscans1, dtype=float)).reshape(len(amps), -1)
+        self.assertAlmostEqual(results['corr'][0, 5],
+                               np.corrcoef(diffs[0], diffs[5])[0, 1])
+        np.testing.assert_allclose(results['noise'],
+                                   np.std(diffs, axis=1, ddof=1)/np.sqrt(2))
+
+    def test_mapped_image(self):
+        """
+        Test that memory-mapped amp data match the decoded data,
+        including BZERO scaling of unsigned 16-bit images.
+        """
+        raw = aliveness_numpy.RawCCD(self.flat_file)
+        decoded = aliveness_numpy.read_amp_data(self.flat_file)
+        self.assertIsInstance(raw[1], aliveness_numpy.MappedImage)
+        bbox = raw.amp_geom.serial_overscan
+        for amp in raw:
+            np.testing.assert_array_equal(raw[amp][bbox.slices],
+                                          decoded[amp - 1][bbox.slices])
+
+        uint16_file = 'temp_uint16.fits'
+        data = np.arange(200, dtype=np.uint16).reshape(10, 20) + 40000
+        fits.HDUList([fits.PrimaryHDU(), fits.ImageHDU(data=data)])\
+            .writeto(uint16_file, overwrite=True)
+        try:
+            with fits.open(uint16_file) as hdus:
+                image = aliveness_numpy.map_amp_data(uint16_file, hdus)[0]
+            np.testing.assert_array_equal(image[2:5, 3:7], data[2:5, 3:7])
+            np.testing.assert_array_equal(np.asarray(image), data)
+        finally:
+            os.remove(uint16_file)
+
+    def test_numpy_backend(self):
+        """
+        Test that the numpy backend reproduces the eotest backend
+        signal levels and geometry.
+        """
+        flat = sensorTest.MaskedCCD(self.flat_file)
+        raw = aliveness_numpy.RawCCD(self.flat_file)
+        self.assertEqual(list(raw), list(flat))
+        self.assertEqual(raw.amp_geom.imaging.xmin,
+                         flat.amp_geom.imaging.getMinX())
+        self.assertEqual(raw.amp_geom.imaging.width,
+                         flat.amp_geom.imaging.getWidth())
+        self.assertEqual(raw.amp_geom.imaging.height,
+                         flat.amp_geom.imaging.getHeight())
+        imaging_signals = aliveness_numpy.get_median_signal_levels(
+            raw, raw.amp_geom.imaging)
+        oscan_signals = aliveness_numpy.get_median_signal_levels(
+            raw, raw.amp_geom.serial_overscan)
+        mean_signals = aliveness_numpy.get_mean_image_adu(raw)
+        for amp in raw:
+            signal = imaging_signals[amp] - oscan_signals[amp]
+            self.assertGreater(signal, 0.9*self.nominal_signal)
+            self.assertLess(signal, 1.1*self.nominal_signal)
+            self.assertGreater(mean_signals[amp], 0.9*self.nominal_signal)
+            self.assertLess(mean_signals[amp], 1.1*self.nominal_signal)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,85 @@
+"""
+Test code for bot_acq_recovery module.
+"""
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import bot_acq_recovery
+from cached_fs import CachedFS
+
+
+class BotAcqRecoveryTestCase(unittest.TestCase):
+    "Test case class for the bot_acq_recovery functions."
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.tmp_dir, 'data')
+        self.acqs_dir = os.path.join(self.tmp_dir, 'BOT_acq', 'v0')
+        os.makedirs(self.data_dir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp_dir)
+
+    def make_frame(self, frame, det_names=('R22_S11', 'R22_S12')):
+        "Make a frame folder with empty FITS files."
+        frame_dir = os.path.join(self.data_dir, frame)
+        os.mkdir(frame_dir)
+        for det_name in det_names:
+            open(os.path.join(frame_dir, f'{frame}_{det_name}.fits'),
+                 'w').close()
+        return frame_dir
+
+    def test_index_attempt_dirs(self):
+        "Test that newer attempts take precedence in numerical order."
+        for job_id, seqnums in (('99', (0, 1)), ('100', (1, 2))):
+            attempt_dir = os.path.join(self.acqs_dir, job_id)
+            os.makedirs(attempt_dir)
+            open(os.path.join(attempt_dir, 'bot_eo_acq.cfg'), 'w').close()
+            open(os.path.join(attempt_dir, 'notes.txt'), 'w').close()
+            for seqnum in seqnums:
+                frame_dir = self.make_frame(f'MC_C_{job_id}_{seqnum:06d}')
+                os.symlink(frame_dir, os.path.join(attempt_dir,
+                                                   f'flat_{seqnum:03d}'))
+        index = bot_acq_recovery.index_attempt_dirs(self.acqs_dir)
+        self.assertEqual(sorted(index), ['bot_eo_acq.cfg', 'flat_000',
+                                         'flat_001', 'flat_002'])
+        self.assertEqual(index['flat_000'],
+                         os.path.join(self.acqs_dir, '99', 'flat_000'))
+        self.assertEqual(index['flat_001'],
+                         os.path.join(self.acqs_dir, '100', 'flat_001'))
+        self.assertEqual(index['bot_eo_acq.cfg'],
+                         os.path.join(self.acqs_dir, '100', 'bot_eo_acq.cfg'))
+        self.assertEqual(bot_acq_recovery.index_attempt_dirs(
+            os.path.join(self.tmp_dir, 'missing')), dict())
+
+    def test_bad_frame_folders(self):
+        "Test the substring matching of the bad frame entries."
+        job_dir = os.path.join(self.tmp_dir, 'job')
+        os.mkdir(job_dir)
+        os.chdir(job_dir)
+        for seqnum in range(4):
+            frame_dir = self.make_frame(f'MC_C_20210101_{seqnum:06d}')
+            os.symlink(frame_dir, f'flat_{seqnum:03d}')
+        # A detector-specific entry matches its frame folder, and
+        # entries may contain glob characters.
+        bad_frames = ['MC_C_20210101_000001', '', '20210101_000003_R22_S12',
+                      'MC_C_20210101_000009', 'MC_C_*_00000[1]_R22',
+                      'MC_C_*_00000[5]']
+        output = io.StringIO()
+        with mock.patch('sys.stdout', output):
+            folders = bot_acq_recovery.bad_frame_folders('.', bad_frames,
+                                                         fs=CachedFS())
+        self.assertEqual(folders, ['./flat_001', './flat_003'])
+        self.assertIn('MC_C_20210101_000009', output.getvalue())
+        self.assertIn('MC_C_*_00000[5]', output.getvalue())
+        self.assertNotIn('MC_C_20210101_000001', output.getvalue())
+        self.assertNotIn('MC_C_*_00000[1]_R22', output.getvalue())
+        self.assertEqual(bot_acq_recovery.bad_frame_folders('.', ['']), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
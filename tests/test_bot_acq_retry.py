@@ -0,0 +1,119 @@
+"""
+Test code for bot_acq_retry module.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import bot_acq_retry
+
+PLAN_FILE = 'bot_acq_retry_plan.json'
+
+
+class BotAcqRetryTestCase(unittest.TestCase):
+    "Test case class for the bot_acq_retry functions."
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.tmp_dir, 'data')
+        self.job_dir = os.path.join(self.tmp_dir, 'BOT_acq', 'v0')
+        os.makedirs(self.data_dir)
+        # Two previous attempts: the first took frames 0-5 except 2,
+        # the second took frames 0, 1, 3 and 6-7, missing 4 and 5.
+        self.make_attempt('100', [0, 1, 3, 4, 5])
+        self.make_attempt('101', [0, 1, 3, 6, 7])
+        os.makedirs(os.path.join(self.job_dir, '102'))
+        os.chdir(os.path.join(self.job_dir, '102'))
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp_dir)
+
+    def make_attempt(self, job_id, seqnums):
+        "Make an attempt directory with exposure symlinks."
+        attempt_dir = os.path.join(self.job_dir, job_id)
+        os.makedirs(attempt_dir)
+        for seqnum in seqnums:
+            frame_dir = os.path.join(self.data_dir,
+                                     'MC_C_{}_{:06d}'.format(job_id, seqnum))
+            os.mkdir(frame_dir)
+            os.symlink(frame_dir, os.path.join(attempt_dir,
+                                               'flat_{:03d}'.format(seqnum)))
+
+    def test_retry_plan(self):
+        "Test that the plan covers the gaps across all attempts."
+        plan = bot_acq_retry.RetryPlan.create()
+        self.assertEqual([(_['skip'], _['limit']) for _ in plan.segments],
+                         [(2, 1), (8, None)])
+        self.assertEqual(plan.gaps(), plan.segments[:1])
+        self.assertTrue(os.path.isfile(PLAN_FILE))
+        # The most recent attempt takes precedence.
+        self.assertEqual(os.path.basename(os.readlink('flat_003')),
+                         'MC_C_101_000003')
+        self.assertEqual(os.path.basename(os.readlink('flat_004')),
+                         'MC_C_100_000004')
+        # Frames symlinked in the current directory are included when
+        # the plan is rebuilt.
+        os.symlink(os.path.join(self.data_dir, 'MC_C_101_000000'), 'flat_002')
+        plan = bot_acq_retry.RetryPlan.create()
+        self.assertEqual(plan.pending(), [dict(skip=8, limit=None,
+                                               done=False)])
+
+    def test_prior_plan(self):
+        "Test that the plan is rebuilt from the symlinks, not prior plans."
+        # Attempt 101 recorded frame 2 as retaken, but there is no
+        # symlink for it.
+        plan = bot_acq_retry.RetryPlan([dict(skip=2, limit=1, done=True),
+                                        dict(skip=6, limit=None, done=False)],
+                                       plan_file='../101/' + PLAN_FILE)
+        plan.save()
+        plan.plan_file = PLAN_FILE
+        plan.save()
+        plan = bot_acq_retry.RetryPlan.create()
+        self.assertEqual(plan.plan_file, PLAN_FILE)
+        self.assertEqual(plan.pending(), [dict(skip=2, limit=1, done=False),
+                                          dict(skip=8, limit=None,
+                                               done=False)])
+        self.assertEqual(bot_acq_retry.RetryPlan.read(PLAN_FILE).segments,
+                         plan.segments)
+
+    def test_segment_taken(self):
+        "Test the checks of the frames taken for each segment."
+        taken = bot_acq_retry.RetryPlan.segment_taken
+        gap = dict(skip=2, limit=2, done=False)
+        self.assertTrue(taken(gap, [0, 2, 3]))
+        self.assertFalse(taken(gap, [0, 1, 2, 4]))
+        final = dict(skip=3, limit=None, done=False)
+        self.assertTrue(taken(final, range(6), total_frames=6))
+        self.assertFalse(taken(final, range(5), total_frames=6))
+        self.assertTrue(taken(final, range(4)))
+        self.assertFalse(taken(final, range(3)))
+        self.assertFalse(taken(final, [0, 1, 2, 4]))
+
+    def test_copy_exposure_symlinks(self):
+        "Test the numerical ordering of attempts and the returned summary."
+        # Attempt 99 is older than 100 and 101, even though it sorts
+        # after them lexically.
+        self.make_attempt('99', [3, 8])
+        self.assertEqual(bot_acq_retry.prior_attempt_dirs(),
+                         ['../101', '../100', '../99'])
+        os.symlink(os.path.join(self.data_dir, 'MC_C_101_000000'), 'flat_000')
+        symlinks = bot_acq_retry.copy_exposure_symlinks()
+        self.assertEqual(symlinks.next_seqnum, 9)
+        self.assertEqual(symlinks.missing_seqnums, [2])
+        self.assertEqual(symlinks.links_created, 7)
+        self.assertEqual(os.path.basename(os.readlink('flat_003')),
+                         'MC_C_101_000003')
+        self.assertEqual(os.path.basename(os.readlink('flat_008')),
+                         'MC_C_99_000008')
+
+    def test_seqnum_ranges(self):
+        "Test the missing_seqnums and seqnum_ranges functions."
+        missing = bot_acq_retry.missing_seqnums([0, 3, 4, 7, 9])
+        self.assertEqual(missing, [1, 2, 5, 6, 8])
+        self.assertEqual(bot_acq_retry.seqnum_ranges(missing),
+                         [(1, 2), (5, 2), (8, 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
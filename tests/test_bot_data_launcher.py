@@ -0,0 +1,132 @@
+"""
+Test code for bot_data_launcher module.
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+import unittest
+from unittest import mock
+import bot_data_launcher
+
+
+class BotDataLauncherTestCase(unittest.TestCase):
+    "Test case class for the BotDataLauncher."
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp_dir = tempfile.mkdtemp()
+        os.chdir(self.tmp_dir)
+        # A frame symlink from a previous attempt.
+        os.symlink(self.tmp_dir, 'flat_000')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp_dir)
+
+    def test_run(self):
+        "Test the frame tracking and progress file."
+        command = ('for i in 1 2 3; do ln -s {} flat_00$i; sleep 0.1; done'
+                   .format(self.tmp_dir))
+        hook_frames = []
+        launcher = bot_data_launcher.BotDataLauncher(
+            command, expected_frames=4, hooks=[hook_frames.append],
+            poll_interval=0.05)
+        frames = launcher.run()
+        self.assertEqual(frames, ['./flat_001', './flat_002', './flat_003'])
+        self.assertEqual(hook_frames, frames)
+        with open('bot_data_progress.json') as fd:
+            progress = json.load(fd)
+        self.assertEqual(progress['status'], 'finished')
+        self.assertEqual(progress['returncode'], 0)
+        self.assertEqual(progress['frames'], 3)
+        self.assertGreater(progress['frames_per_hour'], 0)
+        self.assertGreater(progress['mean_gap'], 0)
+        self.assertGreater(progress['eta'], 0)
+
+    def test_failure(self):
+        "Test that a non-zero exit status raises CalledProcessError."
+        with self.assertRaises(subprocess.CalledProcessError):
+            bot_data_launcher.run_bot_data('exit 3', poll_interval=0.05)
+        with open('bot_data_progress.json') as fd:
+            progress = json.load(fd)
+        self.assertEqual(progress['status'], 'failed')
+        self.assertEqual(progress['returncode'], 3)
+
+    def test_stderr(self):
+        "Test that stderr is streamed separately from stdout."
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with mock.patch.object(sys, 'stdout', stdout), \
+                mock.patch.object(sys, 'stderr', stderr):
+            bot_data_launcher.run_bot_data('echo out; echo oops 1>&2',
+                                           poll_interval=0.05)
+        # The command itself is echoed to stdout first.
+        self.assertEqual(stdout.getvalue().splitlines()[1:], ['out'])
+        self.assertEqual(stderr.getvalue(), 'oops\n')
+
+    def test_interrupt(self):
+        "Test that an interrupt kills the whole process group."
+        command = ('sleep 30 & echo $! > sleep.pid; ln -s {} flat_001; wait'
+                   .format(self.tmp_dir))
+
+        def hook(frame):
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            bot_data_launcher.run_bot_data(command, hooks=[hook],
+                                           poll_interval=0.05)
+        with open('sleep.pid') as fd:
+            pid = int(fd.read())
+        # The orphaned sleep process is reaped by init.
+        for _ in range(50):
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                break
+            time.sleep(0.1)
+        else:
+            self.fail('sleep process was not killed')
+
+    def test_count_cfg_frames(self):
+        "Test the frame count estimate from an acquisition cfg file."
+        cfg_file = 'acq.cfg'
+        with open(cfg_file, 'w') as fd:
+            fd.write("""[ACQUIRE]
+bias=1
+dark=1
+sflat=1
+flat=1
+
+[BIAS]
+COUNT=20        # number of bias frames
+
+[DARK]
+BCOUNT=    5    # number of bias frames per dark set
+dark=300.0   5    # integration time and image count for dark set
+
+[SFLAT]
+BCOUNT=   10    # number of bias frames per superflat set
+sflat=r  1000   25  4,   # wavelength filter, signal(e-), count, ND filter#
+      r  50000  10  1    # wavelength filter, signal(e-), count, ND filter#
+
+[FLAT]
+BCOUNT=1        # number of bias frames per flat image
+flat=      100   ND_OD0.5,  # signal level desired, in e-/pixel, ND filter #
+          1000   ND_OD0.4
+""")
+        self.assertEqual(bot_data_launcher.count_cfg_frames(cfg_file),
+                         20 + (5 + 5) + (10 + 25 + 10 + 10) + 2*(1 + 2))
+        # The scan and ppump acquisition types of the sim cfg aren't
+        # counted.
+        sim_cfg = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               '..', 'config', 'BOT_acq_sim.cfg')
+        self.assertEqual(bot_data_launcher.count_cfg_frames(sim_cfg),
+                         20 + 10 + 10 + 12 + 55 + 14 + 15)
+        self.assertIsNone(bot_data_launcher.count_cfg_frames('missing.cfg'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Test code for cached_fs module.
+"""
+import os
+import glob
+import shutil
+import tempfile
+import unittest
+from cached_fs import CachedFS
+
+
+class CachedFSTestCase(unittest.TestCase):
+    "Test case class for the CachedFS class."
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp_dir = tempfile.mkdtemp()
+        data_dir = os.path.join(self.tmp_dir, 'data')
+        job_dir = os.path.join(self.tmp_dir, 'job')
+        os.mkdir(job_dir)
+        for seqnum in range(3):
+            frame = 'MC_C_20210101_{:06d}'.format(seqnum)
+            os.makedirs(os.path.join(data_dir, frame))
+            for det_name in ('R22_S11', 'R22_S12'):
+                filename = '{}_{}.fits'.format(frame, det_name)
+                with open(os.path.join(data_dir, frame, filename), 'w') as fd:
+                    fd.write(' '*2880)
+            os.symlink(os.path.join(data_dir, frame),
+                       os.path.join(job_dir, 'flat_{:03d}'.format(seqnum)))
+        open(os.path.join(job_dir, '.hidden'), 'w').close()
+        os.chdir(job_dir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp_dir)
+
+    def test_glob(self):
+        "Test that the cached glob matches glob.glob."
+        fs = CachedFS()
+        for pattern in ('*', '*/*_R22_S11.fits', 'flat_001/*', '.*',
+                        'flat_000/MC_C_20210101_000000_R22_S12.fits',
+                        'missing/*'):
+            self.assertEqual(fs.glob(pattern), sorted(glob.glob(pattern)))
+
+    def test_stat_and_invalidate(self):
+        "Test the cached stat results and their invalidation."
+        fs = CachedFS()
+        path = 'flat_000/MC_C_20210101_000000_R22_S11.fits'
+        self.assertEqual(fs.getsize(path), 2880)
+        self.assertTrue(fs.islink('flat_000'))
+        self.assertTrue(fs.isdir('flat_000'))
+        self.assertFalse(fs.exists('flat_003'))
+        with open(path, 'a') as fd:
+            fd.write(' '*2880)
+        os.symlink('flat_000', 'flat_003')
+        # The cached results are used until they are invalidated.
+        self.assertEqual(fs.getsize(path), 2880)
+        self.assertFalse(fs.exists('flat_003'))
+        fs.invalidate(path)
+        fs.invalidate('flat_003')
+        self.assertEqual(fs.getsize(path), 5760)
+        self.assertTrue(fs.exists('flat_003'))
+        self.assertIn('flat_003', fs.listdir('.'))
+        with self.assertRaises(FileNotFoundError):
+            fs.stat('flat_004')
+
+    def test_discard(self):
+        "Test that discarded files are dropped from the cache."
+        fs = CachedFS()
+        paths = fs.glob('flat_000/*.fits')
+        fs.prefetch(paths)
+        self.assertEqual(len(fs._stat), 2)
+        fs.discard(paths)
+        self.assertFalse(any(_.endswith('.fits') for cache in
+                             (fs._lstat, fs._stat, fs._realpath)
+                             for _ in cache))
+        self.assertNotIn(os.path.abspath('flat_000'), fs._listdir)
+        self.assertEqual(fs.getsize(paths[0]), 2880)
+
+
+if __name__ == '__main__':
+    unittest.main()
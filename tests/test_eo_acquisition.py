@@ -58,6 +58,29 @@ class EOAcquisitionTestCase(unittest.TestCase):
         self.assertEqual(acq.test_type, test_type)
         self.assertRaises(NotImplementedError, acq.run)
 
+    def test_sequencer_param_verification(self):
+        "Test the caching of the sequencer parameter verification."
+        metadata = AcqMetadata(cwd='.', raft_id="my_raft", run_number="my_run")
+        subsystems = dict(ts8="ts8-proxy", pd='subsystem-proxy',
+                          mono='subsystem-proxy', rebps='subsystem-proxy')
+        acq = EOAcquisition("seqfile.txt", acq_config_file, "FLAT", metadata,
+                            subsystems, self.ccd_names)
+        verifications = []
+        acq.verify_sequencer_params = lambda: verifications.append(1)
+        for _ in range(5):
+            acq.check_sequencer_params()
+        self.assertEqual(len(verifications), 1)
+        # Reloading the sequencer forces a new verification.
+        acq.sub.ts8.synchCommand(90, "loadSequencer", "seqfile.txt")
+        acq.check_sequencer_params()
+        acq.check_sequencer_params()
+        self.assertEqual(len(verifications), 2)
+        # Re-verify every 3 frames.
+        acq.seq_verify_interval = 3
+        for _ in range(6):
+            acq.check_sequencer_params()
+        self.assertEqual(len(verifications), 4)
+
     def test_constructor(self):
         "Test the EOAcquisition construction."
         metadata = AcqMetadata(cwd='.', raft_id="my_raft", run_number="my_run")
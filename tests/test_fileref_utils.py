@@ -0,0 +1,80 @@
+"""
+Test code for fileref_utils module.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import lcatr.schema
+from fileref_utils import make_filerefs
+from cached_fs import get_cached_fs
+
+
+class MakeFilerefsTestCase(unittest.TestCase):
+    "Test case class for the make_filerefs function."
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.tmp_dir, 'data')
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        # Two attempt directories with symlinks to the same frames.
+        self.job_dirs = [os.path.join(self.tmp_dir, _) for _ in ('100', '101')]
+        for job_dir in self.job_dirs:
+            os.mkdir(job_dir)
+        self.paths = []
+        for seqnum in range(2):
+            frame = 'MC_C_20210101_{:06d}'.format(seqnum)
+            os.makedirs(os.path.join(self.data_dir, frame))
+            folder = 'flat_{:03d}'.format(seqnum)
+            for det_name in ('R22_S11', 'R22_S12'):
+                filename = '{}_{}.fits'.format(frame, det_name)
+                with open(os.path.join(self.data_dir, frame, filename),
+                          'w') as fd:
+                    fd.write(det_name*360)
+                self.paths.append(os.path.join(folder, filename))
+            for job_dir in self.job_dirs:
+                os.symlink(os.path.join(self.data_dir, frame),
+                           os.path.join(job_dir, folder))
+        os.chdir(self.job_dirs[0])
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp_dir)
+
+    def test_round_trip(self):
+        """
+        Test that cached records match those made by
+        lcatr.schema.fileref.make, and that they are reused.
+        """
+        expected = [lcatr.schema.fileref.make(_) for _ in self.paths]
+        self.assertEqual(list(make_filerefs(self.paths,
+                                            cache_dir=self.cache_dir)),
+                         expected)
+        # Nothing is written into the job directory or the frame
+        # folders, and the CachedFS entries for the files are dropped.
+        self.assertEqual(os.listdir(self.cache_dir), ['filerefs.db'])
+        self.assertFalse(any(_.endswith('.fits') for _
+                             in get_cached_fs()._stat))
+        self.assertEqual(sorted(os.listdir('.')), ['flat_000', 'flat_001'])
+        for folder in os.listdir(self.data_dir):
+            self.assertEqual(len(os.listdir(os.path.join(self.data_dir,
+                                                         folder))), 2)
+
+        # The cached records are reused in the next attempt directory.
+        os.chdir(self.job_dirs[1])
+        with mock.patch('lcatr.schema.fileref.make') as make:
+            self.assertEqual(list(make_filerefs(self.paths,
+                                                cache_dir=self.cache_dir)),
+                             expected)
+            make.assert_not_called()
+
+        # The same files given by other paths get their own records.
+        abspaths = [os.path.abspath(_) for _ in self.paths]
+        self.assertEqual(list(make_filerefs(abspaths, chunk_size=3,
+                                            cache_dir=self.cache_dir)),
+                         [lcatr.schema.fileref.make(_) for _ in abspaths])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Test code for frame_cache module.
+"""
+import io
+import os
+import time
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from frame_cache import FrameCache
+
+
+class FrameCacheTestCase(unittest.TestCase):
+    "Test case class for the FrameCache class."
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        self.files = []
+        for i in range(3):
+            self.files.append(os.path.join(self.tmp_dir, 'frame_%d.fits' % i))
+            with open(self.files[-1], 'w') as fd:
+                fd.write('%d\n' % i)
+        self.nloads = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def loader(self, fits_file):
+        "Stand-in for decoding a FITS file."
+        self.nloads += 1
+        value = int(open(fits_file).read())
+        return np.full((2, 10, 10), value, dtype=np.float32)
+
+    def test_lru_eviction(self):
+        "Test cache hits, misses, and LRU eviction."
+        # The size of a cache entry, including the .npy header.
+        buffer = io.BytesIO()
+        np.save(buffer, self.loader(self.files[0]))
+        nbytes = len(buffer.getvalue())
+        self.nloads = 0
+        cache = FrameCache(self.cache_dir, 2*nbytes)
+        for fits_file in self.files[:2]:
+            cache.get(fits_file, self.loader)
+            time.sleep(0.01)
+        self.assertEqual(self.nloads, 2)
+        data = cache.get(self.files[0], self.loader)
+        self.assertEqual(self.nloads, 2)
+        self.assertEqual(data[0, 0, 0], 0)
+        time.sleep(0.01)
+
+        # Adding a third entry should evict files[1], which is now the
+        # least recently used.
+        cache.get(self.files[2], self.loader)
+        self.assertEqual(cache.nbytes, 2*nbytes)
+        cache.get(self.files[0], self.loader)
+        self.assertEqual(self.nloads, 3)
+        cache.get(self.files[1], self.loader)
+        self.assertEqual(self.nloads, 4)
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(cache.misses, 4)
+
+    def test_modified_file(self):
+        "Test that a modified file is re-decoded."
+        cache = FrameCache(self.cache_dir, 10**6)
+        cache.get(self.files[0], self.loader)
+        with open(self.files[0], 'w') as fd:
+            fd.write('10\n')
+        os.utime(self.files[0], ns=(0, 10**9))
+        data = cache.get(self.files[0], self.loader)
+        self.assertEqual(self.nloads, 2)
+        self.assertEqual(data[0, 0, 0], 10)
+        cache.clear()
+        self.assertFalse(os.path.isdir(self.cache_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Test code for frame_catalog module.
+"""
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from frame_catalog import FrameCatalog
+
+
+class FrameCatalogTestCase(unittest.TestCase):
+    "Test case class for the FrameCatalog."
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.tmp_dir, '20210101')
+        for seqnum, imgtype in ((1, 'BIAS'), (2, 'FLAT'), (3, 'FLAT')):
+            self.make_frame(seqnum, imgtype)
+        self.db_file = os.path.join(self.tmp_dir, 'catalog.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def make_frame(self, seqnum, imgtype):
+        "Make a frame folder with an _index.json file."
+        name = 'MC_C_20210101_{:06d}'.format(seqnum)
+        folder = os.path.join(self.data_dir, name)
+        os.makedirs(folder)
+        index = {'__COMMON__': dict(RUNNUM='12345', IMGTYPE=imgtype,
+                                    TESTTYPE='FLAT', EXPTIME=1.0,
+                                    DAYOBS='20210101'),
+                 '__CONTENT__': 'metadata'}
+        for det_name in ('R22_S11', 'R22_S12'):
+            filename = '{}_{}.fits'.format(name, det_name)
+            with open(os.path.join(folder, filename), 'w') as fd:
+                fd.write(' '*2880)
+            index[filename] = dict(CCDSLOT=det_name[-3:])
+        with open(os.path.join(folder, 'Photodiode_Readings.txt'), 'w') as fd:
+            fd.write('0 0\n')
+        with open(os.path.join(folder, '_index.json'), 'w') as fd:
+            json.dump(index, fd)
+        return folder
+
+    def test_catalog(self):
+        "Test ingesting and querying the frame folders."
+        with FrameCatalog(self.db_file) as catalog:
+            self.assertEqual(catalog.ingest(self.data_dir), 3)
+            # Unchanged folders are not rescanned.
+            self.assertEqual(catalog.ingest(self.data_dir), 0)
+            files = catalog.files(det_name='R22_S11', imgtype='FLAT',
+                                  run=12345)
+            self.assertEqual([os.path.basename(_) for _ in files],
+                             ['MC_C_20210101_000002_R22_S11.fits',
+                              'MC_C_20210101_000003_R22_S11.fits'])
+            self.assertEqual(len(catalog.files(kind='pd')), 3)
+            self.assertEqual(catalog.det_names(run='12345'),
+                             ['R22_S11', 'R22_S12'])
+            frames = catalog.frames(min_seqnum=2)
+            self.assertEqual([_['seqnum'] for _ in frames], [2, 3])
+            self.assertEqual(frames[0]['exptime'], 1.0)
+            self.assertEqual(catalog.testtype_counts(run=12345),
+                             dict(FLAT=3))
+
+            # A file rewritten in place, which doesn't change the
+            # folder mtime, is picked up.
+            folder = os.path.join(self.data_dir, 'MC_C_20210101_000002')
+            folder_mtime = os.stat(folder).st_mtime_ns
+            filename = os.path.join(folder,
+                                    'MC_C_20210101_000002_R22_S11.fits')
+            with open(filename, 'a') as fd:
+                fd.write(' '*2880)
+            self.assertEqual(os.stat(folder).st_mtime_ns, folder_mtime)
+            self.assertEqual(catalog.ingest(self.data_dir), 1)
+            self.assertEqual(catalog.ingest(self.data_dir), 0)
+
+        # The catalog persists and picks up new and removed folders.
+        self.make_frame(4, 'FLAT')
+        shutil.rmtree(os.path.join(self.data_dir, 'MC_C_20210101_000001'))
+        with FrameCatalog(self.db_file) as catalog:
+            self.assertEqual(catalog.ingest(self.data_dir), 1)
+            self.assertEqual([_['seqnum'] for _ in catalog.frames()],
+                             [2, 3, 4])
+            self.assertEqual(len(catalog.files()), 6)
+
+    def test_job_dir(self):
+        "Test ingesting a job directory of frame symlinks."
+        job_dir = os.path.join(self.tmp_dir, 'job')
+        os.mkdir(job_dir)
+        for seqnum in range(1, 4):
+            os.symlink(os.path.join(self.data_dir,
+                                    'MC_C_20210101_{:06d}'.format(seqnum)),
+                       os.path.join(job_dir, 'flat_{:03d}'.format(seqnum)))
+        with open(os.path.join(job_dir, 'bot_eo_acq.cfg'), 'w') as fd:
+            fd.write('[ACQUIRE]\n')
+        with FrameCatalog(self.db_file) as catalog:
+            self.assertEqual(catalog.ingest(job_dir), 3)
+            self.assertEqual([_['name'] for _ in catalog.frames()],
+                             ['MC_C_20210101_{:06d}'.format(_)
+                              for _ in range(1, 4)])
+
+
+if __name__ == '__main__':
+    unittest.main()
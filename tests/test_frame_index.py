@@ -0,0 +1,76 @@
+"""
+Test code for frame_index module.
+"""
+import os
+import glob
+import shutil
+import tempfile
+import unittest
+from frame_index import JobFileIndex, raft_file_index, scan_frame_folder
+from cached_fs import CachedFS
+
+
+class JobFileIndexTestCase(unittest.TestCase):
+    "Test case class for the JobFileIndex class."
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.job_dir = tempfile.mkdtemp()
+        os.chdir(self.job_dir)
+        frame_dir = tempfile.mkdtemp()
+        for i, folder in enumerate(('flat_000', 'bias_001', 'dark_002')):
+            os.mkdir(folder)
+            for det_name in ('R22_S11', 'R22_S00', 'R10_S02'):
+                open(os.path.join(folder, 'MC_C_%03d_%s.fits'
+                                  % (i, det_name)), 'w').close()
+            open(os.path.join(folder, 'Photodiode_Readings_%03d.txt' % i),
+                 'w').close()
+        open(os.path.join('flat_000', '.MC_C_000_R22_S22.fits'), 'w').close()
+        # Symlinked frame folders are indexed like regular folders.
+        os.mkdir(os.path.join(frame_dir, 'MC_C_003'))
+        open(os.path.join(frame_dir, 'MC_C_003', 'MC_C_003_R22_S11.fits'),
+             'w').close()
+        os.symlink(os.path.join(frame_dir, 'MC_C_003'), 'dark_003')
+        self.frame_dir = frame_dir
+        for filename in ('acq.seq', 'bot_eo_acq.cfg', 'bot_eo_acq_2.cfg',
+                         'other.cfg'):
+            open(filename, 'w').close()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.job_dir)
+        shutil.rmtree(self.frame_dir)
+
+    def test_glob_equivalence(self):
+        "Test that the index reproduces the glob results."
+        # Index with direct scans and through a CachedFS.
+        for index in (JobFileIndex('.'), JobFileIndex('.', fs=CachedFS())):
+            for det_name in ('R22_S11', 'R22_S00', 'R10_S02', 'R22_S22'):
+                self.assertEqual(
+                    index.det_files(det_name),
+                    sorted(glob.glob('*/*_{}.fits'.format(det_name))))
+            self.assertEqual(index.folder_files('Photodiode_Readings*.txt'),
+                             sorted(glob.glob('*/Photodiode_Readings*.txt')))
+            self.assertEqual(index.top_level('*.seq'), glob.glob('*.seq'))
+            self.assertEqual(sorted(index.top_level('bot_eo_acq*.cfg')),
+                             sorted(glob.glob('bot_eo_acq*.cfg')))
+
+    def test_raft_file_index(self):
+        "Test the raft_file_index function."
+        # A re-written frame for the same detector is also indexed.
+        open(os.path.join('flat_000', 'MC_C_100_R22_S11.fits'), 'w').close()
+        index = raft_file_index('flat_000')
+        self.assertEqual(sorted(index), ['R10', 'R22'])
+        self.assertEqual(index['R22'],
+                         sorted(glob.glob('flat_000/*_R22_*.fits')))
+
+    def test_scan_frame_folder(self):
+        "Test that all files for a detector are returned."
+        open(os.path.join('flat_000', 'MC_C_100_R22_S11.fits'), 'w').close()
+        files = scan_frame_folder('flat_000')
+        self.assertEqual(files['R22_S11'],
+                         sorted(glob.glob('flat_000/*_R22_S11.fits')))
+        self.assertEqual(len(files['R22_S11']), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Test code for result_cache module.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from result_cache import ResultCache, cached_result
+
+
+class ResultCacheTestCase(unittest.TestCase):
+    "Test case class for the ResultCache class."
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        self.input_file = os.path.join(self.tmp_dir, 'frame.fits')
+        with open(self.input_file, 'w') as fd:
+            fd.write('1\n')
+        self.ncalls = 0
+        self.env = {key: os.environ.pop(key) for key in list(os.environ)
+                    if key.startswith('ALIVENESS_RESULT_CACHE')}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        for key in list(os.environ):
+            if key.startswith('ALIVENESS_RESULT_CACHE'):
+                del os.environ[key]
+        os.environ.update(self.env)
+
+    def signals(self, fits_file):
+        "Stand-in for an analysis function."
+        self.ncalls += 1
+        return {amp: float(open(fits_file).read()) for amp in range(1, 17)}
+
+    def test_get(self):
+        "Test cache hits and invalidation on file changes."
+        cache = ResultCache(self.cache_dir, 2**20)
+        for _ in range(2):
+            result = cache.get('signals', None, self.input_file,
+                               lambda: self.signals(self.input_file))
+        self.assertEqual(self.ncalls, 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(result[1], 1.)
+        # Different parameters or a modified file give new entries.
+        cache.get('signals', dict(border=10), self.input_file,
+                  lambda: self.signals(self.input_file))
+        self.assertEqual(self.ncalls, 2)
+        with open(self.input_file, 'w') as fd:
+            fd.write('2\n')
+        os.utime(self.input_file, ns=(0, 10**9))
+        result = cache.get('signals', None, self.input_file,
+                           lambda: self.signals(self.input_file))
+        self.assertEqual(result[1], 2.)
+        self.assertEqual(self.ncalls, 3)
+        # The size limit is enforced by evicting old entries.
+        cache.max_bytes = cache.nbytes//2
+        cache.get('signals', dict(border=5), self.input_file,
+                  lambda: self.signals(self.input_file))
+        self.assertLessEqual(cache.nbytes, cache.max_bytes)
+
+    def test_cached_result(self):
+        "Test the cached_result decorator and the bypass switch."
+        func = cached_result(backend='numpy')(self.signals)
+        func(self.input_file)
+        func(self.input_file)
+        self.assertEqual(self.ncalls, 2)
+        os.environ['ALIVENESS_RESULT_CACHE_DIR'] = self.cache_dir
+        func(self.input_file)
+        func(self.input_file)
+        self.assertEqual(self.ncalls, 3)
+        os.environ['ALIVENESS_RESULT_CACHE_BYPASS'] = '1'
+        func(self.input_file)
+        self.assertEqual(self.ncalls, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
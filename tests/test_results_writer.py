@@ -0,0 +1,51 @@
+"""
+Test code for results_writer module.
+"""
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from results_writer import ResultsWriter
+
+
+class ResultsWriterTestCase(unittest.TestCase):
+    "Test case class for the ResultsWriter class."
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.outfile = os.path.join(self.tmp_dir, 'summary.lims')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_write(self):
+        "Test that the output is the JSON list of records."
+        records = [dict(schema_name='fileref', schema_version=0,
+                        path='frame_%03d/MC_C_R22_S11.fits' % i, size=i)
+                   for i in range(5)]
+        with ResultsWriter(self.outfile, validate=False) as writer:
+            writer.append(records[0])
+            writer.extend(records[1:])
+            self.assertFalse(os.path.isfile(self.outfile))
+        with open(self.outfile) as fd:
+            self.assertEqual(json.load(fd), records)
+
+        # An exception leaves the existing file in place.
+        try:
+            with ResultsWriter(self.outfile, validate=False) as writer:
+                writer.append(records[0])
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        with open(self.outfile) as fd:
+            self.assertEqual(json.load(fd), records)
+        self.assertEqual(os.listdir(self.tmp_dir), ['summary.lims'])
+
+        with ResultsWriter(self.outfile, validate=False):
+            pass
+        with open(self.outfile) as fd:
+            self.assertEqual(json.load(fd), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
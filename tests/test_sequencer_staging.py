@@ -0,0 +1,101 @@
+"""
+Test code for sequencer_staging module.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import sequencer_staging
+
+
+class SequencerStagingTestCase(unittest.TestCase):
+    "Test case class for the sequencer file staging."
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.src_dir = os.path.join(self.tmp_dir, 'src')
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        os.mkdir(self.src_dir)
+        self.sources = []
+        for name in ('FP_ITL.seq', 'FP_E2V.seq'):
+            self.sources.append(os.path.join(self.src_dir, name))
+            with open(self.sources[-1], 'w') as fd:
+                fd.write(name + ' contents\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def stage(self, dest):
+        "Stage the sequencer files into a new destination directory."
+        dest_dir = os.path.join(self.tmp_dir, dest)
+        os.mkdir(dest_dir)
+        return sequencer_staging.stage_sequencer_files(
+            self.sources, dest_dir=dest_dir, cache_dir=self.cache_dir)
+
+    def test_stage_sequencer_files(self):
+        "Test that unchanged files are linked from the cache."
+        check_call = sequencer_staging.subprocess.check_call
+        with mock.patch('sequencer_staging.subprocess.check_call',
+                        side_effect=check_call) as patched:
+            staged = self.stage('attempt1')
+            self.assertEqual(patched.call_count, 1)
+            self.assertEqual([os.path.basename(_) for _ in staged],
+                             ['FP_ITL.seq', 'FP_E2V.seq'])
+            with open(staged[0]) as fd:
+                self.assertEqual(fd.read(), 'FP_ITL.seq contents\n')
+
+            # Nothing is fetched for the second attempt.
+            restaged = self.stage('attempt2')
+            self.assertEqual(patched.call_count, 1)
+            for old, new in zip(staged, restaged):
+                self.assertTrue(os.path.samefile(old, new))
+
+            # A modified file is fetched again.
+            with open(self.sources[1], 'w') as fd:
+                fd.write('new contents\n')
+            stat = os.stat(self.sources[1])
+            os.utime(self.sources[1], (stat.st_atime, stat.st_mtime + 10))
+            restaged = self.stage('attempt3')
+            self.assertEqual(patched.call_count, 2)
+            self.assertEqual(patched.call_args[0][0][-2], self.sources[1])
+            with open(restaged[1]) as fd:
+                self.assertEqual(fd.read(), 'new contents\n')
+            self.assertTrue(os.path.samefile(staged[0], restaged[0]))
+
+    def test_duplicate_sources(self):
+        "Test the staging of duplicate and same-named sources."
+        other_dir = os.path.join(self.tmp_dir, 'other')
+        os.mkdir(other_dir)
+        other = os.path.join(other_dir, 'FP_ITL.seq')
+        with open(other, 'w') as fd:
+            fd.write('other contents\n')
+        # One source for each REB, plus a file with the same name from
+        # another directory.
+        self.sources = [self.sources[0]]*3 + [self.sources[1], other]
+        check_call = sequencer_staging.subprocess.check_call
+        with mock.patch('sequencer_staging.subprocess.check_call',
+                        side_effect=check_call) as patched:
+            staged = self.stage('attempt1')
+            self.assertEqual(patched.call_count, 2)
+        self.assertEqual([os.path.basename(_) for _ in staged],
+                         ['FP_ITL.seq', 'FP_E2V.seq', 'FP_ITL.seq'])
+        # Both same-named files were cached with their own contents.
+        cache = sequencer_staging.SequencerCache(self.cache_dir)
+        mtimes = sequencer_staging.source_mtimes([self.sources[0], other])
+        for source, contents in ((self.sources[0], 'FP_ITL.seq contents\n'),
+                                 (other, 'other contents\n')):
+            with open(cache.lookup(source, mtimes[source])) as fd:
+                self.assertEqual(fd.read(), contents)
+        with open(staged[-1]) as fd:
+            self.assertEqual(fd.read(), 'other contents\n')
+
+    def test_split_source(self):
+        "Test the parsing of scp sources."
+        self.assertEqual(sequencer_staging.split_source('host:/a/b.seq'),
+                         ('host', '/a/b.seq'))
+        self.assertEqual(sequencer_staging.split_source('/a/b:c.seq'),
+                         (None, '/a/b:c.seq'))
+
+
+if __name__ == '__main__':
+    unittest.main()